@@ -1,4 +1,8 @@
 #!/usr/bin/env python3
+import time
+
+started = time.perf_counter()
+
 import os
 from aws_cdk import App, Environment, RemovalPolicy
 from aws_cdk.aws_logs import RetentionDays
@@ -9,24 +13,41 @@ from application.networking import NetworkingStack
 from application.stateful import StatefulStack
 from application.stateless import StatelessStack
 from application.web import WebStack
-from config import CommonConfig
+from config import FUNCTION_PROFILE_PRESETS, CommonConfig
+from synth import SynthTimer, selected_stacks
 
 app = App()
 
-PipelineStack(
-    app,
-    "TodoPipelineStack",
-    config=CommonConfig(),
-    env=Environment(
-        account=os.getenv("CDK_DEFAULT_ACCOUNT"), region=os.getenv("CDK_DEFAULT_REGION")
-    ),
-)
+# Pass e.g. `-c stacks=Stateful,Stateless` to only build the stacks being worked on, and
+# `-c synth_timings=true` for a report of where the synth's time went.
+stacks = selected_stacks(app)
+timer = SynthTimer(app, started)
+
+if "Pipeline" in stacks:
+    with timer.construct("TodoPipelineStack"):
+        PipelineStack(
+            app,
+            "TodoPipelineStack",
+            config=CommonConfig(function_profiles=FUNCTION_PROFILE_PRESETS["pipeline"]),
+            env=Environment(
+                account=os.getenv("CDK_DEFAULT_ACCOUNT"),
+                region=os.getenv("CDK_DEFAULT_REGION"),
+            ),
+        )
 
 # The below stacks will only synthesize if we supply the required context, which should only be
 # done via the deploy_ephemeral script.
 prefix = app.node.try_get_context("ephemeral_prefix")
 
 if prefix is not None:
+    # Pass e.g. `-c function_profiles=pipeline` to try the pipeline's function profiles out.
+    profiles = app.node.try_get_context("function_profiles") or "ephemeral"
+    if profiles not in FUNCTION_PROFILE_PRESETS:
+        raise ValueError(
+            f"Unknown function profiles {profiles}, expected one of "
+            f"{', '.join(FUNCTION_PROFILE_PRESETS)}"
+        )
+
     ephemeral_config = CommonConfig(
         ephemeral=True,
         prefix=prefix,
@@ -35,29 +56,41 @@ if prefix is not None:
         auto_delete_images=True,
         ecr_lifecycle_rule=[LifecycleRule(max_image_count=1)],
         web_deployment_controller_type=None,
+        log_payload_sample_rate=1.0,
+        function_profiles=FUNCTION_PROFILE_PRESETS[profiles],
     )
 
-    networking = NetworkingStack(app, f"{prefix}NetworkingStack", ephemeral_config)
+    if "Networking" in stacks:
+        with timer.construct(f"{prefix}NetworkingStack"):
+            networking = NetworkingStack(
+                app, f"{prefix}NetworkingStack", ephemeral_config
+            )
 
-    stateful = StatefulStack(app, f"{prefix}StatefulStack", ephemeral_config)
+    if "Stateful" in stacks:
+        with timer.construct(f"{prefix}StatefulStack"):
+            stateful = StatefulStack(app, f"{prefix}StatefulStack", ephemeral_config)
 
-    stateless = StatelessStack(
-        app,
-        f"{prefix}StatelessStack",
-        entries_table=stateful.entries_table,
-        vpc=networking.vpc,
-        vpc_endpoint=networking.vpc_interface_endpoint,
-        config=ephemeral_config,
-    )
+    if "Stateless" in stacks:
+        with timer.construct(f"{prefix}StatelessStack"):
+            stateless = StatelessStack(
+                app,
+                f"{prefix}StatelessStack",
+                entries_table=stateful.entries_table,
+                vpc=networking.vpc,
+                vpc_endpoint=networking.vpc_interface_endpoint,
+                config=ephemeral_config,
+            )
 
-    web_stack = WebStack(
-        app,
-        f"{prefix}WebStack",
-        api=stateless.api,
-        vpc=networking.vpc,
-        ecr_repo=stateful.ecr_repository,
-        config=ephemeral_config,
-    )
+    if "Web" in stacks:
+        with timer.construct(f"{prefix}WebStack"):
+            web_stack = WebStack(
+                app,
+                f"{prefix}WebStack",
+                api=stateless.api,
+                vpc=networking.vpc,
+                ecr_repo=stateful.ecr_repository,
+                config=ephemeral_config,
+            )
 
 
-app.synth()
+timer.synth()
@@ -94,6 +94,31 @@ class NetworkingStack(Stack):
                 security_groups=[security_group],
             )
 
+        # With asynchronous writes enabled, our Lambdas queue entry updates in SQS, which they can
+        # only reach through an interface endpoint from their isolated subnets.
+        if config.async_writes_enabled:
+            self._vpc.add_interface_endpoint(
+                f"{prefix}VpcInterfaceEndpointForWriteQueue",
+                service=ec2.InterfaceVpcEndpointAwsService.SQS,
+                subnets=ec2.SubnetSelection(
+                    subnet_type=ec2.SubnetType.PRIVATE_ISOLATED
+                ),
+                security_groups=[security_group],
+            )
+
+        # With the API's stage cache enabled, our Lambdas invoke themselves asynchronously to
+        # refresh it after a write, which they can only do through an interface endpoint too. They
+        # can only reach a private API in the first place.
+        if config.api_cache_enabled and not config.ephemeral:
+            self._vpc.add_interface_endpoint(
+                f"{prefix}VpcInterfaceEndpointForLambda",
+                service=ec2.InterfaceVpcEndpointAwsService.LAMBDA_,
+                subnets=ec2.SubnetSelection(
+                    subnet_type=ec2.SubnetType.PRIVATE_ISOLATED
+                ),
+                security_groups=[security_group],
+            )
+
         # This VPC gateway endpoint is required to allow the Lambdas housed in our private subnet
         # to access the DynamoDB table defined in our stateful stack.
         self._vpc.add_gateway_endpoint(
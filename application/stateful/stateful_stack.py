@@ -10,6 +10,10 @@ class StatefulStack(Stack):
     def entries_table(self):
         return self._entries_table
 
+    @property
+    def legacy_entries_table(self):
+        return self._legacy_entries_table
+
     @property
     def ecr_repository(self):
         return self._ecr_repository
@@ -18,7 +22,8 @@ class StatefulStack(Stack):
         self, scope: Construct, id: str, config: CommonConfig, **kwargs
     ) -> None:
         """This stack defines a DynamoDB table used to store application data and an ECR
-        repository to store our web app's build image.
+        repository to store our web app's build image. The original entries table is kept
+        alongside it until its data has been migrated.
 
         Args:
             scope (Construct):This stack's parent or owner. This can either be a stack or another
@@ -30,7 +35,49 @@ class StatefulStack(Stack):
 
         prefix = config.prefix
 
+        # Entries are partitioned by the list they belong to, with a local secondary index
+        # ordering each list by a `DateCreated#Id` sort key. Listing a list's entries is then a
+        # single ordered Query that can be read in either direction.
         self._entries_table = dynamo.Table(
+            self,
+            f"{prefix}ListEntriesTable",
+            table_name=f"{prefix}ListEntriesTable",
+            partition_key=dynamo.Attribute(
+                name="ListId", type=dynamo.AttributeType.STRING
+            ),
+            sort_key=dynamo.Attribute(name="Id", type=dynamo.AttributeType.STRING),
+            # Changes are streamed with both images, which keeps each list's snapshot up to date
+            # when list snapshots are enabled in our stateless stack.
+            stream=dynamo.StreamViewType.NEW_AND_OLD_IMAGES,
+            # Deleted entries are kept as tombstones until they expire.
+            time_to_live_attribute="ExpiresAt",
+            removal_policy=config.removal_policy,
+        )
+
+        # This must match CREATED_INDEX_NAME in our DbUtils Lambda layer.
+        self._entries_table.add_local_secondary_index(
+            index_name="CreatedIndex",
+            sort_key=dynamo.Attribute(
+                name="CreatedKey", type=dynamo.AttributeType.STRING
+            ),
+        )
+
+        # A global secondary index over each list, sorted by when entries last changed, for clients
+        # syncing changes. Local secondary indexes can only be created with a table, so unlike the
+        # created index it's global. This must match MODIFIED_INDEX_NAME in our DbUtils layer.
+        self._entries_table.add_global_secondary_index(
+            index_name="ModifiedIndex",
+            partition_key=dynamo.Attribute(
+                name="ListId", type=dynamo.AttributeType.STRING
+            ),
+            sort_key=dynamo.Attribute(
+                name="LastModified", type=dynamo.AttributeType.NUMBER
+            ),
+        )
+
+        # The original table, keyed on Id alone. It's kept around so its entries can be copied
+        # across with the migrate_entries_table script, and can be removed once that's done.
+        self._legacy_entries_table = dynamo.Table(
             self,
             f"{prefix}EntriesTable",
             table_name=f"{prefix}EntriesTable",
@@ -2,20 +2,56 @@ import aws_cdk as core
 import aws_cdk.assertions as assertions
 
 from application.stateful.stateful_stack import StatefulStack
-# from app.todo_api_stack import TodoApiStack
+from config import CommonConfig
 
 
 def test_dynamodb_table_created():
     app = core.App()
-    stateful_stack = StatefulStack(app, "db")
+    stateful_stack = StatefulStack(app, "db", CommonConfig())
     dbtemplate = assertions.Template.from_stack(stateful_stack)
 
-    # stack = TodoApiStack(app, "backend", table=stateful_stack.entries_table)
-    # template = assertions.Template.from_stack(stack)
+    dbtemplate.has_resource_properties(
+        "AWS::DynamoDB::Table",
+        {
+            "KeySchema": [
+                {"AttributeName": "ListId", "KeyType": "HASH"},
+                {"AttributeName": "Id", "KeyType": "RANGE"},
+            ],
+            "LocalSecondaryIndexes": [
+                {
+                    "IndexName": "CreatedIndex",
+                    "KeySchema": [
+                        {"AttributeName": "ListId", "KeyType": "HASH"},
+                        {"AttributeName": "CreatedKey", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            "GlobalSecondaryIndexes": [
+                {
+                    "IndexName": "ModifiedIndex",
+                    "KeySchema": [
+                        {"AttributeName": "ListId", "KeyType": "HASH"},
+                        {"AttributeName": "LastModified", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+            "StreamSpecification": {"StreamViewType": "NEW_AND_OLD_IMAGES"},
+            "TimeToLiveSpecification": {"AttributeName": "ExpiresAt", "Enabled": True},
+        },
+    )
+
+
+def test_legacy_dynamodb_table_retained_for_migration():
+    app = core.App()
+    stateful_stack = StatefulStack(app, "db", CommonConfig())
+    dbtemplate = assertions.Template.from_stack(stateful_stack)
 
     dbtemplate.has_resource_properties(
         "AWS::DynamoDB::Table",
         {
+            "TableName": "TodoEntriesTable",
             "KeySchema": [{"AttributeName": "Id", "KeyType": "HASH"}],
         },
     )
@@ -1,9 +1,27 @@
 from constructs import Construct
+from aws_cdk import ArnFormat, Duration, Size, Stack
 from aws_cdk.aws_dynamodb import ITable
-from aws_cdk.aws_lambda import LayerVersion, Runtime, Function, Code
+from aws_cdk.aws_lambda import Architecture, LayerVersion, Runtime, Function
+from aws_cdk.aws_lambda import StartingPosition
+from aws_cdk.aws_lambda_event_sources import DynamoEventSource, SqsEventSource
 from aws_cdk.aws_ec2 import SubnetSelection, SubnetType, IVpc
+from aws_cdk.aws_iam import PolicyStatement
+from aws_cdk.aws_secretsmanager import Secret, SecretStringGenerator
+from aws_cdk.aws_sqs import DeadLetterQueue, Queue
 
-from config import CommonConfig
+from assets import lambda_code
+from config import CommonConfig, FunctionProfile
+
+
+def profile_options(profile: FunctionProfile) -> dict:
+    """Returns the `Function` arguments that give it a profile's resources."""
+    return {
+        "memory_size": profile.memory_size,
+        "architecture": profile.architecture,
+        "timeout": profile.timeout,
+        "reserved_concurrent_executions": profile.reserved_concurrency,
+        "ephemeral_storage_size": Size.mebibytes(profile.ephemeral_storage_mb),
+    }
 
 
 class EntriesCrudLambdas(Construct):
@@ -23,6 +41,14 @@ class EntriesCrudLambdas(Construct):
     def delete_entry(self) -> Function:
         return self._delete_entry
 
+    @property
+    def flush_entry_updates(self) -> Function | None:
+        return self._flush_entry_updates
+
+    @property
+    def update_list_snapshot(self) -> Function | None:
+        return self._update_list_snapshot
+
     def __init__(
         self,
         scope: Construct,
@@ -33,87 +59,330 @@ class EntriesCrudLambdas(Construct):
     ) -> None:
         """Creates a set of CRUD Lambdas that interact with the entries table passed in.
 
-        The defined Lambdas are exposed to the user as class properties for later use.
+        The defined Lambdas are exposed to the user as class properties for later use. In single
+        function mode the first three are the same router function.
         - `get_entries`
         - `upsert_entry`
         - `delete_entry`
+        - `flush_entry_updates`, only when asynchronous writes are enabled
+        - `update_list_snapshot`, only when list snapshots are enabled
 
         Args:
             scope (Construct): The construct's parent or owner. This can either be a stack or
             another construct.
             id (str): The scoped ID of this construct.
-            entries_table (ITable): The DynamoDB table our Lambda functions will interact with.
+            entries_table (ITable): The DynamoDB table our Lambda functions will interact with. It
+            must have a stream for list snapshots to be enabled.
             vpc (IVpc): The VPC to deploy the Lambda functions in.
             config (CommonConfig): A user-defined configuration data class.
         """
         super().__init__(scope, id)
 
         prefix = config.prefix
+        profiles = config.function_profiles
 
         # Define a Lambda layer for interacting with DynamoDB
         dynamo_lambda_layer = LayerVersion(
             self,
             f"{prefix}DbUtils",
             layer_version_name=f"{prefix}DbUtils",
-            code=Code.from_asset("application/stateless/lambda/layer"),
+            code=lambda_code(
+                self, "application/stateless/lambda/layer", config, layer=True
+            ),
             description="Utility functions for interacting with our Todo entries database.",
             compatible_runtimes=[Runtime.PYTHON_3_9],
+            # The layer is pure Python, so works with either architecture.
+            compatible_architectures=[Architecture.ARM_64, Architecture.X86_64],
         )
 
-        self._get_entries = Function(
+        # Pagination cursors handed out by GET /entries are signed so clients can't forge arbitrary
+        # start keys. Our Lambdas live in isolated subnets without a Secrets Manager endpoint, so
+        # the generated key is resolved by CloudFormation at deploy time instead of at runtime.
+        cursor_signing_key = Secret(
             self,
-            f"{prefix}GetEntries",
-            function_name=f"{prefix}GetEntries",
-            runtime=Runtime.PYTHON_3_9,
-            handler="get_entries.handler",
-            code=Code.from_asset("application/stateless/lambda/get_entries"),
-            environment={"TABLE_NAME": entries_table.table_name},
-            layers=[dynamo_lambda_layer],
-            vpc=vpc,
-            vpc_subnets=SubnetSelection(subnet_type=SubnetType.PRIVATE_ISOLATED),
-            log_format="JSON",
-            log_retention=config.log_retention,
+            f"{prefix}CursorSigningKey",
+            description="Key used to sign pagination cursors returned by the entries API.",
+            generate_secret_string=SecretStringGenerator(
+                exclude_punctuation=True, password_length=64
+            ),
+            removal_policy=config.removal_policy,
         )
+
+        # Handlers only describe their table while initialising when asked to, which saves a
+        # round trip on every cold start. The grant for it is only needed in that case.
+        table_environment = {
+            "TABLE_NAME": entries_table.table_name,
+            "DESCRIBE_TABLE_ON_INIT": str(config.describe_table_on_init).lower(),
+            # Deletes leave tombstones for this long, and syncs can only go back as far.
+            "TOMBSTONE_TTL_SECONDS": str(config.tombstone_ttl_days * 24 * 60 * 60),
+            # Requests and responses are only logged for a sample of invocations, and cut short.
+            "LOG_PAYLOAD_SAMPLE_RATE": str(config.log_payload_sample_rate),
+            "LOG_PAYLOAD_MAX_CHARS": str(config.log_payload_max_chars),
+            # Writers pick up a change to a list's shard count within this long.
+            "SHARD_CONFIG_TTL_SECONDS": str(config.shard_config_ttl_seconds),
+        }
+        describe_actions = (
+            ["dynamodb:DescribeTable"] if config.describe_table_on_init else []
+        )
+
+        # In single function mode every route is served by one router function, so a request to
+        # any of them keeps it warm. Otherwise each handler is deployed as a function of its own.
+        # Either way the properties below return the function serving each handler.
+        router = None
+        # Writers invoke their own function by these names, see `enable_cache_invalidation`.
+        self._writer_names = (
+            [f"{prefix}EntriesRouter"]
+            if config.single_function_router
+            else [f"{prefix}UpsertEntry", f"{prefix}DeleteEntry"]
+        )
+        if config.single_function_router:
+            router = Function(
+                self,
+                f"{prefix}EntriesRouter",
+                function_name=f"{prefix}EntriesRouter",
+                runtime=Runtime.PYTHON_3_9,
+                handler="router.router.handler",
+                code=lambda_code(
+                    self,
+                    "application/stateless/lambda",
+                    config,
+                    exclude=[
+                        "layer",
+                        "flush_entry_updates",
+                        "update_list_snapshot",
+                        "**/__pycache__",
+                    ],
+                ),
+                layers=[dynamo_lambda_layer],
+                vpc=vpc,
+                vpc_subnets=SubnetSelection(subnet_type=SubnetType.PRIVATE_ISOLATED),
+                log_format="JSON",
+                log_retention=config.log_retention,
+                **profile_options(profiles.router),
+            )
+
+        def route_function(name, handler, environment, profile):
+            if router:
+                for key, value in environment.items():
+                    router.add_environment(key, value)
+                return router
+
+            return Function(
+                self,
+                f"{prefix}{name}",
+                function_name=f"{prefix}{name}",
+                runtime=Runtime.PYTHON_3_9,
+                handler=f"{handler}.handler",
+                code=lambda_code(
+                    self, f"application/stateless/lambda/{handler}", config
+                ),
+                environment=environment,
+                layers=[dynamo_lambda_layer],
+                vpc=vpc,
+                vpc_subnets=SubnetSelection(subnet_type=SubnetType.PRIVATE_ISOLATED),
+                log_format="JSON",
+                log_retention=config.log_retention,
+                **profile_options(profile),
+            )
+
+        self._get_entries = route_function(
+            "GetEntries",
+            "get_entries",
+            {
+                **table_environment,
+                "CURSOR_SIGNING_KEY": cursor_signing_key.secret_value.unsafe_unwrap(),
+                # Warm containers cache reads until the list's version changes.
+                "READ_CACHE_ENABLED": str(config.read_cache_enabled).lower(),
+                "READ_CACHE_TTL_SECONDS": str(config.read_cache_ttl_seconds),
+                # Responses served through API Gateway's stage cache are shared by every client.
+                "API_CACHE_ENABLED": str(config.api_cache_enabled).lower(),
+            },
+            profiles.get_entries,
+        )
+        # GetItem reads the list's version, which is written with TransactWriteItems. Transactions
+        # are authorised against the actions they contain, so don't need a grant of their own.
+        # A sharded list's version is summed from its shards' with BatchGetItem.
         entries_table.grant(
-            self._get_entries, "dynamodb:DescribeTable", "dynamodb:Scan"
+            self._get_entries,
+            *describe_actions,
+            "dynamodb:GetItem",
+            "dynamodb:BatchGetItem",
+            "dynamodb:Query",
         )
 
-        # This function will be used for both the POST and PUT verbs.
-        self._upsert_entry = Function(
-            self,
-            f"{prefix}UpsertEntry",
-            function_name=f"{prefix}UpsertEntry",
-            runtime=Runtime.PYTHON_3_9,
-            handler="upsert_entry.handler",
-            code=Code.from_asset("application/stateless/lambda/upsert_entry"),
-            environment={"TABLE_NAME": entries_table.table_name},
-            layers=[dynamo_lambda_layer],
-            vpc=vpc,
-            vpc_subnets=SubnetSelection(subnet_type=SubnetType.PRIVATE_ISOLATED),
-            log_format="JSON",
-            log_retention=config.log_retention,
+        # This function will be used for both the POST and PUT verbs, including batch creates.
+        self._upsert_entry = route_function(
+            "UpsertEntry", "upsert_entry", table_environment, profiles.upsert_entry
         )
         entries_table.grant(
             self._upsert_entry,
-            "dynamodb:DescribeTable",
+            *describe_actions,
+            "dynamodb:GetItem",
+            "dynamodb:BatchGetItem",
+            "dynamodb:PutItem",
+            "dynamodb:UpdateItem",
+            "dynamodb:BatchWriteItem",
+        )
+
+        self._delete_entry = route_function(
+            "DeleteEntry", "delete_entry", table_environment, profiles.delete_entry
+        )
+        # Clearing completed entries queries for them before deleting them in batches. Deleted
+        # entries are overwritten with tombstones rather than deleted outright.
+        entries_table.grant(
+            self._delete_entry,
+            *describe_actions,
+            "dynamodb:GetItem",
+            "dynamodb:BatchGetItem",
             "dynamodb:PutItem",
             "dynamodb:UpdateItem",
+            "dynamodb:Query",
+            "dynamodb:BatchWriteItem",
+        )
+
+        # With list snapshots enabled, a consumer of the table's stream keeps a sorted copy of each
+        # list in a single item, and GET /entries serves it with one GetItem instead of a Query.
+        self._update_list_snapshot = None
+        if config.list_snapshots_enabled:
+            self._get_entries.add_environment("LIST_SNAPSHOTS_ENABLED", "true")
+
+            self._update_list_snapshot = Function(
+                self,
+                f"{prefix}UpdateListSnapshot",
+                function_name=f"{prefix}UpdateListSnapshot",
+                runtime=Runtime.PYTHON_3_9,
+                handler="update_list_snapshot.handler",
+                code=lambda_code(
+                    self, "application/stateless/lambda/update_list_snapshot", config
+                ),
+                environment=table_environment,
+                layers=[dynamo_lambda_layer],
+                vpc=vpc,
+                vpc_subnets=SubnetSelection(subnet_type=SubnetType.PRIVATE_ISOLATED),
+                log_format="JSON",
+                log_retention=config.log_retention,
+                **profile_options(profiles.update_list_snapshot),
+            )
+            # Records are applied in order, so a failing batch is retried rather than skipped.
+            # Anything lost beyond the retries is caught by the version check and rebuilt.
+            self._update_list_snapshot.add_event_source(
+                DynamoEventSource(
+                    entries_table,
+                    starting_position=StartingPosition.TRIM_HORIZON,
+                    batch_size=100,
+                    retry_attempts=10,
+                    bisect_batch_on_error=False,
+                )
+            )
+            entries_table.grant(
+                self._update_list_snapshot,
+                *describe_actions,
+                "dynamodb:GetItem",
+                "dynamodb:PutItem",
+                "dynamodb:Query",
+            )
+
+        # With asynchronous writes enabled, PUTs are queued rather than written. A consumer reads
+        # them in batches gathered over the coalescing window, and collapses repeated updates to
+        # the same entry into a single write.
+        self._flush_entry_updates = None
+        if not config.async_writes_enabled:
+            return
+
+        flush_timeout = profiles.flush_entry_updates.timeout
+        write_queue = Queue(
+            self,
+            f"{prefix}EntryUpdatesQueue",
+            queue_name=f"{prefix}EntryUpdatesQueue",
+            # AWS recommends at least six times the consumer's timeout, so that retries of a
+            # throttled batch aren't redelivered while it's still running.
+            visibility_timeout=Duration.seconds(flush_timeout.to_seconds() * 6),
+            dead_letter_queue=DeadLetterQueue(
+                max_receive_count=5,
+                queue=Queue(
+                    self,
+                    f"{prefix}EntryUpdatesDeadLetterQueue",
+                    queue_name=f"{prefix}EntryUpdatesDeadLetterQueue",
+                    retention_period=Duration.days(14),
+                ),
+            ),
         )
+        self._upsert_entry.add_environment("WRITE_QUEUE_URL", write_queue.queue_url)
+        write_queue.grant_send_messages(self._upsert_entry)
 
-        self._delete_entry = Function(
+        self._flush_entry_updates = Function(
             self,
-            f"{prefix}DeleteEntry",
-            function_name=f"{prefix}DeleteEntry",
+            f"{prefix}FlushEntryUpdates",
+            function_name=f"{prefix}FlushEntryUpdates",
             runtime=Runtime.PYTHON_3_9,
-            handler="delete_entry.handler",
-            code=Code.from_asset("application/stateless/lambda/delete_entry"),
-            environment={"TABLE_NAME": entries_table.table_name},
+            handler="flush_entry_updates.handler",
+            code=lambda_code(
+                self, "application/stateless/lambda/flush_entry_updates", config
+            ),
+            environment=table_environment,
             layers=[dynamo_lambda_layer],
             vpc=vpc,
             vpc_subnets=SubnetSelection(subnet_type=SubnetType.PRIVATE_ISOLATED),
             log_format="JSON",
             log_retention=config.log_retention,
+            **profile_options(profiles.flush_entry_updates),
+        )
+        self._flush_entry_updates.add_event_source(
+            SqsEventSource(
+                write_queue,
+                batch_size=1000,
+                max_batching_window=Duration.seconds(
+                    config.write_coalescing_window_seconds
+                ),
+                report_batch_item_failures=True,
+            )
         )
         entries_table.grant(
-            self._delete_entry, "dynamodb:DescribeTable", "dynamodb:DeleteItem"
+            self._flush_entry_updates,
+            *describe_actions,
+            "dynamodb:GetItem",
+            "dynamodb:UpdateItem",
+        )
+
+    def enable_cache_invalidation(
+        self, api_url: str, invalidate_cache: PolicyStatement
+    ) -> None:
+        """Has every function that writes entries refresh the API's cached responses for the
+        list it wrote to.
+
+        Synchronous writes ask for the refresh in an asynchronous invocation of their own
+        function, which keeps it off the request path. Queued writes are refreshed by
+        flush_entry_updates once they land.
+
+        Args:
+            api_url (str): The URL of the API's stage.
+            invalidate_cache (PolicyStatement): Allows `execute-api:InvalidateCache` on the
+            cached methods.
+        """
+        # Granting a function access to its own ARN would make it depend on itself, so its ARN
+        # is built from the name it's given instead.
+        stack = Stack.of(self)
+        invoke_self = PolicyStatement(
+            actions=["lambda:InvokeFunction"],
+            resources=[
+                stack.format_arn(
+                    service="lambda",
+                    resource="function",
+                    resource_name=name,
+                    arn_format=ArnFormat.COLON_RESOURCE_NAME,
+                )
+                for name in self._writer_names
+            ],
         )
+        writers = [self._upsert_entry]
+        # In single function mode upsert_entry and delete_entry are the same function.
+        if self._delete_entry is not self._upsert_entry:
+            writers.append(self._delete_entry)
+        for writer in writers:
+            writer.add_environment("API_CACHE_URL", api_url)
+            writer.add_to_role_policy(invalidate_cache)
+            writer.add_to_role_policy(invoke_self)
+
+        if self._flush_entry_updates:
+            self._flush_entry_updates.add_environment("API_CACHE_URL", api_url)
+            self._flush_entry_updates.add_to_role_policy(invalidate_cache)
@@ -1,9 +1,13 @@
 from constructs import Construct
+from aws_cdk import Duration, Size, Stack
 from aws_cdk.aws_apigateway import (
     RestApi,
     EndpointConfiguration,
     EndpointType,
+    IResource,
     LambdaIntegration,
+    MethodDeploymentOptions,
+    StageOptions,
 )
 from aws_cdk.aws_iam import PolicyDocument, PolicyStatement, Effect, AnyPrincipal
 from aws_cdk.aws_ec2 import IVpcEndpoint
@@ -82,6 +86,35 @@ class EntriesRestApi(Construct):
                 vpc_endpoints=[vpc_endpoint],
             )
 
+        # GET /entries can optionally be served from a stage cache. Responses vary by every query
+        # parameter, which make up the cache key. Each write can then refresh every cached first
+        # page of its list, see `tododb_utils.invalidate_entries_cache`, which it couldn't with a
+        # key per client's headers too. Behind the cache GetEntries doesn't answer conditional
+        # requests with a 304, or compress its responses, the stage compresses them for each
+        # client on the way out.
+        get_entries_parameters = {
+            "method.request.querystring.limit": False,
+            "method.request.querystring.cursor": False,
+            "method.request.querystring.order": False,
+            "method.request.querystring.all": False,
+            "method.request.querystring.since": False,
+        }
+        if config.api_cache_enabled:
+            deploy_options = StageOptions(
+                stage_name="prod",
+                cache_cluster_enabled=True,
+                cache_cluster_size=config.api_cache_size_gb,
+                method_options={
+                    path: MethodDeploymentOptions(
+                        caching_enabled=True,
+                        cache_ttl=Duration.seconds(config.api_cache_ttl_seconds),
+                    )
+                    for path in ["/entries/GET", "/lists/{listId}/entries/GET"]
+                },
+            )
+        else:
+            deploy_options = StageOptions(stage_name="prod")
+
         # Define the REST API - deploy "prod" by default
         self._api = RestApi(
             self,
@@ -90,11 +123,68 @@ class EntriesRestApi(Construct):
             deploy=True,
             policy=api_resource_policy,
             endpoint_configuration=endpoint_configuration,
+            # Our Lambdas compress large responses themselves and base64 encode them, API Gateway
+            # only decodes them back into binary for a matching media type. Request bodies are
+            # base64 encoded in turn, see `tododb_utils.get_body`.
+            binary_media_types=["*/*"],
+            # Matches `tododb_utils.MIN_COMPRESSIBLE_BYTES`.
+            min_compression_size=(
+                Size.kibibytes(1) if config.api_cache_enabled else None
+            ),
+            deploy_options=deploy_options,
+        )
+
+        # Each list's entries are served under /lists/{listId}/entries, and the default list's
+        # under /entries too. Cached responses are kept per list.
+        self._add_entries_methods(
+            self._api.root.add_resource("entries"), lambdas, get_entries_parameters
+        )
+        self._add_entries_methods(
+            self._api.root.add_resource("lists")
+            .add_resource("{listId}")
+            .add_resource("entries"),
+            lambdas,
+            {"method.request.path.listId": True, **get_entries_parameters},
         )
-        entries_resource = self._api.root.add_resource("entries")
 
+        # Writes refresh their list's cached responses, see `EntriesCrudLambdas`. Our Lambdas can
+        # only reach the API through the VPC endpoint of a private deployment. The URL is built
+        # from the API's id rather than its stage, which would make the Lambdas depend on the
+        # API's deployment, which depends on them.
+        if config.api_cache_enabled and vpc_endpoint:
+            stack = Stack.of(self)
+            api_url = (
+                f"https://{self._api.rest_api_id}.execute-api.{stack.region}."
+                f"{stack.url_suffix}/prod"
+            )
+            lambdas.enable_cache_invalidation(
+                api_url,
+                PolicyStatement(
+                    actions=["execute-api:InvalidateCache"],
+                    resources=[
+                        self._api.arn_for_execute_api(
+                            "GET", "/lists/*/entries", "prod"
+                        ),
+                    ],
+                ),
+            )
+
+    @staticmethod
+    def _add_entries_methods(
+        entries_resource: IResource,
+        lambdas: EntriesCrudLambdas,
+        get_entries_parameters: dict[str, bool],
+    ) -> None:
+        # GET is paginated, `limit` and `cursor` select a page, `order` picks the direction, and
+        # `all=true` opts back into receiving every entry in a single response. `since` returns
+        # only what's changed since the sync point an earlier response handed out.
         entries_resource.add_method(
-            "GET", integration=LambdaIntegration(handler=lambdas.get_entries)
+            "GET",
+            integration=LambdaIntegration(
+                handler=lambdas.get_entries,
+                cache_key_parameters=list(get_entries_parameters),
+            ),
+            request_parameters=get_entries_parameters,
         )
         entries_resource.add_method(
             "POST", integration=LambdaIntegration(handler=lambdas.upsert_entry)
@@ -105,3 +195,20 @@ class EntriesRestApi(Construct):
         entries_resource.add_method(
             "DELETE", integration=LambdaIntegration(handler=lambdas.delete_entry)
         )
+
+        # Bulk operations accept an array of entries, or entry ids, in a single request.
+        batch_resource = entries_resource.add_resource("batch")
+
+        batch_resource.add_method(
+            "POST", integration=LambdaIntegration(handler=lambdas.upsert_entry)
+        )
+        batch_resource.add_method(
+            "DELETE", integration=LambdaIntegration(handler=lambdas.delete_entry)
+        )
+
+        # Deletes every completed entry server side.
+        completed_resource = entries_resource.add_resource("completed")
+
+        completed_resource.add_method(
+            "DELETE", integration=LambdaIntegration(handler=lambdas.delete_entry)
+        )
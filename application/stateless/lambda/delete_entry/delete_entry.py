@@ -1,23 +1,104 @@
+from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 import json
 import logging
-from tododb_utils import get_table
+from tododb_utils import (
+    get_table,
+    get_body,
+    get_list_id,
+    get_route,
+    list_version_headers,
+    is_entry_id,
+    ListIdError,
+    MAX_BATCH_WRITE_WORKERS,
+    batch_write,
+    versioned_write,
+    ShardConfigCache,
+    get_shard_config,
+    entry_partition,
+    read_partitions,
+    map_shards,
+    versions_after_batch,
+    CACHE_INVALIDATION_KEY,
+    invalidate_entries_cache,
+    request_cache_invalidation,
+    is_cache_invalidation,
+    now_ms,
+    tombstone,
+    record_metrics,
+    log_invocation,
+)
 
 
 logger = logging.getLogger(__name__)
 table = get_table(logger)
+shard_configs = ShardConfigCache.from_env()
 
+# Keeps a single batch request comfortably within API Gateway and Lambda payload limits.
+MAX_BATCH_SIZE = 1000
 
+
+@record_metrics
 def handler(event, context):
-    logger.info(f"Event: {event}")
-    logger.info(f"Context: {context}")
+    log_invocation(logger, event, context)
+
+    # Refreshing a list's cached responses is asked for in an invocation of its own, see
+    # `tododb_utils.request_cache_invalidation`.
+    if is_cache_invalidation(event):
+        return invalidate_entries_cache(logger, event[CACHE_INVALIDATION_KEY])
+
+    response = delete(event)
+    if response["statusCode"] == 200:
+        request_cache_invalidation(logger, context, get_list_id(event))
+    return response
+
+
+def delete(event):
+    try:
+        list_id = get_list_id(event)
+    except ListIdError as err:
+        logger.info("Rejected request for list: %s", err)
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": str(err),
+        }
+
+    if get_route(event) == "/entries/completed":
+        return delete_completed_entries(list_id)
+
+    body = json.loads(get_body(event))
+
+    if get_route(event) == "/entries/batch":
+        return delete_entries(list_id, body)
 
-    body = json.loads(event["body"])
-    id = body["Id"]
+    id = body.get("Id") if isinstance(body, dict) else None
+    if not is_entry_id(id):
+        logger.info("Rejected delete of Id: %r", id)
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": "Expected the Id of an entry.",
+        }
+
+    if not shard_configs.covers(table, list_id, id):
+        logger.info("Rejected delete of %s outside list %s's shards", id, list_id)
+        return {
+            "statusCode": 404,
+            "headers": {"Content-Type": "text/plain"},
+            "body": f"No entry with Id: {id}",
+        }
 
     try:
-        table.delete_item(Key={"Id": id})
-        logger.info(f"Deleted entry with Id: {id}")
+        # Deleted entries are replaced by a tombstone, so clients syncing changes learn of them.
+        partition = entry_partition(list_id, id)
+        version = versioned_write(
+            table,
+            partition,
+            {"Put": {"Item": tombstone(id, partition, now_ms())}},
+            read_version=not shard_configs.get(table, list_id).sharded,
+        )
+        logger.info("Deleted entry from list %s with Id: %s", list_id, id)
     except ClientError as err:
         logger.error(
             "Failed when deleting new entry due to: %s: %s",
@@ -26,4 +107,144 @@ def handler(event, context):
         )
         raise
 
-    return {"statusCode": 200, "headers": {"Content-Type": "text/plain"}}
+    return {
+        "statusCode": 200,
+        "headers": {"Content-Type": "text/plain", **list_version_headers(version)},
+    }
+
+
+def tombstone_requests(list_id, ids):
+    modified = now_ms()
+    return [
+        {"PutRequest": {"Item": tombstone(id, entry_partition(list_id, id), modified)}}
+        for id in ids
+    ]
+
+
+def deleted_by_partition(list_id, ids, failures):
+    failed = {failure.index for failure in failures}
+    deleted = {list_id: 0}
+    for index, id in enumerate(ids):
+        if index not in failed:
+            partition = entry_partition(list_id, id)
+            deleted[partition] = deleted.get(partition, 0) + 1
+    return deleted
+
+
+def delete_entries(list_id, ids):
+    if (
+        not isinstance(ids, list)
+        or not 1 <= len(ids) <= MAX_BATCH_SIZE
+        or not all(is_entry_id(id) for id in ids)
+    ):
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": f"Expected an array of between 1 and {MAX_BATCH_SIZE} ids.",
+        }
+
+    unknown = [id for id in ids if not shard_configs.covers(table, list_id, id)]
+    if unknown:
+        logger.info("Rejected delete of %s outside list %s's shards", unknown, list_id)
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": f"No entries with Ids: {', '.join(unknown)}",
+        }
+
+    # BatchWriteItem rejects a batch that mentions the same key twice.
+    ids = list(dict.fromkeys(ids))
+    failures = batch_write(
+        table, tombstone_requests(list_id, ids), max_workers=MAX_BATCH_WRITE_WORKERS
+    )
+    version = versions_after_batch(
+        table,
+        list_id,
+        shard_configs.get(table, list_id),
+        deleted_by_partition(list_id, ids, failures),
+    )
+    failures = [
+        {"id": ids[failure.index], "reason": failure.reason} for failure in failures
+    ]
+    deleted = len(ids) - len(failures)
+    logger.info("Deleted %d of %d entries, failures: %s", deleted, len(ids), failures)
+
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Content-Type": "application/json",
+            **list_version_headers(version),
+        },
+        "body": json.dumps({"failures": failures}),
+    }
+
+
+def find_completed_ids(partition):
+    # Only the keys of completed entries are read back, the filter is applied by DynamoDB so we
+    # never pull the rest of the list into the Lambda.
+    kwargs = {
+        "TableName": table.name,
+        "KeyConditionExpression": Key("ListId").eq(partition),
+        "FilterExpression": Attr("Completed").eq(True),
+        "ProjectionExpression": "#id",
+        "ExpressionAttributeNames": {"#id": "Id"},
+    }
+    ids = []
+
+    # Resources aren't thread safe, so the shards of a sharded list are queried with the
+    # table's underlying client, as in `tododb_utils.parallel_scan`.
+    while True:
+        response = table.meta.client.query(**kwargs)
+        ids.extend(item["Id"] for item in response.get("Items", []))
+
+        start_key = response.get("LastEvaluatedKey", None)
+        if start_key is None:
+            return ids
+        kwargs["ExclusiveStartKey"] = start_key
+
+
+def delete_completed_entries(list_id):
+    # Every shard is cleared, so the shard config is read afresh rather than cached.
+    shards = get_shard_config(table, list_id)
+    try:
+        ids = [
+            id
+            for partition_ids in map_shards(
+                find_completed_ids, read_partitions(list_id, shards)
+            )
+            for id in partition_ids
+        ]
+    except ClientError as err:
+        logger.error(
+            "Failed when querying for completed entries due to: %s: %s",
+            err.response["Error"]["Code"],
+            err.response["Error"]["Message"],
+        )
+        raise
+
+    # Chunks of 25 deletes are sent concurrently.
+    failures = batch_write(
+        table, tombstone_requests(list_id, ids), max_workers=MAX_BATCH_WRITE_WORKERS
+    )
+    version = versions_after_batch(
+        table, list_id, shards, deleted_by_partition(list_id, ids, failures)
+    )
+    failures = [
+        {"id": ids[failure.index], "reason": failure.reason} for failure in failures
+    ]
+    deleted = len(ids) - len(failures)
+    logger.info(
+        "Cleared %d of %d completed entries, failures: %s",
+        deleted,
+        len(ids),
+        failures,
+    )
+
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Content-Type": "application/json",
+            **list_version_headers(version),
+        },
+        "body": json.dumps({"deleted": deleted, "failures": failures}),
+    }
@@ -0,0 +1,138 @@
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+from tododb_utils import (
+    get_table,
+    DEFAULT_LIST_ID,
+    MAX_BATCH_WRITE_WORKERS,
+    entry_key,
+    entry_partition,
+    partition_list_id,
+    bump_list_version,
+    invalidate_entries_cache,
+    now_ms,
+    record_metrics,
+)
+
+
+logger = logging.getLogger(__name__)
+table = get_table(logger)
+
+
+@record_metrics
+def handler(event, context):
+    """
+    Consumes a batch of queued entry updates. Updates to the same entry are collapsed down to
+    the most recent one before anything is written.
+    """
+    logger.info("Received %d queued updates", len(event["Records"]))
+
+    updates, message_ids = collapse(event["Records"])
+    written, failed_keys = flush(updates)
+
+    # Each partition written to moves on a version, once for the whole batch.
+    written_partitions = [partition for partition, count in written.items() if count]
+    for partition in written_partitions:
+        bump_list_version(table, partition)
+    for list_id in {partition_list_id(partition) for partition in written_partitions}:
+        invalidate_entries_cache(logger, list_id)
+
+    logger.info(
+        "Collapsed %d updates into %d writes, %d failed",
+        len(event["Records"]),
+        len(updates),
+        len(failed_keys),
+    )
+
+    # Only the messages behind failed writes are returned to the queue to be retried.
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": message_id}
+            for key in failed_keys
+            for message_id in message_ids[key]
+        ]
+    }
+
+
+def collapse(records):
+    """
+    Keeps the latest update for each entry, returning them along with the ids of every message
+    that contributed to each entry. Both are keyed by the entry's list id and id.
+    """
+    updates, message_ids = {}, {}
+
+    for record in records:
+        update = json.loads(record["body"])
+        # Updates queued before lists were introduced are all to the default list.
+        update.setdefault("ListId", DEFAULT_LIST_ID)
+        key = (update["ListId"], update["Id"])
+        message_ids.setdefault(key, []).append(record["messageId"])
+        if key not in updates or update["RequestedAt"] >= updates[key]["RequestedAt"]:
+            updates[key] = update
+
+    return updates, message_ids
+
+
+def flush(updates):
+    """
+    Writes collapsed updates concurrently, returning how many were written to each partition, a
+    sharded list has several, and the keys of any that failed. DynamoDB has no batched form of
+    UpdateItem, and BatchWriteItem would replace the whole entry.
+    """
+    client = table.meta.client
+
+    def write(update):
+        # An update older than the entry's last one, from a previous batch, or to an entry that's
+        # since been deleted, is dropped rather than retried. One the entry already carries the
+        # stamp of is written again: it's this update redelivered, after its batch failed once
+        # it had landed, and its list's version still has to move on. LastModified records when
+        # the write landed rather than when it was requested, that's what syncing clients read
+        # from.
+        try:
+            client.update_item(
+                TableName=table.name,
+                Key=entry_key(
+                    update["Id"], entry_partition(update["ListId"], update["Id"])
+                ),
+                UpdateExpression=(
+                    "SET Completed = :completed, UpdatedAt = :requested_at, "
+                    "LastModified = :modified"
+                ),
+                ConditionExpression=(
+                    "attribute_exists(Id) AND attribute_not_exists(Deleted) AND "
+                    "(attribute_not_exists(UpdatedAt) OR UpdatedAt <= :requested_at)"
+                ),
+                ExpressionAttributeValues={
+                    ":completed": update["Completed"],
+                    ":requested_at": update["RequestedAt"],
+                    ":modified": now_ms(),
+                },
+            )
+        except ClientError as err:
+            if err.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                logger.info("Skipped stale update to entry with Id: %s", update["Id"])
+                return "skipped"
+            logger.error(
+                "Failed when flushing update to entry %s due to: %s: %s",
+                update["Id"],
+                err.response["Error"]["Code"],
+                err.response["Error"]["Message"],
+            )
+            return "failed"
+        return "written"
+
+    if not updates:
+        return {}, []
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(updates), MAX_BATCH_WRITE_WORKERS)
+    ) as pool:
+        results = dict(zip(updates, pool.map(write, updates.values())))
+
+    written = {}
+    for key, result in results.items():
+        partition = entry_partition(*key)
+        written[partition] = written.get(partition, 0) + (result == "written")
+    failed_keys = [key for key, result in results.items() if result == "failed"]
+    return written, failed_keys
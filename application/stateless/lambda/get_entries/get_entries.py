@@ -1,51 +1,491 @@
 from botocore.exceptions import ClientError
+from collections import Counter
+from itertools import islice
 import json
 import logging
-from tododb_utils import get_table
+from tododb_utils import (
+    get_table,
+    get_client,
+    ListIdError,
+    get_list_id,
+    CREATED_INDEX_NAME,
+    MODIFIED_INDEX_NAME,
+    PaginationError,
+    encode_cursor,
+    decode_cursor,
+    parse_page_size,
+    parse_sort_order,
+    parse_since,
+    get_list_state,
+    shard_partition,
+    read_partitions,
+    map_shards,
+    merge_shards,
+    get_header,
+    etag_matches,
+    api_cache_enabled,
+    compress_response,
+    ReadCache,
+    serialize_item,
+    deserialize_item,
+    deserialize_entry,
+    JsonArrayWriter,
+    peak_rss_mb,
+    list_snapshots_enabled,
+    read_snapshot,
+    SYNC_SETTLE_MS,
+    now_ms,
+    tombstone_ttl_seconds,
+    is_tombstone,
+    record_metrics,
+    log_invocation,
+    log_payload,
+)
 
 
 logger = logging.getLogger(__name__)
 table = get_table(logger)
+# Entries are read with the low-level client, skipping boto3's type conversions.
+client = get_client()
+read_cache = ReadCache.from_env()
+snapshots_enabled = list_snapshots_enabled()
+behind_api_cache = api_cache_enabled()
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
+
+@record_metrics
 def handler(event, context):
-    logger.info(f"Event: {event}")
-    logger.info(f"Context: {context}")
+    log_invocation(logger, event, context)
 
-    entries = []
+    params = event.get("queryStringParameters") or {}
 
     try:
-        scan_kwargs = {}
+        list_id = get_list_id(event)
+    except ListIdError as err:
+        logger.info("Rejected request for list: %s", err)
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": str(err),
+        }
+
+    # Clients resume syncing changes from this point, see `get_changes`. It's taken before anything
+    # is read, so no change can fall between a response and the point it hands out.
+    sync_since = now_ms() - SYNC_SETTLE_MS
+
+    # The version is read before any entries, so a response is never older than its ETag. The
+    # list's shard config comes with it.
+    version, shards = get_list_state(table, list_id)
+    headers = {
+        "ETag": f'"{version}"',
+        "X-List-Version": str(version),
+        "X-Sync-Since": str(sync_since),
+    }
+    syncing = params.get("since") is not None
+
+    # API Gateway's stage cache keeps one response for every client, so behind it a 304 meant
+    # for one would be served to the rest. Conditional requests are answered in full instead.
+    if (
+        not syncing
+        and not behind_api_cache
+        and etag_matches(get_header(event, "If-None-Match"), headers["ETag"])
+    ):
+        logger.info("List %s unchanged since version %d", list_id, version)
+        return compress_response(
+            {"statusCode": 304, "headers": headers},
+            accepted_encodings(event),
+        )
+
+    try:
+        if syncing:
+            return get_changes(
+                event, list_id, shards, parse_since(params["since"]), headers
+            )
+
+        forward = parse_sort_order(params.get("order"))
+
+        # Returning the whole list in one response is kept as an explicit opt-in for callers
+        # that haven't moved over to pagination yet.
+        if params.get("all") == "true":
+            body = read_cache.read_through(
+                ("all", list_id, forward),
+                version,
+                lambda: get_all_entries_json(list_id, shards, forward, version),
+            )
+            log_usage()
+            return compress_response(
+                {"statusCode": 200, "headers": headers, "body": body},
+                accepted_encodings(event),
+            )
+
+        limit = parse_page_size(params.get("limit"), DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        start_key = decode_cursor(params["cursor"]) if params.get("cursor") else None
+        # Cursors are signed, but one handed out for another list would still fail the query.
+        if start_key and start_key.get("ListId") != list_id:
+            raise PaginationError("Cursor was issued for a different list.")
+    except PaginationError as err:
+        logger.info("Rejected page request: %s", err)
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": str(err),
+        }
+
+    def load_page():
+        # Sharded lists are merged from every shard, and aren't snapshotted.
+        if shards.sharded:
+            entries, next_key = get_sharded_page(
+                list_id, shards, forward, limit, start_key
+            )
+            return json.dumps(
+                {"entries": entries, "nextCursor": encode_cursor(next_key, version)}
+            )
+
+        snapshot = current_snapshot(list_id, version)
+        if snapshot:
+            entries, last_evaluated_key = snapshot.page(forward, limit, start_key)
+        else:
+            entries, last_evaluated_key = get_entries_page(
+                list_id, forward, limit, start_key
+            )
+        return json.dumps(
+            {
+                "entries": entries,
+                "nextCursor": encode_cursor(last_evaluated_key, version),
+            }
+        )
+
+    # Cached pages are only served at the version they were read at, see ReadCache.
+    body = read_cache.read_through(
+        ("page", list_id, forward, limit, params.get("cursor")),
+        version,
+        load_page,
+    )
+    log_usage()
+
+    # Large lists compress well, which saves most of their transfer to the web app.
+    return compress_response(
+        {"statusCode": 200, "headers": headers, "body": body},
+        accepted_encodings(event),
+    )
+
+
+def get_changes(event, list_id, shards, since, headers):
+    """
+    Returns the entries changed, and the ids of those deleted, since a sync point handed out by an
+    earlier response. Changes near the sync point may be returned twice, clients apply them by Id.
+    """
+    # Tombstones expire, so a client that's been away longer than that has to reload the list.
+    if since < now_ms() - tombstone_ttl_seconds() * 1000:
+        logger.info("Rejected sync from %s, its tombstones may have expired", since)
+        return {
+            "statusCode": 410,
+            "headers": {"Content-Type": "text/plain"},
+            "body": "Changes this old are no longer kept, reload the list instead.",
+        }
+
+    # The response depends on more than the list's version, so it has no ETag.
+    headers = {name: value for name, value in headers.items() if name != "ETag"}
+    body = get_changes_json(
+        read_partitions(list_id, shards), since, int(headers["X-Sync-Since"])
+    )
+
+    return compress_response(
+        {"statusCode": 200, "headers": headers, "body": body},
+        accepted_encodings(event),
+    )
+
+
+def accepted_encodings(event):
+    # Behind API Gateway's stage cache, responses are cached once for every client and the stage
+    # compresses them for each on the way out, see EntriesRestApi.
+    return None if behind_api_cache else get_header(event, "Accept-Encoding")
+
+
+def log_usage():
+    # Peak RSS is what a function's memory size needs to accommodate. Neither it nor the cache's
+    # stats are worth gathering unless they'll be logged.
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Read cache: %s, peak RSS: %.1fMB", read_cache.stats(), peak_rss_mb()
+        )
+
+
+def current_snapshot(list_id, version):
+    """
+    Returns the list's snapshot if it's enabled and matches the version being served, otherwise
+    None and the list is queried instead.
+    """
+    if not snapshots_enabled:
+        return None
+
+    # The snapshot is checked against the version we've already read, so it needn't be read
+    # consistently.
+    snapshot = read_snapshot(table, list_id)
+    if snapshot is None or snapshot.list_version != version:
+        logger.info("No snapshot of list %s at version %d", list_id, version)
+        return None
+    return snapshot
+
+
+def query_kwargs(list_id, forward):
+    # Entries come back from the created index already ordered by DateCreated, so there's no
+    # need to sort them ourselves.
+    return {
+        "TableName": table.name,
+        "IndexName": CREATED_INDEX_NAME,
+        "KeyConditionExpression": "ListId = :list_id",
+        "ExpressionAttributeValues": {":list_id": {"S": list_id}},
+        "ScanIndexForward": forward,
+    }
+
+
+def get_entries_page(list_id, forward, limit, start_key):
+    kwargs = {**query_kwargs(list_id, forward), "Limit": limit}
+    if start_key:
+        kwargs["ExclusiveStartKey"] = serialize_item(start_key)
+
+    try:
+        response = client.query(**kwargs)
+        log_payload(logger, "Response page", response)
+    except ClientError as err:
+        logger.error(
+            "Failed when querying for entries due to: %s: %s",
+            err.response["Error"]["Code"],
+            err.response["Error"]["Message"],
+        )
+        raise
+
+    entries = to_serialisable(response.get("Items", []))
+    last_evaluated_key = response.get("LastEvaluatedKey", None)
+
+    return entries, last_evaluated_key and deserialize_item(last_evaluated_key)
+
+
+def get_all_entries_json(list_id, shards, forward, version):
+    if shards.sharded:
+        return get_all_sharded_entries_json(list_id, shards, forward)
+
+    snapshot = current_snapshot(list_id, version)
+    if snapshot:
+        entries = snapshot.sorted_entries()
+        return json.dumps(entries if forward else entries[::-1])
+
+    # Each page is encoded as soon as it arrives and then dropped, so rather than holding every
+    # raw item, their converted copies and the response at once, we only hold the response being
+    # built and a single page.
+    writer = JsonArrayWriter()
+
+    try:
+        kwargs = query_kwargs(list_id, forward)
 
         done = False
         start_key = None
 
         while not done:
             if start_key:
-                scan_kwargs["ExclusiveStartKey"] = start_key
-            response = table.scan(**scan_kwargs)
-            logger.info(f"Response page: {response}")
+                kwargs["ExclusiveStartKey"] = start_key
+            response = client.query(**kwargs)
 
-            entries.extend(response.get("Items", []))
+            writer.extend(to_serialisable(response.get("Items", [])))
 
             start_key = response.get("LastEvaluatedKey", None)
             done = start_key is None
+            del response
 
+        logger.info("Queried %d entries", writer.count)
     except ClientError as err:
         logger.error(
-            "Failed when scanning for entries due to: %s: %s",
+            "Failed when querying for entries due to: %s: %s",
             err.response["Error"]["Code"],
             err.response["Error"]["Message"],
         )
         raise
 
-    # Convert the decimal date that come out of Dynamo into a JSON serialisable integer
-    for entry in entries:
-        entry["DateCreated"] = int(entry["DateCreated"])
+    return writer.close()
 
-    entries = sorted(entries, key=lambda entry: entry["DateCreated"])
 
-    return {
-        "statusCode": 200,
-        "body": json.dumps(entries),
-    }
+def to_serialisable(items):
+    # Only hand back the attributes clients know about, read straight from the wire format.
+    return [deserialize_entry(item) for item in items]
+
+
+def get_changes_json(partitions, since, next_since):
+    # The modified index holds every entry and tombstone in the order they were last changed, so
+    # only the changes themselves are read. It's only eventually consistent, which the sync point
+    # being set back allows for. Clients apply changes by Id, so those from each of a sharded
+    # list's partitions needn't be put back in order.
+    def query_changes(partition):
+        kwargs = {
+            "TableName": table.name,
+            "IndexName": MODIFIED_INDEX_NAME,
+            "KeyConditionExpression": "ListId = :list_id AND LastModified > :since",
+            "ExpressionAttributeValues": {
+                ":list_id": {"S": partition},
+                ":since": {"N": str(since)},
+            },
+        }
+        entries, removed = [], []
+        while True:
+            response = client.query(**kwargs)
+            for item in response.get("Items", []):
+                if is_tombstone(item):
+                    removed.append(item["Id"]["S"])
+                else:
+                    entries.append(deserialize_entry(item))
+
+            if "LastEvaluatedKey" not in response:
+                return entries, removed
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    try:
+        changes = map_shards(query_changes, partitions)
+    except ClientError as err:
+        logger.error(
+            "Failed when querying for changed entries due to: %s: %s",
+            err.response["Error"]["Code"],
+            err.response["Error"]["Message"],
+        )
+        raise
+
+    entries = [entry for partition_entries, _ in changes for entry in partition_entries]
+    removed = [id for _, partition_removed in changes for id in partition_removed]
+    logger.info("Found %d changed and %d removed entries", len(entries), len(removed))
+    return json.dumps({"entries": entries, "removed": removed, "nextSince": next_since})
+
+
+def created_key_of(item):
+    return item["CreatedKey"]["S"]
+
+
+def shard_positions(start_key, shards):
+    """
+    Returns where each shard's next page starts, None for its beginning. Shards left out have
+    been read to the end. A cursor handed out before the list was sharded, or before it had as
+    many shards as it does now, starts the shards it didn't know of from the beginning, as they
+    were only written to since.
+    """
+    if start_key is None:
+        return {shard: None for shard in range(shards.read_shards)}
+    if "Shards" not in start_key:
+        known, positions = 1, {0: start_key}
+    else:
+        known = start_key["ShardCount"]
+        positions = {int(shard): key for shard, key in start_key["Shards"].items()}
+    positions.update({shard: None for shard in range(known, shards.read_shards)})
+    return positions
+
+
+def get_sharded_page(list_id, shards, forward, limit, start_key):
+    """
+    Returns a page of a sharded list, merged from a page of each of its shards. Any one shard
+    could hold the whole page, so each is asked for as many entries as the page holds.
+    """
+    positions = shard_positions(start_key, shards)
+
+    def query_shard(shard):
+        kwargs = {
+            **query_kwargs(shard_partition(list_id, shard), forward),
+            "Limit": limit,
+        }
+        if positions[shard]:
+            kwargs["ExclusiveStartKey"] = serialize_item(positions[shard])
+        response = client.query(**kwargs)
+        return response.get("Items", []), "LastEvaluatedKey" in response
+
+    try:
+        results = dict(zip(positions, map_shards(query_shard, positions)))
+    except ClientError as err:
+        logger.error(
+            "Failed when querying for entries due to: %s: %s",
+            err.response["Error"]["Code"],
+            err.response["Error"]["Message"],
+        )
+        raise
+
+    page = list(
+        islice(
+            merge_shards(
+                [
+                    [(shard, item) for item in items]
+                    for shard, (items, _) in results.items()
+                ],
+                key=lambda pair: created_key_of(pair[1]),
+                forward=forward,
+            ),
+            limit,
+        )
+    )
+
+    # Each shard carries on after the last of its entries on this page, or from where it
+    # started if none made it.
+    taken = Counter(shard for shard, _ in page)
+    last_taken = {shard: item for shard, item in page}
+    next_positions = {}
+    for shard, (items, more) in results.items():
+        if shard in last_taken:
+            if taken[shard] < len(items) or more:
+                next_positions[shard] = {
+                    name: last_taken[shard][name]["S"]
+                    for name in ("ListId", "Id", "CreatedKey")
+                }
+        elif items or more:
+            next_positions[shard] = positions[shard]
+
+    next_key = None
+    if next_positions:
+        next_key = {
+            "ListId": list_id,
+            "ShardCount": shards.read_shards,
+            "Shards": {str(shard): key for shard, key in next_positions.items()},
+        }
+    return [deserialize_entry(item) for _, item in page], next_key
+
+
+def get_all_sharded_entries_json(list_id, shards, forward):
+    # Shards are read a page at a time as the merge reaches the end of their last one, so as with
+    # an unsharded list we only hold the response being built, a page from each shard and the
+    # entries waiting to be encoded. Every shard's first page is read concurrently.
+    def first_page(partition):
+        kwargs = query_kwargs(partition, forward)
+        return kwargs, client.query(**kwargs)
+
+    def shard_entries(kwargs, response):
+        while True:
+            for item in response.get("Items", []):
+                yield created_key_of(item), deserialize_entry(item)
+            if "LastEvaluatedKey" not in response:
+                return
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+            response = client.query(**kwargs)
+
+    writer = JsonArrayWriter()
+
+    try:
+        merged = merge_shards(
+            [
+                shard_entries(kwargs, response)
+                for kwargs, response in map_shards(
+                    first_page, read_partitions(list_id, shards)
+                )
+            ],
+            key=lambda pair: pair[0],
+            forward=forward,
+        )
+        while True:
+            chunk = [entry for _, entry in islice(merged, MAX_PAGE_SIZE)]
+            if not chunk:
+                break
+            writer.extend(chunk)
+    except ClientError as err:
+        logger.error(
+            "Failed when querying for entries due to: %s: %s",
+            err.response["Error"]["Code"],
+            err.response["Error"]["Message"],
+        )
+        raise
+
+    logger.info("Queried %d entries from %d shards", writer.count, shards.read_shards)
+    return writer.close()
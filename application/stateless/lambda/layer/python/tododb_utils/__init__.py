@@ -0,0 +1,115 @@
+# Imported first, so a cold start's duration includes loading boto3 and everything after it.
+from .metrics import InvocationMetrics, instrument_client, record_metrics
+from .table import session, get_table, get_client
+from .keys import (
+    DEFAULT_LIST_ID,
+    KEY_NAMES,
+    LIST_ID_PATTERN,
+    CREATED_INDEX_NAME,
+    MODIFIED_INDEX_NAME,
+    LIST_META_ID,
+    SNAPSHOT_ID,
+    RESERVED_ID_PREFIX,
+    entry_key,
+    created_key,
+    list_meta_key,
+    snapshot_key,
+    is_entry_id,
+    ListIdError,
+    parse_list_id,
+)
+from .pagination import (
+    PaginationError,
+    encode_cursor,
+    decode_cursor,
+    parse_page_size,
+    parse_sort_order,
+    parse_since,
+)
+from .scan import parallel_scan, scan_segments_from_env
+from .batch import (
+    MAX_BATCH_WRITE_ITEMS,
+    MAX_BATCH_WRITE_WORKERS,
+    BatchWriteFailure,
+    batch_write,
+)
+from .versions import (
+    get_list_version,
+    versioned_write,
+    bump_list_version,
+)
+from .shards import (
+    SHARD_SEPARATOR,
+    MAX_SHARDS,
+    ShardConfig,
+    ShardConfigCache,
+    shard_partition,
+    is_shard_partition,
+    partition_list_id,
+    shard_entry_id,
+    shard_of_entry,
+    entry_partition,
+    read_partitions,
+    choose_shard,
+    get_shard_config,
+    set_shard_count,
+    map_shards,
+    merge_shards,
+    sharded_list_version,
+    get_list_state,
+    versions_after_batch,
+)
+from .http import (
+    get_header,
+    get_body,
+    etag_matches,
+    get_list_id,
+    get_route,
+    list_version_headers,
+)
+from .cache import ReadCache
+from .codec import (
+    serialize_value,
+    deserialize_value,
+    serialize_item,
+    deserialize_item,
+    deserialize_entry,
+)
+from .encoding import JsonArrayWriter
+from .runtime import peak_rss_mb
+from .compression import (
+    MIN_COMPRESSIBLE_BYTES,
+    available_encodings,
+    negotiate_encoding,
+    compress_response,
+)
+from .api_cache import (
+    CACHE_INVALIDATION_KEY,
+    api_cache_enabled,
+    invalidate_entries_cache,
+    request_cache_invalidation,
+    is_cache_invalidation,
+)
+from .snapshot import (
+    MAX_SNAPSHOT_BYTES,
+    ListSnapshot,
+    list_snapshots_enabled,
+    read_snapshot,
+    read_snapshot_item,
+    recently_oversized,
+    write_snapshot,
+)
+from .changes import (
+    SYNC_SETTLE_MS,
+    now_ms,
+    tombstone_ttl_seconds,
+    tombstone,
+    is_tombstone,
+)
+from .logs import (
+    Truncated,
+    payload_sample_rate,
+    payload_max_chars,
+    log_payload,
+    log_invocation,
+)
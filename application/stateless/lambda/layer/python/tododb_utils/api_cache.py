@@ -0,0 +1,122 @@
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.exceptions import BotoCoreError, ClientError
+import json
+import os
+import urllib.error
+import urllib.request
+
+from .keys import DEFAULT_LIST_ID
+from .table import session
+
+
+# API Gateway caches a response per combination of its cache key parameters, and refreshes one
+# combination per request. Responses are only keyed by their list and query string, not by any
+# header, see EntriesRestApi, so refreshing these leaves no cached first page, or whole list, of
+# it older than a write. Cursors change with the list's version, see `encode_cursor`, so the pages
+# after a fresh first page are never served from the cache. Responses to other page sizes and
+# orders expire with the cache's TTL.
+INVALIDATED_QUERIES = ["", "?all=true"]
+
+# Writes ask for their list's cached responses to be refreshed by invoking their own function
+# again, asynchronously, with an event holding just this key and the list's id.
+CACHE_INVALIDATION_KEY = "InvalidateEntriesCache"
+
+_lambda = None
+
+
+def get_lambda():
+    global _lambda
+    if _lambda is None:
+        _lambda = session.client("lambda")
+    return _lambda
+
+
+def api_cache_enabled():
+    """
+    Reads whether GET /entries is served through API Gateway's stage cache, set by
+    API_CACHE_ENABLED.
+    """
+    return os.environ.get("API_CACHE_ENABLED", "false").lower() == "true"
+
+
+def invalidation_requests(api_url, list_id):
+    """
+    Builds the unsigned GET requests that refresh a list's cached responses.
+    """
+    return [
+        AWSRequest(
+            method="GET",
+            url=f"{api_url}/lists/{list_id}/entries{query}",
+            headers={"Cache-Control": "max-age=0"},
+        )
+        for query in INVALIDATED_QUERIES
+    ]
+
+
+def invalidate_entries_cache(logger, list_id=DEFAULT_LIST_ID, timeout=2.0):
+    """
+    Asks API Gateway to refresh the cached responses for a list's entries, returning whether
+    every one was. Does nothing unless API_CACHE_URL, the URL of the API's stage, is set.
+
+    A `Cache-Control: max-age=0` request is only honoured when signed by a caller allowed to
+    `execute-api:InvalidateCache`. Failures are logged rather than raised, the write has already
+    succeeded and the cache's TTL still bounds how stale a read can be.
+    """
+    api_url = os.environ.get("API_CACHE_URL")
+    if not api_url:
+        return False
+
+    credentials = session.get_credentials().get_frozen_credentials()
+    invalidated = True
+    for request in invalidation_requests(api_url, list_id):
+        SigV4Auth(credentials, "execute-api", session.region_name).add_auth(request)
+        try:
+            with urllib.request.urlopen(
+                urllib.request.Request(
+                    request.url, headers=dict(request.headers), method="GET"
+                ),
+                timeout=timeout,
+            ) as response:
+                response.read()
+        except (urllib.error.URLError, OSError) as err:
+            logger.warning(
+                "Failed to invalidate cached response %s: %s", request.url, err
+            )
+            invalidated = False
+            continue
+        logger.info("Invalidated cached response %s", request.url)
+
+    return invalidated
+
+
+def request_cache_invalidation(logger, context, list_id):
+    """
+    Has the running function refresh a list's cached responses in an invocation of its own,
+    returning whether it was asked to. Refreshing runs `get_entries` through the API, so is kept
+    off the request path. Does nothing unless API_CACHE_URL is set.
+
+    Failures are logged rather than raised, as in `invalidate_entries_cache`.
+    """
+    if not os.environ.get("API_CACHE_URL"):
+        return False
+
+    try:
+        get_lambda().invoke(
+            FunctionName=context.invoked_function_arn,
+            InvocationType="Event",
+            Payload=json.dumps({CACHE_INVALIDATION_KEY: list_id}).encode("utf-8"),
+        )
+    except (BotoCoreError, ClientError) as err:
+        logger.warning("Failed to request invalidation of list %s: %s", list_id, err)
+        return False
+
+    logger.info("Requested invalidation of cached responses for list %s", list_id)
+    return True
+
+
+def is_cache_invalidation(event):
+    """
+    Whether an event is a request from `request_cache_invalidation`, rather than from API Gateway.
+    """
+    return isinstance(event, dict) and CACHE_INVALIDATION_KEY in event
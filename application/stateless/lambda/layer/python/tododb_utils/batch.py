@@ -0,0 +1,117 @@
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+import random
+import time
+
+from .keys import KEY_NAMES
+
+
+# BatchWriteItem accepts at most 25 put or delete requests per call.
+MAX_BATCH_WRITE_ITEMS = 25
+
+# Matches botocore's default connection pool size, see scan.MAX_SCAN_WORKERS.
+MAX_BATCH_WRITE_WORKERS = 10
+
+
+class BatchWriteFailure:
+    """
+    Describes a request that could not be written, `index` is its position in the list of
+    requests passed to `batch_write`.
+    """
+
+    def __init__(self, index, reason):
+        self.index = index
+        self.reason = reason
+
+    def __repr__(self):
+        return f"BatchWriteFailure(index={self.index}, reason={self.reason!r})"
+
+
+def chunked(items, size=MAX_BATCH_WRITE_ITEMS):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """
+    Exponential backoff with full jitter, as recommended for retrying DynamoDB requests.
+    """
+    return random.uniform(0, min(max_delay, base_delay * 2**attempt))
+
+
+def _request_key(request, key_names):
+    if "PutRequest" in request:
+        attributes = request["PutRequest"]["Item"]
+    else:
+        attributes = request["DeleteRequest"]["Key"]
+    return tuple(attributes[name] for name in key_names)
+
+
+def _write_chunk(table, chunk, max_attempts, base_delay, max_delay, key_names):
+    """
+    Writes one chunk of (index, request) pairs, retrying unprocessed items. Returns failures.
+    """
+    client = table.meta.client
+    pending = chunk
+
+    for attempt in range(max_attempts):
+        if attempt:
+            time.sleep(backoff_delay(attempt, base_delay, max_delay))
+
+        try:
+            response = client.batch_write_item(
+                RequestItems={table.name: [request for _, request in pending]}
+            )
+        except ClientError as err:
+            reason = err.response["Error"]["Code"]
+            return [BatchWriteFailure(index, reason) for index, _ in pending]
+
+        unprocessed = response.get("UnprocessedItems", {}).get(table.name, [])
+        if not unprocessed:
+            return []
+
+        # Unprocessed requests come back without their position, so we match them up by key.
+        unprocessed_keys = {_request_key(request, key_names) for request in unprocessed}
+        pending = [
+            (index, request)
+            for index, request in pending
+            if _request_key(request, key_names) in unprocessed_keys
+        ]
+
+    return [BatchWriteFailure(index, "UnprocessedItem") for index, _ in pending]
+
+
+def batch_write(
+    table,
+    requests,
+    max_attempts=6,
+    base_delay=0.05,
+    max_delay=2.0,
+    key_names=KEY_NAMES,
+    max_workers=1,
+):
+    """
+    Writes a list of BatchWriteItem `PutRequest` / `DeleteRequest` dicts to `table` in chunks of
+    25. Unprocessed items are retried with jittered exponential backoff, up to `max_attempts`
+    calls per chunk. With `max_workers` above 1, chunks are written concurrently using the
+    table's shared client.
+
+    A failing chunk doesn't stop the others from being written, instead a list of
+    BatchWriteFailure is returned for every request that couldn't be written.
+    """
+    chunks = list(chunked(list(enumerate(requests))))
+
+    def write_chunk(chunk):
+        return _write_chunk(
+            table, chunk, max_attempts, base_delay, max_delay, key_names
+        )
+
+    if max_workers > 1 and len(chunks) > 1:
+        workers = min(len(chunks), max_workers, MAX_BATCH_WRITE_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(write_chunk, chunks))
+    else:
+        results = [write_chunk(chunk) for chunk in chunks]
+
+    failures = [failure for result in results for failure in result]
+    return sorted(failures, key=lambda failure: failure.index)
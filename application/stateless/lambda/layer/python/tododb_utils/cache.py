@@ -0,0 +1,123 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+
+
+DEFAULT_CACHE_TTL_SECONDS = 60
+DEFAULT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+
+class ReadCache:
+    """
+    A size capped, least recently used cache of serialised reads, kept at module level so it
+    survives between invocations of a warm container.
+
+    Every value is stored against the version of the list it was read at. A lookup passes the
+    list's current version, which callers already read for their ETag, so a single small GetItem
+    tells us whether a cached read is stale without re-reading the list. The TTL bounds how long
+    a value can be served for regardless.
+    """
+
+    def __init__(
+        self,
+        enabled=True,
+        ttl_seconds=DEFAULT_CACHE_TTL_SECONDS,
+        max_bytes=DEFAULT_CACHE_MAX_BYTES,
+        clock=time.monotonic,
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Configures a cache from the READ_CACHE_* environment variables, setting
+        READ_CACHE_ENABLED to "false" bypasses it entirely.
+        """
+        return cls(
+            enabled=os.environ.get("READ_CACHE_ENABLED", "true").lower() != "false",
+            ttl_seconds=float(
+                os.environ.get("READ_CACHE_TTL_SECONDS", DEFAULT_CACHE_TTL_SECONDS)
+            ),
+            max_bytes=int(
+                os.environ.get("READ_CACHE_MAX_BYTES", DEFAULT_CACHE_MAX_BYTES)
+            ),
+        )
+
+    def get(self, key, version):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None
+
+            cached_version, stored_at, value = cached
+            if (
+                cached_version != version
+                or self._clock() - stored_at > self.ttl_seconds
+            ):
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, version, value):
+        """
+        Caches a string or bytes value, values larger than the whole cache aren't kept.
+        """
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (version, self._clock(), value)
+            self._size += len(value)
+
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def read_through(self, key, version, load):
+        """
+        Returns the cached value for `key` at `version`, calling `load` to read and cache it on a
+        miss.
+        """
+        value = self.get(key, version)
+        if value is None:
+            value = load()
+            self.put(key, version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
+
+    def _remove(self, key):
+        _, _, value = self._entries.pop(key)
+        self._size -= len(value)
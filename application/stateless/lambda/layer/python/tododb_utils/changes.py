@@ -0,0 +1,44 @@
+import os
+import time
+
+from .keys import entry_key
+
+
+DEFAULT_TOMBSTONE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# A change can become visible to GET /entries?since= a little after it's stamped. Batch writes
+# land over a few seconds and the modified index is only eventually consistent. The sync point
+# handed to clients is therefore set back by this much, so the next sync overlaps the last.
+SYNC_SETTLE_MS = 5000
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def tombstone_ttl_seconds():
+    """
+    Reads how long deleted entries are remembered for, set by TOMBSTONE_TTL_SECONDS.
+    """
+    return int(os.environ.get("TOMBSTONE_TTL_SECONDS", DEFAULT_TOMBSTONE_TTL_SECONDS))
+
+
+def tombstone(id, list_id, modified):
+    """
+    Returns the item that replaces a deleted entry. It keeps the entry's key and is stamped like
+    any other change, so syncing clients learn of the delete. DynamoDB removes it once its
+    `ExpiresAt` passes. Without a `CreatedKey` it never appears in the created index.
+    """
+    return {
+        **entry_key(id, list_id),
+        "Deleted": True,
+        "LastModified": modified,
+        "ExpiresAt": modified // 1000 + tombstone_ttl_seconds(),
+    }
+
+
+def is_tombstone(item):
+    """
+    Returns whether a wire format item is a deleted entry's tombstone.
+    """
+    return "Deleted" in item
@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+
+def serialize_value(value):
+    """
+    Converts a Python value into a wire format AttributeValue. Only the scalar types our entries
+    are made of are supported, unlike boto3's TypeSerializer.
+    """
+    # bool has to be checked before int, it's a subclass of it.
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, Decimal)):
+        return {"N": str(value)}
+    if isinstance(value, bytes):
+        return {"B": value}
+    if value is None:
+        return {"NULL": True}
+    raise TypeError(f"Unsupported attribute type: {type(value).__name__}")
+
+
+def deserialize_value(attribute_value):
+    """
+    Converts a wire format AttributeValue into a Python value. Whole numbers become ints rather
+    than the Decimals boto3's TypeDeserializer produces.
+    """
+    ((type_, value),) = attribute_value.items()
+    if type_ == "S" or type_ == "BOOL" or type_ == "B":
+        return value
+    if type_ == "N":
+        return Decimal(value) if "." in value or "e" in value.lower() else int(value)
+    if type_ == "NULL":
+        return None
+    raise TypeError(f"Unsupported attribute type: {type_}")
+
+
+def serialize_item(item):
+    return {name: serialize_value(value) for name, value in item.items()}
+
+
+def deserialize_item(item):
+    return {name: deserialize_value(value) for name, value in item.items()}
+
+
+def deserialize_entry(item):
+    """
+    Reads the attributes clients know about straight out of a wire format entry, without
+    converting the rest of the item.
+    """
+    return {
+        "Id": item["Id"]["S"],
+        "DateCreated": int(item["DateCreated"]["N"]),
+        "Description": item["Description"]["S"],
+        "Completed": item["Completed"]["BOOL"],
+    }
@@ -0,0 +1,86 @@
+import base64
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    # Brotli isn't part of the Lambda runtime, we only offer it when it's been bundled with us.
+    brotli = None
+
+
+# Below this size the bytes saved don't pay for compressing, and base64 encoding, the body.
+MIN_COMPRESSIBLE_BYTES = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def available_encodings():
+    """
+    Returns the content codings we can produce, most preferred first.
+    """
+    return ["br", "gzip"] if brotli else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding, available=None):
+    """
+    Picks a content coding from an `Accept-Encoding` header, returning None for the identity
+    coding. Codings the client weights equally are broken by our own preference.
+    """
+    available = available or available_encodings()
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, parameters = part.strip().partition(";")
+        weight = 1.0
+        parameter, _, value = parameters.strip().partition("=")
+        if parameter.strip().lower() == "q":
+            try:
+                weight = float(value)
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+
+    candidates = [
+        (weights.get(coding, weights.get("*", 0.0)), -preference, coding)
+        for preference, coding in enumerate(available)
+    ]
+    weight, _, coding = max(candidates)
+    return coding if weight > 0 else None
+
+
+def compress(body, encoding):
+    data = body.encode("utf-8")
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # A fixed mtime keeps the output, and so any cached copy of it, deterministic.
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encoding, minimum_size=MIN_COMPRESSIBLE_BYTES):
+    """
+    Compresses a proxy integration response's body with the best coding the client accepts.
+
+    Compressed bodies are base64 encoded for API Gateway to decode back into binary, and any ETag
+    is weakened, since a strong ETag identifies one exact sequence of bytes.
+    """
+    body = response.get("body")
+    headers = {**response.get("headers", {}), "Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(accept_encoding)
+
+    if body is None or encoding is None or len(body) < minimum_size:
+        return {**response, "headers": headers}
+
+    compressed = compress(body, encoding)
+    headers["Content-Encoding"] = encoding
+    if "ETag" in headers and not headers["ETag"].startswith("W/"):
+        headers["ETag"] = f"W/{headers['ETag']}"
+
+    return {
+        **response,
+        "headers": headers,
+        "body": base64.b64encode(compressed).decode("ascii"),
+        "isBase64Encoded": True,
+    }
@@ -0,0 +1,34 @@
+import io
+import json
+
+
+class JsonArrayWriter:
+    """
+    Builds a JSON array incrementally, so values can be encoded a page at a time and the pages
+    they came from dropped, rather than holding every value until one final `json.dumps`.
+
+    The output is identical to calling `json.dumps` on the whole list.
+    """
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._buffer.write("[")
+        self.count = 0
+
+    def extend(self, values):
+        if not values:
+            return
+
+        # Encoding a page in one call is much faster than one call per value.
+        encoded = json.dumps(values)
+        if self.count:
+            self._buffer.write(", ")
+        self._buffer.write(encoded[1:-1])
+        self.count += len(values)
+
+    def close(self):
+        """
+        Finishes the array and returns it as a string.
+        """
+        self._buffer.write("]")
+        return self._buffer.getvalue()
@@ -0,0 +1,63 @@
+import base64
+
+from .keys import parse_list_id
+
+
+def get_header(event, name):
+    """
+    Looks up a request header, header names are case insensitive.
+    """
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Determines whether an `If-None-Match` header matches `etag`, using weak comparison.
+    """
+    if not if_none_match:
+        return False
+
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(
+        candidate == "*" or candidate.removeprefix("W/") == etag.removeprefix("W/")
+        for candidate in candidates
+    )
+
+
+def list_version_headers(version):
+    """
+    Returns the header telling a client a list's version after its write, none if the write
+    didn't learn it.
+    """
+    return {} if version is None else {"X-List-Version": str(version)}
+
+
+def get_body(event):
+    """
+    Returns a request's body as text. API Gateway base64 encodes bodies whose content type
+    matches one of the API's binary media types, which for our API is all of them.
+    """
+    body = event.get("body")
+    if body is not None and event.get("isBase64Encoded"):
+        body = base64.b64decode(body).decode("utf-8")
+    return body
+
+
+def get_list_id(event):
+    """
+    Returns the id of the list a request is for, from its path. Raises `ListIdError` for an id
+    we don't accept.
+    """
+    return parse_list_id((event.get("pathParameters") or {}).get("listId"))
+
+
+def get_route(event):
+    """
+    Returns a request's resource path relative to the list it's for, e.g. "/entries/batch" for
+    both "/entries/batch" and "/lists/{listId}/entries/batch".
+    """
+    return (event.get("resource") or "").removeprefix("/lists/{listId}")
@@ -0,0 +1,91 @@
+import re
+
+
+# Entries are partitioned by the list they belong to and keyed by Id within it. Requests to
+# /entries rather than /lists/{listId}/entries are for the default list.
+DEFAULT_LIST_ID = "default"
+KEY_NAMES = ("ListId", "Id")
+
+# List ids appear in URLs and in cache keys, so are limited to characters that are safe in both.
+LIST_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+# A local secondary index over each list, sorted by `CreatedKey`. This must match the index
+# defined on the entries table in our stateful stack.
+CREATED_INDEX_NAME = "CreatedIndex"
+
+# A global secondary index over each list, sorted by when entries were last changed. Deleted
+# entries are included as tombstones. This must match the index defined on the entries table in
+# our stateful stack.
+MODIFIED_INDEX_NAME = "ModifiedIndex"
+
+
+# Every list has a metadata item alongside its entries, holding its version counter. It has no
+# `CreatedKey` so never appears in the created index.
+LIST_META_ID = "#list"
+
+# Lists can also have a snapshot item, a sorted copy of their entries kept up to date from the
+# table's stream. Like the metadata item it never appears in the created index.
+SNAPSHOT_ID = "#snapshot"
+
+# Items kept alongside a list's entries have ids starting with this, which entries' never do.
+RESERVED_ID_PREFIX = "#"
+
+
+def entry_key(entry_id, list_id=DEFAULT_LIST_ID):
+    """
+    Returns the primary key of an entry.
+    """
+    return {"ListId": list_id, "Id": entry_id}
+
+
+def created_key(date_created, entry_id):
+    """
+    Returns the `DateCreated#Id` sort key used by the created index. The date is zero padded so
+    that sorting the keys as strings orders entries by creation date, with the Id breaking ties.
+    """
+    return f"{int(date_created):013d}#{entry_id}"
+
+
+def list_meta_key(list_id=DEFAULT_LIST_ID):
+    """
+    Returns the primary key of a list's metadata item.
+    """
+    return entry_key(LIST_META_ID, list_id)
+
+
+def snapshot_key(list_id=DEFAULT_LIST_ID):
+    """
+    Returns the primary key of a list's snapshot item.
+    """
+    return entry_key(SNAPSHOT_ID, list_id)
+
+
+def is_entry_id(value):
+    """
+    Whether an id taken from a request could name an entry, rather than one of the items kept
+    alongside a list's entries, which clients must never overwrite.
+    """
+    return (
+        isinstance(value, str)
+        and value != ""
+        and not value.startswith(RESERVED_ID_PREFIX)
+    )
+
+
+class ListIdError(ValueError):
+    """
+    Raised when a client names a list by an id we don't accept.
+    """
+
+
+def parse_list_id(value):
+    """
+    Validates a list id taken from a request, returning the default list's when there's none.
+    """
+    if value is None:
+        return DEFAULT_LIST_ID
+    if not LIST_ID_PATTERN.fullmatch(value):
+        raise ListIdError(
+            "List ids are between 1 and 64 letters, digits, underscores or hyphens."
+        )
+    return value
@@ -0,0 +1,70 @@
+import logging
+import os
+import random
+import reprlib
+
+
+DEFAULT_PAYLOAD_SAMPLE_RATE = 0.1
+DEFAULT_PAYLOAD_MAX_CHARS = 2000
+
+# Whether the current invocation's payloads are logged, decided once by `log_invocation` so a
+# sampled request is logged in full rather than a piece at a time.
+_sampled = True
+
+
+def payload_sample_rate():
+    """
+    Reads the fraction of invocations whose payloads are logged, set by LOG_PAYLOAD_SAMPLE_RATE.
+    """
+    return float(os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", DEFAULT_PAYLOAD_SAMPLE_RATE))
+
+
+def payload_max_chars():
+    return int(os.environ.get("LOG_PAYLOAD_MAX_CHARS", DEFAULT_PAYLOAD_MAX_CHARS))
+
+
+class Truncated:
+    """
+    Wraps a payload passed as a log argument. It's only formatted if the record is emitted, and
+    then with `reprlib`, which stops after the first few items of every container, so a large
+    payload costs no more to format than a small one.
+    """
+
+    def __init__(self, payload, max_chars):
+        self.payload = payload
+        self.max_chars = max_chars
+
+    def __str__(self):
+        formatter = reprlib.Repr()
+        formatter.maxlevel = 4
+        formatter.maxdict = formatter.maxlist = formatter.maxtuple = 20
+        formatter.maxstring = formatter.maxother = self.max_chars
+        text = formatter.repr(self.payload)
+        if len(text) <= self.max_chars:
+            return text
+        return f"{text[: self.max_chars]}... ({len(text) - self.max_chars} more characters)"
+
+
+def log_payload(logger, label, payload):
+    """
+    Logs a request, response or other bulky payload at INFO, if the current invocation was
+    sampled, cut down to LOG_PAYLOAD_MAX_CHARS. With DEBUG enabled every payload is logged.
+
+    Errors should be logged as they always have been, in full and regardless of sampling.
+    """
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    if _sampled or logger.isEnabledFor(logging.DEBUG):
+        logger.info("%s: %s", label, Truncated(payload, payload_max_chars()))
+
+
+def log_invocation(logger, event, context):
+    """
+    Decides whether this invocation's payloads are logged, then logs its event and context.
+    Handlers call this first.
+    """
+    global _sampled
+
+    _sampled = random.random() < payload_sample_rate()
+    log_payload(logger, "Event", event)
+    log_payload(logger, "Context", context)
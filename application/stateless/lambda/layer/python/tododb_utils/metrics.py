@@ -0,0 +1,195 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+
+# Set when the layer is first imported, which is as close as we get to the start of a cold start.
+_initialised_at = time.perf_counter()
+_cold = True
+
+DEFAULT_NAMESPACE = "ServerlessTodo"
+
+# Operations that read pages of a list, each call is one page.
+PAGED_OPERATIONS = ("Query", "Scan")
+
+CONSUMED_CAPACITY_OPERATIONS = (
+    "GetItem",
+    "PutItem",
+    "UpdateItem",
+    "DeleteItem",
+    "Query",
+    "Scan",
+    "BatchGetItem",
+    "BatchWriteItem",
+    "TransactGetItems",
+    "TransactWriteItems",
+)
+
+
+class InvocationMetrics:
+    """
+    Collects the DynamoDB calls made during one invocation, grouped by operation. Calls can be
+    recorded from several threads at once, batch writes and scans make them concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations = {}
+
+    def record(self, operation, latency_ms, capacity, failed):
+        with self._lock:
+            totals = self.operations.setdefault(
+                operation,
+                {"Calls": 0, "Errors": 0, "Latency": [], "ConsumedCapacity": 0.0},
+            )
+            totals["Calls"] += 1
+            totals["Errors"] += int(failed)
+            totals["Latency"].append(round(latency_ms, 3))
+            totals["ConsumedCapacity"] += capacity
+
+    @property
+    def page_count(self):
+        return sum(
+            self.operations.get(operation, {}).get("Calls", 0)
+            for operation in PAGED_OPERATIONS
+        )
+
+
+_current = InvocationMetrics()
+
+
+def _consumed_capacity(parsed):
+    # Single item operations return one entry, batches and transactions one per table.
+    consumed = parsed.get("ConsumedCapacity") or []
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(entry.get("CapacityUnits", 0) for entry in consumed)
+
+
+def _request_capacity(params, model, **kwargs):
+    if model.name in CONSUMED_CAPACITY_OPERATIONS:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _start_call(context, **kwargs):
+    context["metrics_started"] = time.perf_counter()
+
+
+def _end_call(http_response, parsed, model, context, **kwargs):
+    started = context.get("metrics_started")
+    if started is None:
+        return
+    _current.record(
+        model.name,
+        (time.perf_counter() - started) * 1000,
+        _consumed_capacity(parsed),
+        failed=http_response.status_code >= 300,
+    )
+
+
+def instrument_client(client):
+    """
+    Times every call made by a DynamoDB client, and asks for the capacity each one consumed.
+    Retries are included in a call's latency.
+    """
+    events = client.meta.events
+    events.register("before-parameter-build.dynamodb", _request_capacity)
+    events.register("before-call.dynamodb", _start_call)
+    events.register("after-call.dynamodb", _end_call)
+    return client
+
+
+def metrics_documents(handler_name, cold_start, duration_ms, init_ms, metrics):
+    """
+    Builds the Embedded Metric Format documents for an invocation. One has the invocation's
+    own metrics, and each DynamoDB operation called gets one of its own.
+    """
+    namespace = os.environ.get("METRICS_NAMESPACE", DEFAULT_NAMESPACE)
+    timestamp = int(time.time() * 1000)
+    properties = {
+        "Handler": handler_name,
+        "ColdStart": str(cold_start).lower(),
+        "PageCount": metrics.page_count,
+    }
+
+    def document(dimensions, units, values):
+        return {
+            "_aws": {
+                "Timestamp": timestamp,
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": namespace,
+                        "Dimensions": dimensions,
+                        "Metrics": [
+                            {"Name": name, "Unit": unit} for name, unit in units.items()
+                        ],
+                    }
+                ],
+            },
+            **properties,
+            **values,
+        }
+
+    invocation_units = {"Duration": "Milliseconds", "PageCount": "Count"}
+    invocation_values = {"Duration": round(duration_ms, 3)}
+    if init_ms is not None:
+        invocation_units["ColdStartDuration"] = "Milliseconds"
+        invocation_values["ColdStartDuration"] = round(init_ms, 3)
+
+    documents = [
+        document(
+            [["Handler"], ["Handler", "ColdStart"]],
+            invocation_units,
+            invocation_values,
+        )
+    ]
+    for operation, totals in metrics.operations.items():
+        documents.append(
+            document(
+                [["Handler", "Operation"], ["Handler", "Operation", "ColdStart"]],
+                {
+                    "Calls": "Count",
+                    "Errors": "Count",
+                    "Latency": "Milliseconds",
+                    "ConsumedCapacity": "Count",
+                },
+                {"Operation": operation, **totals},
+            )
+        )
+    return documents
+
+
+def record_metrics(handler):
+    """
+    Decorates a Lambda handler so its DynamoDB calls, duration and cold start are written to
+    its log as EMF metrics at the end of every invocation, including ones that raise.
+    """
+    handler_name = handler.__module__
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _current, _cold
+
+        started = time.perf_counter()
+        cold_start, _cold = _cold, False
+        init_ms = (started - _initialised_at) * 1000 if cold_start else None
+        _current = InvocationMetrics()
+
+        try:
+            return handler(event, context)
+        finally:
+            for document in metrics_documents(
+                handler_name,
+                cold_start,
+                (time.perf_counter() - started) * 1000,
+                init_ms,
+                _current,
+            ):
+                # EMF documents have to be a log line of their own, so skip the logger's format.
+                sys.stdout.write(json.dumps(document) + "\n")
+            sys.stdout.flush()
+
+    return wrapper
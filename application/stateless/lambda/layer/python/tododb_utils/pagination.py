@@ -0,0 +1,129 @@
+import base64
+from decimal import Decimal
+import hashlib
+import hmac
+import json
+import os
+
+
+class PaginationError(ValueError):
+    """
+    Raised when a client supplies a page size, cursor or sync point we can't honour.
+    """
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _json_default(value):
+    # Numeric key attributes come back from the resource API as Decimals.
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _sign(payload):
+    key = os.environ["CURSOR_SIGNING_KEY"].encode("utf-8")
+    return hmac.new(key, payload, hashlib.sha256).digest()
+
+
+# Cursors carry the version of the list they were handed out at, so each version of a list hands
+# out cursors of its own. API Gateway's stage cache keys responses by cursor, so the pages after
+# a fresh first page are never served from it stale.
+CURSOR_VERSION_KEY = "ListVersion"
+
+
+def encode_cursor(last_evaluated_key, list_version=None):
+    """
+    Turns a DynamoDB `LastEvaluatedKey` into an opaque, signed cursor that can be handed to
+    clients. Returns None when there are no further pages.
+    """
+    if not last_evaluated_key:
+        return None
+
+    if list_version is not None:
+        last_evaluated_key = {**last_evaluated_key, CURSOR_VERSION_KEY: list_version}
+    payload = json.dumps(
+        last_evaluated_key, default=_json_default, separators=(",", ":"), sort_keys=True
+    ).encode("utf-8")
+
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(cursor):
+    """
+    Verifies a cursor produced by `encode_cursor` and returns the `ExclusiveStartKey` it
+    represents. Raises a PaginationError if the cursor is malformed or has been tampered with.
+    """
+    try:
+        encoded_payload, encoded_signature = cursor.split(".")
+        payload = _b64decode(encoded_payload)
+        signature = _b64decode(encoded_signature)
+    except (ValueError, TypeError, AttributeError) as err:
+        raise PaginationError("Malformed cursor.") from err
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise PaginationError("Invalid cursor signature.")
+
+    try:
+        start_key = json.loads(payload)
+    except ValueError as err:
+        raise PaginationError("Malformed cursor.") from err
+
+    if not isinstance(start_key, dict):
+        raise PaginationError("Malformed cursor.")
+
+    start_key.pop(CURSOR_VERSION_KEY, None)
+    return start_key
+
+
+def parse_page_size(value, default, maximum):
+    """
+    Parses the `limit` query string parameter, falling back to `default` when it is absent.
+    """
+    if value is None:
+        return default
+
+    try:
+        page_size = int(value)
+    except ValueError as err:
+        raise PaginationError(f"Invalid limit: {value}") from err
+
+    if not 1 <= page_size <= maximum:
+        raise PaginationError(f"Limit must be between 1 and {maximum}.")
+
+    return page_size
+
+
+def parse_sort_order(value):
+    """
+    Parses the `order` query string parameter into a Query's `ScanIndexForward` flag. Entries are
+    returned oldest first unless `desc` is requested.
+    """
+    if value is None or value == "asc":
+        return True
+    if value == "desc":
+        return False
+
+    raise PaginationError(f"Invalid order: {value}, expected asc or desc.")
+
+
+def parse_since(value):
+    """
+    Parses the `since` query string parameter, a sync point in milliseconds since the epoch as
+    returned in a previous response's `X-Sync-Since` header.
+    """
+    try:
+        since = int(value)
+    except ValueError as err:
+        raise PaginationError(f"Invalid since: {value}") from err
+
+    if since < 0:
+        raise PaginationError("Since must not be negative.")
+
+    return since
@@ -0,0 +1,12 @@
+import resource
+import sys
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process so far, in MB. A Lambda container's peak
+    is reported for its whole lifetime, not just the current invocation.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
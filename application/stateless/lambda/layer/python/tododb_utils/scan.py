@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+
+# botocore clients keep a pool of 10 connections by default, running more threads than that
+# against one shared client would only queue them up behind each other.
+MAX_SCAN_WORKERS = 10
+
+
+def scan_segments_from_env():
+    """
+    Reads the number of segments full table scans should be split into, defaulting to a serial
+    scan.
+    """
+    return max(1, int(os.environ.get("SCAN_SEGMENTS", "1")))
+
+
+def parallel_scan(
+    table, total_segments=None, max_workers=MAX_SCAN_WORKERS, **scan_kwargs
+):
+    """
+    Reads every item in `table` by splitting the scan into `total_segments` segments and
+    draining them concurrently on a bounded thread pool.
+
+    Resources aren't thread safe, so each segment uses the table's underlying client, which is
+    shared between threads. Any extra keyword arguments are passed on to every Scan call.
+    """
+    total_segments = total_segments or scan_segments_from_env()
+    client = table.meta.client
+
+    def scan_segment(segment):
+        kwargs = {"TableName": table.name, **scan_kwargs}
+        if total_segments > 1:
+            kwargs.update(Segment=segment, TotalSegments=total_segments)
+
+        items = []
+        while True:
+            response = client.scan(**kwargs)
+            items.extend(response.get("Items", []))
+
+            start_key = response.get("LastEvaluatedKey", None)
+            if start_key is None:
+                return items
+            kwargs["ExclusiveStartKey"] = start_key
+
+    if total_segments == 1:
+        return scan_segment(0)
+
+    with ThreadPoolExecutor(max_workers=min(total_segments, max_workers)) as pool:
+        segments = pool.map(scan_segment, range(total_segments))
+
+    return [item for segment in segments for item in segment]
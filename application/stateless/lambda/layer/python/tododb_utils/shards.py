@@ -0,0 +1,277 @@
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import os
+import random
+import re
+import threading
+import time
+
+from .batch import backoff_delay
+from .keys import list_meta_key
+from .versions import bump_list_version, get_list_version
+
+
+# A busy list can spread its writes over several partitions, or shards, to stay within the write
+# throughput DynamoDB allows a single partition. Its first shard is the list's own partition, so
+# lists that have never been sharded are laid out as they always were. Further shards are named
+# after the list with this separator, which list ids can't contain.
+SHARD_SEPARATOR = "#"
+
+# Every read of a sharded list queries each of its shards, so their number is kept bounded.
+MAX_SHARDS = 32
+
+# Matches botocore's default connection pool size, see scan.MAX_SCAN_WORKERS.
+MAX_SHARD_WORKERS = 10
+
+# Entries created in any shard but the first have ids that say which, e.g. "s3.<uuid>". Updates
+# and deletes find an entry's partition from its id alone, however many shards its list has now.
+SHARDED_ID_PATTERN = re.compile(r"s([0-9]+)\.(.+)")
+
+
+class ShardConfig:
+    """
+    How many shards a list writes new entries to, and how many its reads cover. Reads cover
+    every shard the list has ever written to, so lowering the number of write shards never hides
+    entries already written.
+    """
+
+    def __init__(self, write_shards=1, read_shards=1):
+        self.write_shards = write_shards
+        self.read_shards = max(read_shards, write_shards)
+
+    @classmethod
+    def from_item(cls, item):
+        return cls(int(item.get("ShardCount", 1)), int(item.get("ReadShards", 1)))
+
+    @property
+    def sharded(self):
+        return self.read_shards > 1
+
+    def __repr__(self):
+        return (
+            f"ShardConfig(write_shards={self.write_shards}, "
+            f"read_shards={self.read_shards})"
+        )
+
+
+def shard_partition(list_id, shard):
+    """
+    Returns the partition key of one of a list's shards.
+    """
+    return list_id if shard == 0 else f"{list_id}{SHARD_SEPARATOR}{shard}"
+
+
+def is_shard_partition(partition):
+    """
+    Whether a partition is one of a list's shards other than its first.
+    """
+    return SHARD_SEPARATOR in partition
+
+
+def partition_list_id(partition):
+    """
+    Returns the id of the list a partition, or shard, belongs to.
+    """
+    return partition.split(SHARD_SEPARATOR, 1)[0]
+
+
+def shard_entry_id(shard, entry_id):
+    return entry_id if shard == 0 else f"s{shard}.{entry_id}"
+
+
+def shard_of_entry(entry_id):
+    """
+    Returns the shard an entry was created in, from its id.
+    """
+    match = SHARDED_ID_PATTERN.fullmatch(entry_id)
+    if match is None or not 0 < int(match.group(1)) < MAX_SHARDS:
+        return 0
+    return int(match.group(1))
+
+
+def entry_partition(list_id, entry_id):
+    """
+    Returns the partition key an entry of a list is stored under.
+    """
+    return shard_partition(list_id, shard_of_entry(entry_id))
+
+
+def read_partitions(list_id, config):
+    return [shard_partition(list_id, shard) for shard in range(config.read_shards)]
+
+
+def choose_shard(config):
+    # Random rather than round robin, as every Lambda container writes independently.
+    return random.randrange(config.write_shards)
+
+
+def get_shard_config(table, list_id, consistent=False):
+    response = table.get_item(
+        Key=list_meta_key(list_id),
+        ConsistentRead=consistent,
+        ProjectionExpression="ShardCount, ReadShards",
+    )
+    return ShardConfig.from_item(response.get("Item", {}))
+
+
+def set_shard_count(table, list_id, count):
+    """
+    Sets how many shards a list writes new entries to, returning its new config. Takes effect
+    without downtime: readers pick up a higher count straight away, and writers within
+    SHARD_CONFIG_TTL_SECONDS. Until then writers keep to the shards they knew of, which are all
+    still read.
+    """
+    if not 1 <= count <= MAX_SHARDS:
+        raise ValueError(f"A list can have between 1 and {MAX_SHARDS} shards")
+
+    config = get_shard_config(table, list_id, consistent=True)
+    read_shards = max(config.read_shards, count)
+    table.update_item(
+        Key=list_meta_key(list_id),
+        UpdateExpression="SET ShardCount = :count, ReadShards = :read_shards",
+        ExpressionAttributeValues={":count": count, ":read_shards": read_shards},
+    )
+    return ShardConfig(count, read_shards)
+
+
+class ShardConfigCache:
+    """
+    Keeps each list's shard config for a while, so writes don't all read it from the list's first
+    shard, which is the partition sharding relieves.
+    """
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self._configs = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(float(os.environ.get("SHARD_CONFIG_TTL_SECONDS", "30")))
+
+    def get(self, table, list_id):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._configs.get(list_id)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        config = get_shard_config(table, list_id)
+        with self._lock:
+            self._configs[list_id] = (config, now + self.ttl_seconds)
+        return config
+
+    def covers(self, table, list_id, entry_id):
+        """
+        Whether an entry's id names one of the shards a list's reads cover. Ids can be made up to
+        name any other, and an entry written there would never be read. A cached config that
+        doesn't cover the id is read again, consistently, as the list may have just gained shards.
+        """
+        shard = shard_of_entry(entry_id)
+        if shard == 0 or shard < self.get(table, list_id).read_shards:
+            return True
+
+        config = get_shard_config(table, list_id, consistent=True)
+        with self._lock:
+            self._configs[list_id] = (config, time.monotonic() + self.ttl_seconds)
+        return shard < config.read_shards
+
+    def clear(self):
+        with self._lock:
+            self._configs.clear()
+
+
+def map_shards(function, shards):
+    """
+    Calls `function` with each shard concurrently, returning the results in order.
+    """
+    shards = list(shards)
+    if len(shards) == 1:
+        return [function(shards[0])]
+    with ThreadPoolExecutor(max_workers=min(len(shards), MAX_SHARD_WORKERS)) as pool:
+        return list(pool.map(function, shards))
+
+
+def merge_shards(shard_items, key, forward):
+    """
+    Merges the items read from each shard, each already sorted by `key`, into a single sorted
+    iterator.
+    """
+    return heapq.merge(*shard_items, key=key, reverse=not forward)
+
+
+def _shard_versions(table, partitions):
+    """
+    Returns the sum of the versions of `partitions`, read consistently in one BatchGetItem.
+    """
+    client = table.meta.client
+    keys = [list_meta_key(partition) for partition in partitions]
+    version = 0
+    for attempt in range(10):
+        if attempt:
+            time.sleep(backoff_delay(attempt, 0.01, 0.2))
+        response = client.batch_get_item(
+            RequestItems={
+                table.name: {
+                    "Keys": keys,
+                    "ConsistentRead": True,
+                    "ProjectionExpression": "#version",
+                    "ExpressionAttributeNames": {"#version": "Version"},
+                }
+            }
+        )
+        version += sum(
+            int(item.get("Version", 0))
+            for item in response["Responses"].get(table.name, [])
+        )
+        keys = response.get("UnprocessedKeys", {}).get(table.name, {}).get("Keys", [])
+        if not keys:
+            return version
+    raise RuntimeError(f"Failed to read the versions of shards {partitions}")
+
+
+def sharded_list_version(table, list_id, config):
+    """
+    Returns the version of a list. Each shard counts the writes to it, so the list's version is
+    their sum, which moves on with every write to any of them. Read consistently, as in
+    `get_list_version`.
+    """
+    if not config.sharded:
+        return get_list_version(table, list_id)
+    return _shard_versions(table, read_partitions(list_id, config))
+
+
+def get_list_state(table, list_id):
+    """
+    Returns a list's version and its shard config, reading the config alongside the first
+    shard's version. Only the other shards' versions are read after it.
+    """
+    response = table.get_item(
+        Key=list_meta_key(list_id),
+        ConsistentRead=True,
+        ProjectionExpression="#version, ShardCount, ReadShards",
+        ExpressionAttributeNames={"#version": "Version"},
+    )
+    item = response.get("Item", {})
+    config = ShardConfig.from_item(item)
+    version = int(item.get("Version", 0))
+    if config.sharded:
+        version += _shard_versions(table, read_partitions(list_id, config)[1:])
+    return version, config
+
+
+def versions_after_batch(table, list_id, config, written):
+    """
+    Bumps the version of each of a list's partitions a batch wrote to, `written` maps them to
+    how many items were written to each. Returns the list's version, or None for a sharded list:
+    summing it would read every shard, including the first, which sharding keeps writes away
+    from. Clients learn it from their next read instead.
+    """
+    versions = {
+        partition: bump_list_version(table, partition)
+        for partition, count in written.items()
+        if count
+    }
+    if config.sharded:
+        return None
+    return versions.get(list_id) or get_list_version(table, list_id)
@@ -0,0 +1,223 @@
+import bisect
+import gzip
+import json
+import os
+import time
+
+from .keys import created_key, snapshot_key
+
+
+# An item can hold at most 400KB. Lists whose compressed snapshot won't fit are left to be read
+# with a Query, their snapshot item only records that it's oversized.
+MAX_SNAPSHOT_BYTES = 350 * 1024
+
+# An oversized list isn't rebuilt on every write, only this often, in case it's since shrunk.
+OVERSIZED_RECHECK_SECONDS = 60 * 60
+
+# Stream records are kept for 24 hours, after which a removed entry's older records can no longer
+# be redelivered and there's no need to remember it.
+STREAM_RETENTION_SECONDS = 24 * 60 * 60
+
+
+class ListSnapshot:
+    """
+    A list's entries sorted by creation date, as maintained from the table's stream.
+
+    Alongside the entries it keeps the stream position they reflect. `sequences` holds the
+    sequence number of the last record applied to each entry, and `removed` the same for deleted
+    entries along with when they were deleted. Records at or below `floor` were already reflected
+    when the snapshot was last rebuilt. `list_version` is the list version the snapshot is known to
+    match, while `pending` holds a version and sequence number that aren't yet confirmed, see the
+    update_list_snapshot handler.
+    """
+
+    def __init__(
+        self,
+        list_id,
+        entries=(),
+        list_version=0,
+        sequences=None,
+        removed=None,
+        floor=0,
+        pending=None,
+    ):
+        self.list_id = list_id
+        self.list_version = list_version
+        self.sequences = sequences or {}
+        self.removed = removed or {}
+        self.floor = floor
+        self.pending = pending
+        self.entries = {entry["Id"]: entry for entry in entries}
+        self._sorted = None
+        self._keys = None
+
+    def last_sequence(self, id):
+        if id in self.removed:
+            return self.removed[id][0]
+        return self.sequences.get(id, 0)
+
+    def put_entry(self, entry, sequence):
+        self.entries[entry["Id"]] = entry
+        self.sequences[entry["Id"]] = sequence
+        self.removed.pop(entry["Id"], None)
+        self._sorted = self._keys = None
+
+    def remove_entry(self, id, sequence, removed_at):
+        self.entries.pop(id, None)
+        self.sequences.pop(id, None)
+        self.removed[id] = [sequence, removed_at]
+        self._sorted = self._keys = None
+
+    def prune_removed(self, now):
+        self.removed = {
+            id: [sequence, removed_at]
+            for id, (sequence, removed_at) in self.removed.items()
+            if now - removed_at < STREAM_RETENTION_SECONDS
+        }
+
+    def sorted_entries(self):
+        """
+        Returns the entries oldest first, the order the created index returns them in.
+        """
+        if self._sorted is None:
+            self._sorted = sorted(
+                self.entries.values(),
+                key=lambda entry: created_key(entry["DateCreated"], entry["Id"]),
+            )
+        return self._sorted
+
+    def page(self, forward, limit, start_key=None):
+        """
+        Returns a page of entries and the key to continue from, in the same shape as a Query on
+        the created index. Cursors can therefore be handed between the two.
+        """
+        entries = self.sorted_entries()
+        if self._keys is None:
+            self._keys = [
+                created_key(entry["DateCreated"], entry["Id"]) for entry in entries
+            ]
+
+        if forward:
+            start = (
+                bisect.bisect_right(self._keys, start_key["CreatedKey"])
+                if start_key
+                else 0
+            )
+            page = entries[start : start + limit]
+            more = start + limit < len(entries)
+        else:
+            end = (
+                bisect.bisect_left(self._keys, start_key["CreatedKey"])
+                if start_key
+                else len(entries)
+            )
+            page = entries[max(0, end - limit) : end][::-1]
+            more = end > limit
+
+        if not (more and page):
+            return page, None
+
+        last = page[-1]
+        return page, {
+            "ListId": self.list_id,
+            "Id": last["Id"],
+            "CreatedKey": created_key(last["DateCreated"], last["Id"]),
+        }
+
+    def to_item(self):
+        """
+        Returns the snapshot as an item. Entries and stream positions are stored as compressed
+        JSON in a single binary attribute, which is far smaller than the equivalent list of maps.
+        """
+        item = {
+            **snapshot_key(self.list_id),
+            "ListVersion": self.list_version,
+            "EntryCount": len(self.entries),
+        }
+        state = gzip.compress(
+            json.dumps(
+                {
+                    "entries": self.sorted_entries(),
+                    "sequences": self.sequences,
+                    "removed": self.removed,
+                    "floor": self.floor,
+                    "pending": self.pending,
+                },
+                separators=(",", ":"),
+            ).encode("utf-8"),
+            mtime=0,
+        )
+        if len(state) > MAX_SNAPSHOT_BYTES:
+            item["Oversized"] = True
+            item["CheckedAt"] = int(time.time())
+        else:
+            item["Snapshot"] = state
+        return item
+
+    @classmethod
+    def from_item(cls, item):
+        """
+        Reads a snapshot item, returning None for one that was too large to store.
+        """
+        if "Snapshot" not in item:
+            return None
+
+        state = json.loads(gzip.decompress(bytes(item["Snapshot"].value)))
+        snapshot = cls(
+            item["ListId"],
+            state["entries"],
+            list_version=int(item["ListVersion"]),
+            sequences=state["sequences"],
+            removed=state["removed"],
+            floor=state["floor"],
+            pending=state["pending"],
+        )
+        # Entries are stored already sorted.
+        snapshot._sorted = state["entries"]
+        return snapshot
+
+
+def list_snapshots_enabled():
+    """
+    Reads whether lists are served from their snapshot, set by LIST_SNAPSHOTS_ENABLED.
+    """
+    return os.environ.get("LIST_SNAPSHOTS_ENABLED", "false").lower() == "true"
+
+
+def read_snapshot_item(table, list_id, consistent=False):
+    """
+    Returns a list's snapshot item, or None if it has none.
+    """
+    response = table.get_item(Key=snapshot_key(list_id), ConsistentRead=consistent)
+    return response.get("Item")
+
+
+def read_snapshot(table, list_id, consistent=False):
+    """
+    Returns a list's snapshot, or None if it has no snapshot or one too large to store.
+    """
+    item = read_snapshot_item(table, list_id, consistent)
+    if item is None:
+        return None
+    return ListSnapshot.from_item(item)
+
+
+def recently_oversized(item, now):
+    """
+    Whether a snapshot item records that its list was too large to snapshot, recently enough
+    that it isn't worth rebuilding yet.
+    """
+    return (
+        item is not None
+        and bool(item.get("Oversized"))
+        and now - int(item.get("CheckedAt", 0)) < OVERSIZED_RECHECK_SECONDS
+    )
+
+
+def write_snapshot(table, snapshot):
+    """
+    Stores a list's snapshot, returning False if it was too large and only its size was recorded.
+    """
+    item = snapshot.to_item()
+    table.put_item(Item=item)
+    return "Snapshot" in item
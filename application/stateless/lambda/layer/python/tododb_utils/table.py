@@ -0,0 +1,101 @@
+import boto3
+from botocore.exceptions import ClientError
+import os
+import time
+
+from .metrics import instrument_client
+
+
+# A single session and resource are shared by every handler in the container. They're created
+# at import time on purpose, Lambda runs the init phase with a full vCPU so loading boto3's
+# service models is cheaper here than on the first invocation.
+_session_started = time.perf_counter()
+session = boto3.session.Session()
+dynamo_resource = session.resource("dynamodb")
+instrument_client(dynamo_resource.meta.client)
+
+_resource_ready = time.perf_counter()
+
+_client = None
+
+
+class LazyTable:
+    """
+    Stands in for a boto3 Table resource, only building it the first time it's used.
+    """
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self._table = None
+
+    def _resolve(self):
+        if self._table is None:
+            self._table = dynamo_resource.Table(self.table_name)
+        return self._table
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __repr__(self):
+        return f"LazyTable(table_name={self.table_name!r})"
+
+
+def get_client():
+    """
+    Returns a low-level DynamoDB client from the shared session, creating it on first use.
+
+    Unlike `dynamo_resource.meta.client`, it has no resource type (de)serialisation hooked in, so
+    requests and responses are in the wire format, see `codec` for converting them.
+    """
+    global _client
+    if _client is None:
+        _client = instrument_client(session.client("dynamodb"))
+    return _client
+
+
+def describe_table_on_init():
+    """
+    Reads whether handlers should check their table exists while initialising, which costs a
+    DescribeTable round trip and grant.
+    """
+    return os.environ.get("DESCRIBE_TABLE_ON_INIT", "false").lower() == "true"
+
+
+def get_table(logger, describe=None):
+    """
+    Returns our table to the caller. When `describe` is set, or DESCRIBE_TABLE_ON_INIT is "true",
+    we first determine that the table exists. Otherwise a lazy handle is returned and a missing
+    table is only reported by the first request made against it.
+    """
+    table_name = os.environ["TABLE_NAME"]
+    describe = describe_table_on_init() if describe is None else describe
+
+    if not describe:
+        table = LazyTable(table_name)
+        log_cold_start(logger, table_name, describe_ms=None)
+        return table
+
+    try:
+        describe_started = time.perf_counter()
+        table = dynamo_resource.Table(table_name)
+        table.load()
+    except ClientError as err:
+        logger.error(
+            "Ran into an error when trying to get table %s. %s: %s",
+            table_name,
+            err.response["Error"]["Code"],
+            err.response["Error"]["Message"],
+        )
+        raise
+
+    log_cold_start(logger, table_name, (time.perf_counter() - describe_started) * 1000)
+    return table
+
+
+def log_cold_start(logger, table_name, describe_ms):
+    logger.info(
+        "Initialised table %s, boto3 session and resource took %.1fms, DescribeTable %s",
+        table_name,
+        (_resource_ready - _session_started) * 1000,
+        "was skipped" if describe_ms is None else f"took {describe_ms:.1f}ms",
+    )
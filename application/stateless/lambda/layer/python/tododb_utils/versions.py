@@ -0,0 +1,88 @@
+from botocore.exceptions import ClientError
+import time
+
+from .batch import backoff_delay
+from .keys import list_meta_key
+
+
+def get_list_version(table, list_id):
+    """
+    Returns the current version of a list, 0 if it has never been written to. The read is
+    strongly consistent so a client is never told about a version older than its last write.
+    """
+    response = table.get_item(
+        Key=list_meta_key(list_id),
+        ConsistentRead=True,
+        ProjectionExpression="#version",
+        ExpressionAttributeNames={"#version": "Version"},
+    )
+    return int(response.get("Item", {}).get("Version", 0))
+
+
+def _version_bump(table_name, list_id):
+    return {
+        "Update": {
+            "TableName": table_name,
+            "Key": list_meta_key(list_id),
+            "UpdateExpression": "ADD #version :one",
+            "ExpressionAttributeNames": {"#version": "Version"},
+            "ExpressionAttributeValues": {":one": 1},
+        }
+    }
+
+
+# Cancellation reasons that say nothing about the write itself, so it can be tried again.
+RETRYABLE_CANCELLATIONS = ("ThrottlingError", "TransactionConflict")
+
+
+def versioned_write(table, list_id, action, max_attempts=5, read_version=True):
+    """
+    Applies a write to an entry and increments its list's version in a single transaction,
+    returning the list's version after it, or None without `read_version`.
+
+    `action` is one TransactWriteItems action without its `TableName`, e.g.
+    `{"Put": {"Item": {...}}}`. The version is bumped unconditionally, so concurrent writers to
+    the same list never fail each other, and then read back consistently. It may include other
+    writers' bumps as well as ours. A transaction that's throttled, or that clashes with another
+    in flight, is cancelled rather than raising an error botocore would retry itself, so we try
+    those again.
+    """
+    client = table.meta.client
+    ((kind, action),) = action.items()
+
+    for attempt in range(max_attempts):
+        if attempt:
+            time.sleep(backoff_delay(attempt, 0.01, 0.2))
+
+        try:
+            client.transact_write_items(
+                TransactItems=[
+                    {kind: {"TableName": table.name, **action}},
+                    _version_bump(table.name, list_id),
+                ]
+            )
+            return get_list_version(table, list_id) if read_version else None
+        except ClientError as err:
+            reasons = err.response.get("CancellationReasons", [])
+            retryable = err.response["Error"][
+                "Code"
+            ] == "TransactionCanceledException" and any(
+                reason.get("Code") in RETRYABLE_CANCELLATIONS for reason in reasons
+            )
+            if not retryable or attempt == max_attempts - 1:
+                raise
+
+
+def bump_list_version(table, list_id):
+    """
+    Increments a list's version outside of a transaction, returning the new version. Used after
+    batch writes, which can't take part in a transaction.
+    """
+    response = table.update_item(
+        Key=list_meta_key(list_id),
+        UpdateExpression="ADD #version :one",
+        ExpressionAttributeNames={"#version": "Version"},
+        ExpressionAttributeValues={":one": 1},
+        ReturnValues="UPDATED_NEW",
+    )
+    return int(response["Attributes"]["Version"])
@@ -0,0 +1,84 @@
+import importlib
+import logging
+import os
+import sys
+import time
+from tododb_utils import (
+    CACHE_INVALIDATION_KEY,
+    get_route,
+    invalidate_entries_cache,
+    is_cache_invalidation,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# In single function mode every handler is deployed in one asset, each in its own directory
+# alongside this one, as they are in the repository.
+LAMBDA_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_handler(name):
+    handler_dir = os.path.join(LAMBDA_ROOT, name)
+    if handler_dir not in sys.path:
+        sys.path.insert(0, handler_dir)
+    return importlib.import_module(name)
+
+
+# Handlers are imported while the function initialises, which Lambda runs with a full vCPU, so
+# no route pays for its imports on its first request.
+get_entries = import_handler("get_entries")
+upsert_entry = import_handler("upsert_entry")
+delete_entry = import_handler("delete_entry")
+
+# Routes on the HTTP method and API Gateway resource path of each method our REST API defines.
+# Every route is also served under /lists/{listId}, see `tododb_utils.get_route`.
+ROUTES = {
+    ("GET", "/entries"): get_entries.handler,
+    ("POST", "/entries"): upsert_entry.handler,
+    ("PUT", "/entries"): upsert_entry.handler,
+    ("DELETE", "/entries"): delete_entry.handler,
+    ("POST", "/entries/batch"): upsert_entry.handler,
+    ("DELETE", "/entries/batch"): delete_entry.handler,
+    ("DELETE", "/entries/completed"): delete_entry.handler,
+}
+
+_cold = True
+
+
+def handler(event, context):
+    """
+    Serves every route of the entries API from a single function, dispatching each request to
+    the handler that would otherwise run in a function of its own.
+    """
+    global _cold
+    cold, _cold = _cold, False
+
+    # Writes ask for their list's cached responses to be refreshed by invoking this function
+    # again, see `tododb_utils.request_cache_invalidation`.
+    if is_cache_invalidation(event):
+        return invalidate_entries_cache(logger, event[CACHE_INVALIDATION_KEY])
+
+    route = (event["requestContext"]["httpMethod"], event.get("resource"))
+    route_handler = ROUTES.get((route[0], get_route(event)))
+    if route_handler is None:
+        logger.info("No route for %s", route)
+        return {
+            "statusCode": 404,
+            "headers": {"Content-Type": "text/plain"},
+            "body": f"No route for {route[0]} {route[1]}",
+        }
+
+    started = time.perf_counter()
+    try:
+        return route_handler(event, context)
+    finally:
+        # Lambda's REPORT lines give cold starts and latency per function, which in this mode
+        # covers every route, so we log them per route too.
+        logger.info(
+            "Routed %s %s in %.1fms, cold start: %s",
+            route[0],
+            route[1],
+            (time.perf_counter() - started) * 1000,
+            cold,
+        )
@@ -0,0 +1,190 @@
+from botocore.exceptions import ClientError
+import logging
+import time
+from tododb_utils import (
+    get_table,
+    get_client,
+    CREATED_INDEX_NAME,
+    LIST_META_ID,
+    ListSnapshot,
+    get_list_version,
+    read_snapshot_item,
+    recently_oversized,
+    write_snapshot,
+    deserialize_entry,
+    is_tombstone,
+    is_shard_partition,
+    record_metrics,
+)
+
+
+logger = logging.getLogger(__name__)
+table = get_table(logger)
+client = get_client()
+
+
+class SnapshotDrift(Exception):
+    """
+    Raised when a stream record shows a snapshot no longer matches its list, and has to be
+    rebuilt.
+    """
+
+
+@record_metrics
+def handler(event, context):
+    """
+    Keeps each list's snapshot up to date with a batch of records from the entries table's
+    stream, rebuilding it from the table when it has drifted.
+    """
+    records_by_list = {}
+    for record in event["Records"]:
+        list_id = record["dynamodb"]["Keys"]["ListId"]["S"]
+        # Sharded lists are read from their shards rather than a snapshot, see get_entries.
+        if is_shard_partition(list_id):
+            continue
+        records_by_list.setdefault(list_id, []).append(record)
+
+    for list_id, records in records_by_list.items():
+        update_snapshot(list_id, records)
+
+
+def is_own_record(record):
+    # Records for the snapshot item itself, produced by our own writes. They change nothing, but
+    # do mark a point in the stream, see `apply_record`.
+    id = record["dynamodb"]["Keys"]["Id"]["S"]
+    return id.startswith("#") and id != LIST_META_ID
+
+
+def update_snapshot(list_id, records):
+    item = read_snapshot_item(table, list_id, consistent=True)
+
+    # A list too large to snapshot is served with a Query, so isn't rebuilt for every write,
+    # which would read the whole of it each time.
+    if recently_oversized(item, time.time()):
+        return
+
+    snapshot = ListSnapshot.from_item(item) if item else None
+
+    # Writing the snapshot produces a record of its own, which mustn't cause another write. It's
+    # only needed to confirm a pending version.
+    if all(map(is_own_record, records)) and (
+        snapshot is None or snapshot.pending is None
+    ):
+        return
+
+    changed = snapshot is None
+    try:
+        if snapshot is not None:
+            for record in records:
+                changed = apply_record(snapshot, record) or changed
+    except SnapshotDrift as err:
+        logger.warning("Snapshot of list %s has drifted, rebuilding: %s", list_id, err)
+        changed = True
+        snapshot = None
+
+    if snapshot is None:
+        # Every record in the batch was written before we query, so the rebuilt snapshot already
+        # reflects them and any redelivery of them.
+        snapshot = rebuild_snapshot(
+            list_id, max(int(r["dynamodb"]["SequenceNumber"]) for r in records)
+        )
+
+    if not changed:
+        return
+
+    snapshot.prune_removed(time.time())
+    if write_snapshot(table, snapshot):
+        logger.info(
+            "Stored snapshot of list %s with %d entries at version %d",
+            list_id,
+            len(snapshot.entries),
+            snapshot.list_version,
+        )
+    else:
+        logger.warning(
+            "Snapshot of list %s is too large to store, it'll be read with a Query",
+            list_id,
+        )
+
+
+def apply_record(snapshot, record):
+    """
+    Applies a stream record to a snapshot, returning whether it changed anything.
+
+    Records can be redelivered, so each entry's are only applied in sequence number order, and
+    a removed entry is remembered for as long as its older records could still turn up.
+
+    The list's version is bumped in the same transaction as a single entry write, but the two
+    records can land either side of a batch boundary. A new version is therefore only pending
+    until a later record is seen, by which point the write it belongs to has been applied. Our
+    own snapshot writes provide that later record when nothing else does.
+    """
+    data = record["dynamodb"]
+    sequence = int(data["SequenceNumber"])
+    id = data["Keys"]["Id"]["S"]
+    changed = False
+
+    if snapshot.pending and sequence > snapshot.pending[1]:
+        snapshot.list_version, snapshot.pending = snapshot.pending[0], None
+        changed = True
+
+    if sequence <= snapshot.floor or is_own_record(record):
+        return changed
+
+    if id == LIST_META_ID:
+        old = int(data.get("OldImage", {}).get("Version", {"N": "0"})["N"])
+        new = int(data.get("NewImage", {}).get("Version", {"N": "0"})["N"])
+        known = snapshot.pending[0] if snapshot.pending else snapshot.list_version
+
+        if new <= known:
+            return changed
+        if old != known:
+            raise SnapshotDrift(f"version went from {old} to {new}, expected {known}")
+        snapshot.pending = [new, sequence]
+        return True
+
+    if sequence <= snapshot.last_sequence(id):
+        return changed
+
+    # Deleting an entry replaces it with a tombstone, which is later removed when it expires.
+    if record["eventName"] == "REMOVE" or is_tombstone(data["NewImage"]):
+        snapshot.remove_entry(id, sequence, data["ApproximateCreationDateTime"])
+    elif record["eventName"] == "MODIFY" and id not in snapshot.entries:
+        raise SnapshotDrift(f"entry {id} was modified but isn't in the snapshot")
+    else:
+        snapshot.put_entry(deserialize_entry(data["NewImage"]), sequence)
+    return True
+
+
+def rebuild_snapshot(list_id, floor):
+    """
+    Builds a list's snapshot from the table. The version is read first, so the entries are at
+    least as new as it.
+    """
+    version = get_list_version(table, list_id)
+    entries = []
+
+    try:
+        kwargs = {
+            "TableName": table.name,
+            "IndexName": CREATED_INDEX_NAME,
+            "KeyConditionExpression": "ListId = :list_id",
+            "ExpressionAttributeValues": {":list_id": {"S": list_id}},
+        }
+        while True:
+            response = client.query(**kwargs)
+            entries.extend(deserialize_entry(item) for item in response["Items"])
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    except ClientError as err:
+        logger.error(
+            "Failed when rebuilding the snapshot of list %s due to: %s: %s",
+            list_id,
+            err.response["Error"]["Code"],
+            err.response["Error"]["Message"],
+        )
+        raise
+
+    logger.info("Rebuilt snapshot of list %s with %d entries", list_id, len(entries))
+    return ListSnapshot(list_id, entries, list_version=version, floor=floor)
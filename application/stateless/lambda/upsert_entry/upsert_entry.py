@@ -1,47 +1,193 @@
 from botocore.exceptions import ClientError
 import json
 import logging
-from tododb_utils import get_table
+import os
+import time
+from tododb_utils import (
+    get_table,
+    session,
+    get_body,
+    get_list_id,
+    get_route,
+    list_version_headers,
+    is_entry_id,
+    ListIdError,
+    MAX_BATCH_WRITE_WORKERS,
+    entry_key,
+    created_key,
+    batch_write,
+    versioned_write,
+    ShardConfigCache,
+    shard_partition,
+    shard_entry_id,
+    entry_partition,
+    choose_shard,
+    versions_after_batch,
+    CACHE_INVALIDATION_KEY,
+    invalidate_entries_cache,
+    request_cache_invalidation,
+    is_cache_invalidation,
+    now_ms,
+    record_metrics,
+    log_invocation,
+)
 import uuid
 
 
 logger = logging.getLogger(__name__)
 table = get_table(logger)
+shard_configs = ShardConfigCache.from_env()
 
+# Keeps a single batch request comfortably within API Gateway and Lambda payload limits.
+MAX_BATCH_SIZE = 1000
 
+_sqs = None
+
+
+class EntryNotFoundError(LookupError):
+    """
+    Raised when an update names an entry that doesn't exist, or has been deleted.
+    """
+
+
+def get_sqs():
+    global _sqs
+    if _sqs is None:
+        _sqs = session.client("sqs")
+    return _sqs
+
+
+@record_metrics
 def handler(event, context):
-    logger.info(f"Event: {event}")
-    logger.info(f"Context: {context}")
+    log_invocation(logger, event, context)
+
+    # Refreshing a list's cached responses is asked for in an invocation of its own, see
+    # `tododb_utils.request_cache_invalidation`.
+    if is_cache_invalidation(event):
+        return invalidate_entries_cache(logger, event[CACHE_INVALIDATION_KEY])
+
+    response = upsert(event)
+    # Queued updates are only accepted, flush_entry_updates refreshes the cache once they land.
+    if response["statusCode"] == 200:
+        request_cache_invalidation(logger, context, get_list_id(event))
+    return response
+
+
+def upsert(event):
+    try:
+        list_id = get_list_id(event)
+    except ListIdError as err:
+        logger.info("Rejected request for list: %s", err)
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": str(err),
+        }
+
+    entry = json.loads(get_body(event))
+
+    if get_route(event) == "/entries/batch":
+        return create_entries(list_id, entry)
+
+    # Updates can only be made to entries, never to the items kept alongside them.
+    if event["requestContext"]["httpMethod"] == "PUT" and not (
+        isinstance(entry, dict) and is_entry_id(entry.get("Id"))
+    ):
+        logger.info("Rejected update to an entry without a valid Id")
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": "Expected the Id of an entry.",
+        }
+
+    if event["requestContext"]["httpMethod"] == "PUT" and not shard_configs.covers(
+        table, list_id, entry["Id"]
+    ):
+        logger.info(
+            "Rejected update to %s outside list %s's shards", entry["Id"], list_id
+        )
+        return {
+            "statusCode": 404,
+            "headers": {"Content-Type": "text/plain"},
+            "body": f"No entry with Id: {entry['Id']}",
+        }
 
-    entry = json.loads(event["body"])
+    # With asynchronous writes enabled, updates are queued for flush_entry_updates to coalesce.
+    if event["requestContext"]["httpMethod"] == "PUT" and os.environ.get(
+        "WRITE_QUEUE_URL"
+    ):
+        return enqueue_update(list_id, entry, event)
 
     if event["requestContext"]["httpMethod"] == "POST":
-        response = create_entry(entry)
+        response, version = create_entry(list_id, entry)
     elif event["requestContext"]["httpMethod"] == "PUT":
-        response = update_entry(entry)
+        try:
+            response, version = update_entry(list_id, entry)
+        except EntryNotFoundError as err:
+            logger.info("Rejected update: %s", err)
+            return {
+                "statusCode": 404,
+                "headers": {"Content-Type": "text/plain"},
+                "body": str(err),
+            }
     else:
-        logger.info("Unsupported HTTP Method", event["requestContext"])
+        logger.info(
+            "Unsupported HTTP Method: %s", event["requestContext"]["httpMethod"]
+        )
 
+    # The list's new version lets clients tell whether a copy they hold is now stale. Writes to
+    # a sharded list don't report it, as summing it would read the list's first shard, which is
+    # the partition sharding keeps writes away from.
     return {
         "statusCode": 200,
-        "headers": {"Content-Type": "text/plain"},
+        "headers": {"Content-Type": "text/plain", **list_version_headers(version)},
         "body": response,
     }
 
 
-def create_entry(entry):
+def new_item(partition, entry, id, modified):
+    # Every write stamps LastModified, which orders the modified index that syncing clients read.
+    return {
+        "ListId": partition,
+        "Id": id,
+        "CreatedKey": created_key(entry["DateCreated"], id),
+        "DateCreated": entry["DateCreated"],
+        "Description": entry["Description"],
+        "Completed": entry["Completed"],
+        "LastModified": modified,
+    }
+
+
+def is_valid_entry(entry):
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("DateCreated"), int)
+        and isinstance(entry.get("Description"), str)
+        and isinstance(entry.get("Completed"), bool)
+    )
+
+
+def create_entry(list_id, entry):
     try:
-        id = str(uuid.uuid4())
-        table.put_item(
-            Item={
-                "Id": id,
-                "DateCreated": entry["DateCreated"],
-                "Description": entry["Description"],
-                "Completed": entry["Completed"],
-            }
+        # A sharded list's entries are spread over its shards as they're created.
+        shards = shard_configs.get(table, list_id)
+        shard = choose_shard(shards)
+        partition = shard_partition(list_id, shard)
+        id = shard_entry_id(shard, str(uuid.uuid4()))
+
+        version = versioned_write(
+            table,
+            partition,
+            {"Put": {"Item": new_item(partition, entry, id, now_ms())}},
+            read_version=not shards.sharded,
         )
-        logger.info(f"Created entry with Id: {id}, and attributes: {entry}")
-        return id
+        logger.info(
+            "Created entry in list %s with Id: %s, and attributes: %s",
+            list_id,
+            id,
+            entry,
+        )
+        return id, version
     except ClientError as err:
         logger.error(
             "Failed when posting new entry due to: %s: %s",
@@ -51,21 +197,153 @@ def create_entry(entry):
         raise
 
 
-def update_entry(entry):
+def update_entry(list_id, entry):
     try:
         id = entry["Id"]
+        partition = entry_partition(list_id, id)
+        shards = shard_configs.get(table, list_id)
 
-        table.update_item(
-            Key={"Id": id},
-            UpdateExpression="SET Completed = :val1",
-            ExpressionAttributeValues={":val1": entry["Completed"]},
+        version = versioned_write(
+            table,
+            partition,
+            {
+                "Update": {
+                    "Key": entry_key(id, partition),
+                    "UpdateExpression": "SET Completed = :val1, LastModified = :modified",
+                    # Updating an entry that isn't there would create a partial one.
+                    "ConditionExpression": (
+                        "attribute_exists(CreatedKey) AND attribute_not_exists(Deleted)"
+                    ),
+                    "ExpressionAttributeValues": {
+                        ":val1": entry["Completed"],
+                        ":modified": now_ms(),
+                    },
+                }
+            },
+            read_version=not shards.sharded,
+        )
+        logger.info(
+            "Updated entry with Id: %s to Completed: %s", id, entry["Completed"]
         )
-        logger.info(f"Updated entry with Id: {id} to Completed: {entry['Completed']}")
-        return f"Successfully updated entry {id}"
+        return f"Successfully updated entry {id}", version
     except ClientError as err:
+        reasons = err.response.get("CancellationReasons", [])
+        if reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+            raise EntryNotFoundError(f"No entry with Id: {id}") from err
         logger.error(
             "Failed when posting new entry due to: %s: %s",
             err.response["Error"]["Code"],
             err.response["Error"]["Message"],
         )
         raise
+
+
+def enqueue_update(list_id, entry, event):
+    if not isinstance(entry.get("Id"), str) or not isinstance(
+        entry.get("Completed"), bool
+    ):
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": "Expected an entry with an Id and a Completed state.",
+        }
+
+    # API Gateway's receipt time orders the updates, the queue itself doesn't.
+    requested_at = event["requestContext"].get("requestTimeEpoch") or int(
+        time.time() * 1000
+    )
+
+    try:
+        get_sqs().send_message(
+            QueueUrl=os.environ["WRITE_QUEUE_URL"],
+            MessageBody=json.dumps(
+                {
+                    "ListId": list_id,
+                    "Id": entry["Id"],
+                    "Completed": entry["Completed"],
+                    "RequestedAt": requested_at,
+                }
+            ),
+        )
+        logger.info("Queued update to entry with Id: %s", entry["Id"])
+    except ClientError as err:
+        logger.error(
+            "Failed when queueing entry update due to: %s: %s",
+            err.response["Error"]["Code"],
+            err.response["Error"]["Message"],
+        )
+        raise
+
+    return {
+        "statusCode": 202,
+        "headers": {"Content-Type": "text/plain"},
+        "body": f"Accepted update to entry {entry['Id']}",
+    }
+
+
+def create_entries(list_id, entries):
+    # Failures are reported per entry rather than failing the whole request, ids are returned in
+    # the order the entries were given to us, with null in place of any that failed.
+    if not isinstance(entries, list) or not 1 <= len(entries) <= MAX_BATCH_SIZE:
+        return {
+            "statusCode": 400,
+            "headers": {"Content-Type": "text/plain"},
+            "body": f"Expected an array of between 1 and {MAX_BATCH_SIZE} entries.",
+        }
+
+    ids = [None] * len(entries)
+    partitions = [None] * len(entries)
+    failures = []
+    requests, request_positions = [], []
+    modified = now_ms()
+    shards = shard_configs.get(table, list_id)
+
+    for position, entry in enumerate(entries):
+        if not is_valid_entry(entry):
+            failures.append({"index": position, "reason": "InvalidEntry"})
+            continue
+
+        shard = choose_shard(shards)
+        partitions[position] = shard_partition(list_id, shard)
+        ids[position] = shard_entry_id(shard, str(uuid.uuid4()))
+        requests.append(
+            {
+                "PutRequest": {
+                    "Item": new_item(
+                        partitions[position], entry, ids[position], modified
+                    )
+                }
+            }
+        )
+        request_positions.append(position)
+
+    for failure in batch_write(table, requests, max_workers=MAX_BATCH_WRITE_WORKERS):
+        position = request_positions[failure.index]
+        ids[position] = None
+        failures.append({"index": position, "reason": failure.reason})
+
+    failures.sort(key=lambda failure: failure["index"])
+
+    # Batch writes can't be part of a transaction, so each partition written to has its version
+    # bumped once afterwards.
+    written = {list_id: 0}
+    for id, partition in zip(ids, partitions):
+        if id is not None:
+            written[partition] = written.get(partition, 0) + 1
+    version = versions_after_batch(table, list_id, shards, written)
+
+    logger.info(
+        "Created %d of %d entries in a batch, failures: %s",
+        len(entries) - len(failures),
+        len(entries),
+        failures,
+    )
+
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Content-Type": "application/json",
+            **list_version_headers(version),
+        },
+        "body": json.dumps({"ids": ids, "failures": failures}),
+    }
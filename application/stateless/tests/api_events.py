@@ -0,0 +1,59 @@
+"""Invokes our handlers with the events API Gateway sends them, for the tests and benchmarks.
+
+Requests name a list with `list_id`, and are otherwise for the default list's legacy `/entries`
+routes. Every handler takes the same event shape, so the same helpers serve the router and the
+handlers it routes to.
+"""
+import json
+
+
+def entry(date_created=1000, description="Entry", completed=False):
+    """The body of a POST creating an entry."""
+    return {
+        "DateCreated": date_created,
+        "Description": description,
+        "Completed": completed,
+    }
+
+
+def request(
+    handler,
+    method,
+    path="",
+    body=None,
+    list_id=None,
+    headers=None,
+    requested_at=None,
+    context=None,
+    **params,
+):
+    """Invokes `handler` with a request for `/entries{path}`, returning its response."""
+    resource = "/entries" if list_id is None else "/lists/{listId}/entries"
+    return handler.handler(
+        {
+            "resource": f"{resource}{path}",
+            "pathParameters": None if list_id is None else {"listId": list_id},
+            "requestContext": {"httpMethod": method, "requestTimeEpoch": requested_at},
+            "queryStringParameters": params or None,
+            "headers": headers,
+            "body": None if body is None else json.dumps(body),
+        },
+        context,
+    )
+
+
+def post(handler, date_created=1000, description="Entry", completed=False, **kwargs):
+    """Creates an entry, returning the response."""
+    return request(
+        handler, "POST", body=entry(date_created, description, completed), **kwargs
+    )
+
+
+def create(handler, date_created=1000, description="Entry", completed=False, **kwargs):
+    """Creates an entry, returning its Id."""
+    return post(handler, date_created, description, completed, **kwargs)["body"]
+
+
+def get(handler, **kwargs):
+    """Reads a page of entries, or whatever the query string asks for, returning the response."""
+    return request(handler, "GET", **kwargs)
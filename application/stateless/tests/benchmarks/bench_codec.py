@@ -0,0 +1,139 @@
+"""Benchmarks reading entries through the resource API against the client path and its codec.
+
+For each size, entries are read in two ways. "decode" only converts already parsed wire format
+items, the way boto3's resource layer does with TypeDeserializer versus `deserialize_entry`.
+"query" pages through a whole list against the local DynamoDB stand-in, so it includes
+botocore's request and response handling, which both paths share. Run from the project root:
+
+    python -m application.stateless.tests.benchmarks.bench_codec --items 1000 10000 100000
+"""
+import argparse
+import contextlib
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
+import os
+import time
+
+from application.stateless.tests import lambda_env  # noqa: F401
+from application.stateless.tests.benchmarks.entries import make_entry
+from application.stateless.tests.local_dynamodb import LocalDynamoDB
+import boto3
+from tododb_utils import deserialize_entry
+
+
+TABLE_NAME = "BenchEntriesTable"
+
+
+def resource_to_serialisable(entries):
+    # How get_entries converted resource items before it moved to the client path.
+    return [
+        {
+            "Id": entry["Id"],
+            "DateCreated": int(entry["DateCreated"]),
+            "Description": entry["Description"],
+            "Completed": entry["Completed"],
+        }
+        for entry in entries
+    ]
+
+
+def decode_with_resource(items):
+    deserializer = TypeDeserializer()
+    return resource_to_serialisable(
+        [deserializer.deserialize({"M": item}) for item in items]
+    )
+
+
+def decode_with_client(items):
+    return [deserialize_entry(item) for item in items]
+
+
+def query_all(query, kwargs):
+    items, kwargs = [], dict(kwargs)
+    while True:
+        response = query(**kwargs)
+        items.extend(response["Items"])
+        if "LastEvaluatedKey" not in response:
+            return items
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def query_with_resource(table):
+    items = query_all(
+        table.query, {"KeyConditionExpression": Key("ListId").eq("default")}
+    )
+    return resource_to_serialisable(items)
+
+
+def query_with_client(client):
+    items = query_all(
+        client.query,
+        {
+            "TableName": TABLE_NAME,
+            "KeyConditionExpression": "ListId = :list_id",
+            "ExpressionAttributeValues": {":list_id": {"S": "default"}},
+        },
+    )
+    return decode_with_client(items)
+
+
+def best_of(repeats, function, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def run(sizes, repeats):
+    results = []
+    for size in sizes:
+        items = [
+            {"ListId": {"S": "default"}, **make_entry(index)} for index in range(size)
+        ]
+
+        local_dynamodb = LocalDynamoDB()
+        local_table = local_dynamodb.create_table(TABLE_NAME, "ListId", "Id")
+        for item in items:
+            local_table.put(item)
+        table = local_dynamodb.attach(boto3.resource("dynamodb")).Table(TABLE_NAME)
+        client = local_dynamodb.attach(boto3.client("dynamodb"))
+
+        decode_resource, expected = best_of(repeats, decode_with_resource, items)
+        decode_client, decoded = best_of(repeats, decode_with_client, items)
+        query_resource, _ = best_of(repeats, query_with_resource, table)
+        query_client, queried = best_of(repeats, query_with_client, client)
+        assert decoded == expected and len(queried) == size
+
+        results.append(
+            (size, decode_resource, decode_client, query_resource, query_client)
+        )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'items':>7} {'decode resource':>16} {'decode client':>14} {'speed-up':>8} "
+        f"{'query resource':>15} {'query client':>13} {'speed-up':>8}"
+    )
+    # The layer writes its metrics to stdout, which would bury the report.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = run(args.items, args.repeats)
+    for size, decode_resource, decode_client, query_resource, query_client in results:
+        print(
+            f"{size:>7} {decode_resource:>15.3f}s {decode_client:>13.3f}s "
+            f"{decode_resource / decode_client:>7.2f}x "
+            f"{query_resource:>14.3f}s {query_client:>12.3f}s "
+            f"{query_resource / query_client:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
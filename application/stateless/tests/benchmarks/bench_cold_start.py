@@ -0,0 +1,304 @@
+"""Profiles what each Lambda handler costs to import, the bulk of its cold start.
+
+Every target is imported in a fresh interpreter run with `-X importtime`, the way the Lambda
+runtime imports a handler during its init phase. The per-module timings are aggregated by top
+level package, so the cost of boto3, botocore, our layer and the handler's own module level code
+(which includes creating the session and calling `get_table`) can be told apart. Init wall time
+and peak RSS are recorded alongside them.
+
+AWS calls are answered by a stub server the interpreters are pointed at through
+AWS_ENDPOINT_URL, so nothing is imported into them that the handler wouldn't import itself. The
+report is written as JSON. Memory is read from /proc, so this needs Linux, as Lambda does. Run from
+the project root:
+
+    python -m application.stateless.tests.benchmarks.bench_cold_start --output cold_start.json
+
+With `--bundling`, every target is profiled twice, once from its source as it's deployed without
+bundling and once bundled by `bundling.bundle` with precompiled bytecode, along with the size of
+each. Our code's directories are read only in Lambda, so the source is compiled on every cold
+start. Neither copy is written bytecode to while profiling, to match.
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import platform
+import statistics
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from application.stateless.tests import lambda_env
+import bundling
+
+
+DEFAULT_TARGETS = ["tododb_utils", "get_entries", "upsert_entry", "delete_entry"]
+
+# Run in each fresh interpreter. The target's directory is put on the path as the runtime puts
+# /var/task there, then it's imported between two markers on stderr, so the importtime lines for
+# the child's own imports can be left out. Peak RSS is read from VmHWM, as ru_maxrss carries the
+# forking parent's peak over across exec.
+CHILD = """
+import sys, time
+def peak_kb():
+    with open("/proc/self/status") as status:
+        return next(line.split()[1] for line in status if line.startswith("VmHWM"))
+sys.path[:0] = sys.argv[2:]
+baseline = peak_kb()
+sys.stderr.write("--- import start\\n")
+started = time.perf_counter()
+__import__(sys.argv[1])
+init_ms = (time.perf_counter() - started) * 1000
+sys.stderr.write("--- import end\\n")
+print(init_ms, baseline, peak_kb())
+"""
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every DynamoDB call with an empty success, or a table for DescribeTable."""
+
+    calls = 0
+
+    def do_POST(self):
+        StubHandler.calls += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        operation = self.headers.get("X-Amz-Target", "").split(".")[-1]
+        body = {}
+        if operation == "DescribeTable":
+            body = {"Table": {"TableName": "StubTable", "TableStatus": "ACTIVE"}}
+
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.0")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def child_environment(endpoint, describe):
+    environment = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(("AWS_", "PYTHON"))
+    }
+    environment.update(
+        {
+            "AWS_DEFAULT_REGION": "eu-west-2",
+            "AWS_ACCESS_KEY_ID": "local",
+            "AWS_SECRET_ACCESS_KEY": "local",
+            "AWS_ENDPOINT_URL": endpoint,
+            "TABLE_NAME": "StubTable",
+            "CURSOR_SIGNING_KEY": "profiling-key",
+            "DESCRIBE_TABLE_ON_INIT": str(describe).lower(),
+        }
+    )
+    return environment
+
+
+def parse_importtime(stderr):
+    """
+    Sums the self time of every module imported between the markers by its top level package,
+    returning microseconds by package and the slowest modules by cumulative time.
+    """
+    packages, modules, inside = {}, [], False
+    for line in stderr.splitlines():
+        if line == "--- import start":
+            inside = True
+        elif line == "--- import end":
+            break
+        elif inside and line.startswith("import time:") and "|" in line:
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            if not self_us.strip().isdigit():
+                continue  # The header line.
+            name = name.strip()
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + int(self_us)
+            modules.append((name, int(cumulative_us)))
+
+    return packages, modules
+
+
+def profile(target, environment, paths):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-B", "-X", "importtime", "-c", CHILD, target, *paths],
+        env=environment,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+
+    init_ms, baseline_kb, peak_kb = result.stdout.split()
+    packages, modules = parse_importtime(result.stderr)
+    return {
+        "init_ms": float(init_ms),
+        "process_ms": process_ms,
+        "rss_baseline_mb": int(baseline_kb) / 1024,
+        "rss_peak_mb": int(peak_kb) / 1024,
+        "packages_us": packages,
+        "modules": modules,
+    }
+
+
+def median_ms(timings_by_name, top=None):
+    medians = {
+        name: statistics.median(timings) / 1000
+        for name, timings in timings_by_name.items()
+    }
+    return dict(sorted(medians.items(), key=lambda item: -item[1])[:top])
+
+
+def summarise(target, runs, top):
+    """
+    Takes the median of every measurement over the runs of a target.
+    """
+    packages = {package for run in runs for package in run["packages_us"]}
+    package_timings = {
+        package: [run["packages_us"].get(package, 0) for run in runs]
+        for package in packages
+    }
+    module_timings = {}
+    for run in runs:
+        for name, cumulative_us in run["modules"]:
+            module_timings.setdefault(name, []).append(cumulative_us)
+
+    return {
+        "target": target,
+        "runs": len(runs),
+        "init_ms": statistics.median(run["init_ms"] for run in runs),
+        "process_ms": statistics.median(run["process_ms"] for run in runs),
+        "rss_peak_mb": statistics.median(run["rss_peak_mb"] for run in runs),
+        "rss_added_mb": statistics.median(
+            run["rss_peak_mb"] - run["rss_baseline_mb"] for run in runs
+        ),
+        "packages_ms": median_ms(package_timings),
+        "slowest_modules_ms": median_ms(module_timings, top),
+    }
+
+
+def deployed_copies(target, workdir, bundled):
+    """
+    Copies the code a target is deployed with into `workdir`, returning the path entries to
+    import it from and its size in KB. Without bundling, the size includes whatever else is in
+    the directories, as it's all deployed, but the bytecode cached in them isn't copied.
+    """
+    sources = [os.path.dirname(lambda_env.LAYER_DIR)]
+    if target != "tododb_utils":
+        sources.insert(0, os.path.join(lambda_env.LAMBDA_DIR, target))
+
+    size = 0
+    for source in sources:
+        copy = os.path.join(workdir, os.path.basename(source))
+        if bundled:
+            bundling.bundle(source, copy, sys.executable, copy)
+            size += bundling.directory_size(copy)
+        else:
+            shutil.copytree(
+                source, copy, ignore=shutil.ignore_patterns("__pycache__", "*.pyc")
+            )
+            size += bundling.directory_size(source)
+
+    paths = [os.path.join(workdir, os.path.basename(sources[-1]), "python")]
+    if target != "tododb_utils":
+        paths.insert(0, os.path.join(workdir, target))
+    return paths, size / 1024
+
+
+def run(targets, repeats, describe, top, compare_bundling=False):
+    server = start_stub()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    environment = child_environment(endpoint, describe)
+    variants = ["source", "bundled"] if compare_bundling else [None]
+
+    results = []
+    try:
+        for target in targets:
+            for variant in variants:
+                with tempfile.TemporaryDirectory() as workdir:
+                    paths = [lambda_env.LAYER_DIR]
+                    if target != "tododb_utils":
+                        paths.insert(0, os.path.join(lambda_env.LAMBDA_DIR, target))
+                    if variant:
+                        paths, size_kb = deployed_copies(
+                            target, workdir, variant == "bundled"
+                        )
+
+                    runs = [profile(target, environment, paths) for _ in range(repeats)]
+                    result = summarise(target, runs, top)
+                    if variant:
+                        result.update(variant=variant, size_kb=round(size_kb, 1))
+                    results.append(result)
+    finally:
+        server.shutdown()
+
+    return {
+        "python": platform.python_version(),
+        "describe_table_on_init": describe,
+        "stubbed_aws_calls": StubHandler.calls,
+        "targets": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", default=DEFAULT_TARGETS)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--describe",
+        action="store_true",
+        help="profile with DESCRIBE_TABLE_ON_INIT, against the stub",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, help="slowest modules to report per target"
+    )
+    parser.add_argument(
+        "--bundling",
+        action="store_true",
+        help="compare each target deployed from source and bundled",
+    )
+    parser.add_argument("--output", help="write the JSON report here, not stdout")
+    args = parser.parse_args()
+
+    report = run(args.targets, args.repeats, args.describe, args.top, args.bundling)
+
+    print(
+        f"{'target':>14} {'variant':>8} {'size':>9} {'init':>9} {'peak RSS':>9} "
+        f"{'added':>8}  slowest packages",
+        file=sys.stderr,
+    )
+    for result in report["targets"]:
+        packages = ", ".join(
+            f"{package} {ms:.1f}ms"
+            for package, ms in list(result["packages_ms"].items())[:3]
+        )
+        size = f"{result['size_kb']:.1f}KB" if "size_kb" in result else "-"
+        print(
+            f"{result['target']:>14} {result.get('variant', '-'):>8} {size:>9} "
+            f"{result['init_ms']:>7.1f}ms {result['rss_peak_mb']:>7.1f}MB "
+            f"{result['rss_added_mb']:>6.1f}MB  {packages}",
+            file=sys.stderr,
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmarks compressing GET /entries responses with each content coding we can produce.
+
+Bodies are built the way get_entries builds them, for lists of realistic entries. Time saved
+weighs the cost of compressing and decompressing a body against the time to transfer the bytes
+saved, at `--mbps`. Brotli is only included when it's installed. Run from the project root:
+
+    python -m application.stateless.tests.benchmarks.bench_compression --entries 100 1000 10000
+"""
+import argparse
+import contextlib
+import base64
+import gzip
+import os
+import time
+
+from application.stateless.tests import lambda_env  # noqa: F401
+from application.stateless.tests.benchmarks.entries import make_entry
+from tododb_utils import JsonArrayWriter, available_encodings, deserialize_entry
+from tododb_utils.compression import brotli, compress
+
+
+def build_body(count):
+    writer = JsonArrayWriter()
+    writer.extend([deserialize_entry(make_entry(index)) for index in range(count)])
+    return writer.close()
+
+
+def decompress(data, encoding):
+    return brotli.decompress(data) if encoding == "br" else gzip.decompress(data)
+
+
+def timed(function, *args, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def run(counts, mbps):
+    bytes_per_second = mbps * 1_000_000 / 8
+    results = []
+    for count in counts:
+        body = build_body(count)
+        raw_bytes = len(body.encode("utf-8"))
+        for encoding in available_encodings():
+            compress_seconds, compressed = timed(compress, body, encoding)
+            decompress_seconds, _ = timed(decompress, compressed, encoding)
+            # The body crosses the network as binary, the base64 step stays inside AWS.
+            encoded_seconds, _ = timed(base64.b64encode, compressed)
+
+            transfer_saved = (raw_bytes - len(compressed)) / bytes_per_second
+            saved_seconds = transfer_saved - (
+                compress_seconds + encoded_seconds + decompress_seconds
+            )
+            results.append(
+                (
+                    count,
+                    encoding,
+                    raw_bytes,
+                    len(compressed),
+                    compress_seconds + encoded_seconds,
+                    saved_seconds,
+                )
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[100, 1000, 10_000])
+    parser.add_argument("--mbps", type=float, default=100)
+    args = parser.parse_args()
+
+    print(f"Time saved assumes {args.mbps:g}Mbps between API Gateway and the client")
+    print(
+        f"{'entries':>7} {'coding':>6} {'raw KB':>8} {'sent KB':>8} {'ratio':>6} "
+        f"{'compress':>9} {'saved':>8}"
+    )
+    # The layer writes its metrics to stdout, which would bury the report.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = run(args.entries, args.mbps)
+    for count, encoding, raw, sent, compress_seconds, saved in results:
+        print(
+            f"{count:>7} {encoding:>6} {raw / 1024:>8.1f} {sent / 1024:>8.1f} "
+            f"{raw / sent:>5.1f}x {compress_seconds * 1000:>7.1f}ms "
+            f"{saved * 1000:>6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
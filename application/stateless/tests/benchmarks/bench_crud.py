@@ -0,0 +1,389 @@
+"""Load tests the CRUD handlers in process against the local DynamoDB stand-in.
+
+For every table size in `--sizes`, a list of that many entries is loaded into a fresh table and
+each scenario sends `--requests` requests to `get_entries`, `upsert_entry` and `delete_entry`,
+mixed by the scenario's weights. Reads walk the list a page at a time, following each cursor as the
+web app does, except in `full-read` which asks for the whole list. Writes create, toggle and delete
+random entries. Scenarios run one after another against the same table, like traffic would.
+
+Each scenario reports throughput, latency percentiles overall and by operation, the most memory
+its requests allocated at once, and the read and write units the stand-in charged, the way
+DynamoDB bills them. Memory is traced with `tracemalloc` over a further `--memory-requests` of the
+scenario's requests, after the timed ones, as tracing slows every allocation down. The read cache
+is emptied first, so the traced requests build the responses it would otherwise serve. The report
+is JSON, and can be saved with `--output` as a baseline for a later run to `--compare` against.
+Run from the project root:
+
+    python -m application.stateless.tests.benchmarks.bench_crud --sizes 100 10000 --output crud.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from application.stateless.tests.lambda_env import import_handler
+from application.stateless.tests.benchmarks.entries import make_list_entry
+from application.stateless.tests.local_dynamodb import LocalDynamoDB
+
+
+TABLE_NAME = "BenchEntriesTable"
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000]
+
+# The weight of each operation in a scenario's request mix.
+SCENARIOS = {
+    "read-heavy": {"page": 90, "create": 5, "update": 5},
+    "balanced": {"page": 50, "create": 20, "update": 20, "delete": 10},
+    "write-heavy": {"page": 10, "create": 40, "update": 40, "delete": 10},
+    "full-read": {"full": 100},
+}
+
+PAGE_SIZE = 100
+
+# Reading a whole list of more entries than this takes minutes a request, so is skipped.
+FULL_READ_MAX_ITEMS = 10_000
+
+MB = 1024 * 1024
+
+
+def percentiles(timings):
+    ordered = sorted(timings)
+    return {
+        f"p{p}": ordered[min(len(ordered) - 1, len(ordered) * p // 100)] * 1000
+        for p in (50, 95, 99)
+    }
+
+
+class Workload:
+    """Sends the requests of a scenario, keeping track of the entries that exist."""
+
+    def __init__(self, handlers, ids, rng):
+        self.get_entries, self.upsert_entry, self.delete_entry = handlers
+        self.ids = ids
+        self.rng = rng
+        self.cursor = None
+        self.created = 0
+
+    def page(self):
+        params = {"limit": str(PAGE_SIZE)}
+        if self.cursor:
+            params["cursor"] = self.cursor
+        response = self.get_entries.handler({"queryStringParameters": params}, None)
+        # Start from the top again once the end of the list has been reached.
+        self.cursor = json.loads(response["body"])["nextCursor"]
+        return response
+
+    def full(self):
+        return self.get_entries.handler(
+            {"queryStringParameters": {"all": "true"}}, None
+        )
+
+    def create(self):
+        self.created += 1
+        response = self.write(
+            self.upsert_entry,
+            "POST",
+            {
+                "DateCreated": 1_800_000_000_000 + self.created,
+                "Description": f"Benchmark entry {self.created}",
+                "Completed": False,
+            },
+        )
+        self.ids.append(response["body"])
+        return response
+
+    def update(self):
+        id = self.rng.choice(self.ids)
+        return self.write(
+            self.upsert_entry, "PUT", {"Id": id, "Completed": self.rng.random() < 0.5}
+        )
+
+    def delete(self):
+        # Swapping the chosen id to the end keeps removing it cheap.
+        position = self.rng.randrange(len(self.ids))
+        self.ids[position], self.ids[-1] = self.ids[-1], self.ids[position]
+        return self.write(self.delete_entry, "DELETE", {"Id": self.ids.pop()})
+
+    @staticmethod
+    def write(handler, method, body):
+        return handler.handler(
+            {"requestContext": {"httpMethod": method}, "body": json.dumps(body)}, None
+        )
+
+
+def traced_peak_mb(workload, operations):
+    """
+    Sends `operations`, returning the most memory allocated at once while they ran, beyond what
+    was already allocated before them.
+    """
+    workload.get_entries.read_cache.clear()
+    tracemalloc.start()
+    try:
+        allocated, _ = tracemalloc.get_traced_memory()
+        for operation in operations:
+            response = getattr(workload, operation)()
+            assert response["statusCode"] == 200, response
+            del response
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - allocated) / MB
+
+
+def run_scenario(local_dynamodb, workload, weights, requests, memory_requests):
+    operations = list(weights)
+    chosen = workload.rng.choices(operations, list(weights.values()), k=requests)
+    timings = {operation: [] for operation in operations}
+
+    local_dynamodb.calls.clear()
+    local_dynamodb.read_units = local_dynamodb.write_units = 0
+
+    started = time.perf_counter()
+    for operation in chosen:
+        request_started = time.perf_counter()
+        response = getattr(workload, operation)()
+        timings[operation].append(time.perf_counter() - request_started)
+        assert response["statusCode"] == 200, response
+    seconds = time.perf_counter() - started
+    read_units, write_units = local_dynamodb.read_units, local_dynamodb.write_units
+    calls = dict(local_dynamodb.calls)
+
+    memory_peak_mb = traced_peak_mb(workload, chosen[:memory_requests])
+
+    return {
+        "requests": requests,
+        "seconds": seconds,
+        "throughput_rps": requests / seconds,
+        "latency_ms": percentiles(
+            [timing for operation in timings.values() for timing in operation]
+        ),
+        "operations": {
+            operation: {
+                "requests": len(timings[operation]),
+                **percentiles(timings[operation]),
+            }
+            for operation in operations
+            if timings[operation]
+        },
+        "read_units": read_units,
+        "write_units": write_units,
+        "read_units_per_request": read_units / requests,
+        "write_units_per_request": write_units / requests,
+        "calls": calls,
+        "memory_peak_mb": memory_peak_mb,
+    }
+
+
+def run(
+    sizes,
+    scenarios,
+    requests,
+    memory_requests,
+    latency,
+    seconds_per_mb,
+    read_cache,
+    seed,
+):
+    os.environ["TABLE_NAME"] = TABLE_NAME
+    os.environ.setdefault("CURSOR_SIGNING_KEY", "benchmark-signing-key")
+    import tododb_utils.table
+
+    local_dynamodb = LocalDynamoDB()
+    local_dynamodb.attach(tododb_utils.table.dynamo_resource)
+    local_dynamodb.attach(tododb_utils.table.get_client())
+
+    handlers = [
+        import_handler(name) for name in ("get_entries", "upsert_entry", "delete_entry")
+    ]
+    get_entries = handlers[0]
+    get_entries.read_cache.enabled = read_cache
+
+    results = []
+    for size in sizes:
+        # Seeding isn't part of what's measured, so it isn't slowed down by the simulated latency.
+        local_dynamodb.latency = local_dynamodb.seconds_per_mb = 0
+        started = time.perf_counter()
+        local_table = local_dynamodb.create_table(
+            TABLE_NAME,
+            "ListId",
+            "Id",
+            indexes={
+                "CreatedIndex": ("ListId", "CreatedKey"),
+                "ModifiedIndex": ("ListId", "LastModified"),
+            },
+        )
+        items = [make_list_entry(index, seed) for index in range(size)]
+        local_table.load(items)
+        ids = [item["Id"]["S"] for item in items]
+        del items
+        # The new table starts again from version 0, which entries cached before could match.
+        get_entries.read_cache.clear()
+        seed_seconds = time.perf_counter() - started
+
+        local_dynamodb.latency, local_dynamodb.seconds_per_mb = latency, seconds_per_mb
+        workload = Workload(handlers, ids, random.Random(seed))
+        # The first call of each operation loads its model into botocore, which isn't what's
+        # being measured.
+        for operation in ("page", "create", "update", "delete"):
+            getattr(workload, operation)()
+        for scenario in scenarios:
+            if "full" in SCENARIOS[scenario] and size > FULL_READ_MAX_ITEMS:
+                continue
+            result = run_scenario(
+                local_dynamodb,
+                workload,
+                SCENARIOS[scenario],
+                requests,
+                memory_requests,
+            )
+            results.append(
+                {
+                    "items": size,
+                    "scenario": scenario,
+                    "seed_seconds": seed_seconds,
+                    **result,
+                }
+            )
+            print(
+                f"{size:>8} {scenario:>12} {result['throughput_rps']:>9.1f}/s "
+                f"{result['latency_ms']['p50']:>8.2f} {result['latency_ms']['p95']:>8.2f} "
+                f"{result['latency_ms']['p99']:>8.2f} "
+                f"{result['read_units_per_request']:>8.2f} "
+                f"{result['write_units_per_request']:>8.2f} "
+                f"{result['memory_peak_mb']:>8.1f}MB",
+                file=sys.stderr,
+            )
+
+    return {
+        "python": platform.python_version(),
+        "requests": requests,
+        "memory_requests": memory_requests,
+        "latency": latency,
+        "seconds_per_mb": seconds_per_mb,
+        "read_cache": read_cache,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """
+    Prints how each scenario has changed against a baseline, returning the regressions. Time is
+    only flagged beyond `tolerance`, as it varies from run to run. Capacity doesn't, so any rise
+    in it is flagged.
+    """
+    baseline_results = {
+        (result["items"], result["scenario"]): result for result in baseline["results"]
+    }
+    regressions = []
+    print(
+        f"{'items':>8} {'scenario':>12} {'throughput':>11} {'p95':>8} {'RCU/req':>8} "
+        f"{'WCU/req':>8}",
+        file=sys.stderr,
+    )
+    for result in report["results"]:
+        key = (result["items"], result["scenario"])
+        before = baseline_results.get(key)
+        if before is None:
+            continue
+
+        changes = {
+            "throughput": result["throughput_rps"] / before["throughput_rps"] - 1,
+            "p95": result["latency_ms"]["p95"] / before["latency_ms"]["p95"] - 1,
+            "RCU/req": result["read_units_per_request"]
+            - before["read_units_per_request"],
+            "WCU/req": result["write_units_per_request"]
+            - before["write_units_per_request"],
+        }
+        print(
+            f"{key[0]:>8} {key[1]:>12} {changes['throughput']:>+10.0%} "
+            f"{changes['p95']:>+8.0%} {changes['RCU/req']:>+8.2f} "
+            f"{changes['WCU/req']:>+8.2f}",
+            file=sys.stderr,
+        )
+
+        if changes["throughput"] < -tolerance:
+            regressions.append(
+                f"{key}: throughput fell by {-changes['throughput']:.0%}"
+            )
+        if changes["p95"] > tolerance:
+            regressions.append(f"{key}: p95 latency rose by {changes['p95']:.0%}")
+        for units in ("RCU/req", "WCU/req"):
+            if changes[units] > 0.01:
+                regressions.append(f"{key}: {units} rose by {changes[units]:.2f}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument(
+        "--memory-requests",
+        type=int,
+        default=20,
+        help="requests a scenario sends while its memory is traced",
+    )
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--seconds-per-mb", type=float, default=0.0)
+    parser.add_argument(
+        "--no-read-cache",
+        dest="read_cache",
+        action="store_false",
+        help="measure every read against the table",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here, not stdout")
+    parser.add_argument("--compare", help="a baseline report to compare this run to")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.3,
+        help="fraction throughput or p95 latency may worsen by before it's a regression",
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'items':>8} {'scenario':>12} {'throughput':>11} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'RCU/req':>8} {'WCU/req':>8} {'peak mem':>10}",
+        file=sys.stderr,
+    )
+    # Handlers write their metrics to stdout, which would bury the report.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        report = run(
+            args.sizes,
+            args.scenarios,
+            args.requests,
+            args.memory_requests,
+            args.latency,
+            args.seconds_per_mb,
+            args.read_cache,
+            args.seed,
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(report, json.load(baseline), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmarks `tododb_utils.parallel_scan` against the local DynamoDB stand-in.
+
+Each Scan call sleeps for `--latency` seconds plus `--seconds-per-mb` for every MB it returns, to
+stand in for the time DynamoDB spends serving the page. Parsing the response is real work done by
+botocore and holds the GIL, which bounds the achievable speed-up. Run from the project root:
+
+    python -m application.stateless.tests.benchmarks.bench_parallel_scan --items 50000
+"""
+import argparse
+import time
+
+from application.stateless.tests import lambda_env  # noqa: F401
+from application.stateless.tests.benchmarks.entries import seed_entries
+from application.stateless.tests.local_dynamodb import LocalDynamoDB
+import boto3
+from tododb_utils import parallel_scan
+
+
+TABLE_NAME = "BenchEntriesTable"
+
+
+def run(items, latency, seconds_per_mb, segment_counts, repeats):
+    local_dynamodb = LocalDynamoDB(latency=latency, seconds_per_mb=seconds_per_mb)
+    seed_entries(local_dynamodb.create_table(TABLE_NAME, "Id"), items)
+    table = local_dynamodb.attach(boto3.resource("dynamodb")).Table(TABLE_NAME)
+
+    results = []
+    for total_segments in segment_counts:
+        local_dynamodb.calls.clear()
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            scanned = parallel_scan(table, total_segments=total_segments)
+            timings.append(time.perf_counter() - start)
+            assert len(scanned) == items
+
+        results.append(
+            (total_segments, min(timings), local_dynamodb.calls["Scan"] // repeats)
+        )
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--seconds-per-mb", type=float, default=0.5)
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(
+        args.items, args.latency, args.seconds_per_mb, args.segments, args.repeats
+    )
+    baseline = results[0][1]
+
+    print(
+        f"{args.items} items, simulated Scan latency of {args.latency * 1000:.0f}ms per call "
+        f"+ {args.seconds_per_mb * 1000:.0f}ms per MB"
+    )
+    print(f"{'segments':>8} {'pages':>6} {'seconds':>8} {'speed-up':>8}")
+    for total_segments, seconds, pages in results:
+        print(
+            f"{total_segments:>8} {pages:>6} {seconds:>8.3f} {baseline / seconds:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Benchmarks the write units consumed by a storm of completion toggles, written synchronously
+versus queued and coalesced by flush_entry_updates.
+
+`--toggles` PUTs are spread over `--entries` entries, as users rapidly clicking checkboxes would
+send. In asynchronous mode they're delivered to the consumer in batches of `--batch-size`, standing
+in for the messages an event source gathers over its batching window. Run from the project root:
+
+    python -m application.stateless.tests.benchmarks.bench_toggle_storm --toggles 2000
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+
+from application.stateless.tests.lambda_env import import_handler
+from application.stateless.tests.benchmarks.entries import make_entry
+from application.stateless.tests.local_dynamodb import LocalDynamoDB
+from application.stateless.tests.local_sqs import LocalQueue
+
+
+TABLE_NAME = "BenchEntriesTable"
+
+
+def seed(local_dynamodb, entries):
+    local_table = local_dynamodb.create_table(
+        TABLE_NAME,
+        "ListId",
+        "Id",
+        indexes={"CreatedIndex": ("ListId", "CreatedKey")},
+    )
+    ids = []
+    for index in range(entries):
+        item = {"ListId": {"S": "default"}, **make_entry(index)}
+        item["CreatedKey"] = {"S": f"{index:013d}#{item['Id']['S']}"}
+        local_table.put(item)
+        ids.append(item["Id"]["S"])
+    return ids
+
+
+def toggle_events(ids, toggles, seed=0):
+    rng = random.Random(seed)
+    states = dict.fromkeys(ids, False)
+    for requested_at in range(toggles):
+        id = rng.choice(ids)
+        states[id] = not states[id]
+        yield {
+            "requestContext": {"httpMethod": "PUT", "requestTimeEpoch": requested_at},
+            "body": json.dumps({"Id": id, "Completed": states[id]}),
+        }, states
+
+
+def run(modes, entries, toggles, batch_size):
+    os.environ["TABLE_NAME"] = TABLE_NAME
+    import tododb_utils.table
+
+    local_dynamodb = LocalDynamoDB()
+    local_dynamodb.attach(tododb_utils.table.dynamo_resource)
+    local_dynamodb.attach(tododb_utils.table.get_client())
+
+    upsert_entry = import_handler("upsert_entry")
+    flush_entry_updates = import_handler("flush_entry_updates")
+    queue = LocalQueue()
+    queue.attach(upsert_entry.get_sqs())
+
+    results = {}
+    for mode in modes:
+        ids = seed(local_dynamodb, entries)
+        local_dynamodb.calls.clear()
+        local_dynamodb.write_units = 0
+
+        if mode == "async":
+            os.environ["WRITE_QUEUE_URL"] = queue.queue_url
+        else:
+            os.environ.pop("WRITE_QUEUE_URL", None)
+
+        for event, states in toggle_events(ids, toggles):
+            upsert_entry.handler(event, None)
+        for batch in queue.drain(batch_size):
+            flush_entry_updates.handler(batch, None)
+
+        local_table = local_dynamodb.tables[TABLE_NAME]
+        for id, state in states.items():
+            item = local_table.get({"ListId": {"S": "default"}, "Id": {"S": id}})
+            assert item["Completed"]["BOOL"] == state
+
+        writes = sum(
+            local_dynamodb.calls[operation]
+            for operation in ("UpdateItem", "PutItem", "TransactWriteItems")
+        )
+        results[mode] = (writes, local_dynamodb.write_units)
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50)
+    parser.add_argument("--toggles", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    print(
+        f"{args.toggles} toggles over {args.entries} entries, "
+        f"flushed in batches of {args.batch_size}"
+    )
+    print(f"{'mode':>6} {'write calls':>12} {'write units':>12} {'reduction':>10}")
+    # Handlers write their metrics to stdout, which would bury the report.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = run(["sync", "async"], args.entries, args.toggles, args.batch_size)
+    baseline = results["sync"][1]
+    for mode, (writes, write_units) in results.items():
+        print(
+            f"{mode:>6} {writes:>12} {write_units:>12} "
+            f"{baseline / write_units:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Sustained write throughput to one busy shared list, by the number of shards it writes to.
+
+For every shard count in `--shards`, a fresh table is created, the list is given that many shards
+with `tododb_utils.set_shard_count`, and `--writers` threads POST new entries to it for
+`--seconds`. The local DynamoDB stand-in throttles each partition to `--partition-limit` write
+units a second, as DynamoDB does at 1,000. The default limit is scaled down so that handlers
+running in a single process can reach it.
+
+Each run reports entries written a second, latency percentiles, how often the stand-in throttled
+a write and how many POSTs failed once retries ran out. The whole list is then read back, merged
+from its shards, and checked to hold every entry written, in DateCreated order. The report is
+JSON. Run from the project root:
+
+    python -m application.stateless.tests.benchmarks.bench_write_sharding --shards 1 2 4 8
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+
+from application.stateless.tests.api_events import get, post
+from application.stateless.tests.lambda_env import import_handler
+from application.stateless.tests.local_dynamodb import LocalDynamoDB
+from tododb_utils import set_shard_count
+
+
+TABLE_NAME = "BenchEntriesTable"
+
+LIST_ID = "shared"
+
+
+def percentiles(timings):
+    ordered = sorted(timings)
+    return {
+        f"p{p}": ordered[min(len(ordered) - 1, len(ordered) * p // 100)] * 1000
+        for p in (50, 95, 99)
+    }
+
+
+def write_for(upsert_entry, seconds, dates, timings, failures):
+    """Creates entries one after another until `seconds` have passed, as one writer."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        date_created = next(dates)
+        started = time.perf_counter()
+        try:
+            response = post(
+                upsert_entry,
+                date_created,
+                f"Shared entry {date_created}",
+                list_id=LIST_ID,
+            )
+            ok = response["statusCode"] == 200
+        except Exception:
+            ok = False
+        if ok:
+            timings.append(time.perf_counter() - started)
+        else:
+            failures.append(date_created)
+
+
+def run_shard_count(local_dynamodb, handlers, shards, writers, seconds):
+    get_entries, upsert_entry = handlers
+    local_dynamodb.create_table(
+        TABLE_NAME,
+        "ListId",
+        "Id",
+        indexes={
+            "CreatedIndex": ("ListId", "CreatedKey"),
+            "ModifiedIndex": ("ListId", "LastModified"),
+        },
+    )
+    # The new table starts again from version 0, which anything cached before could match.
+    get_entries.read_cache.clear()
+    upsert_entry.shard_configs.clear()
+
+    import tododb_utils.table
+
+    set_shard_count(
+        tododb_utils.table.dynamo_resource.Table(TABLE_NAME), LIST_ID, shards
+    )
+    # The first create loads botocore's models, which isn't what's being measured. It goes to the
+    # list like any other, so it's checked for in the read back below.
+    dates = itertools.count(1_800_000_000_000)
+    warm = post(upsert_entry, next(dates), "Warm up", list_id=LIST_ID)
+    assert warm["statusCode"] == 200, warm
+
+    local_dynamodb.calls.clear()
+    local_dynamodb.write_units = local_dynamodb.throttled = 0
+    timings, failures = [], []
+    threads = [
+        threading.Thread(
+            target=write_for, args=(upsert_entry, seconds, dates, timings, failures)
+        )
+        for _ in range(writers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    throttled = local_dynamodb.throttled
+
+    # Reading the list back merges every shard, which should give back each entry written, in
+    # the order they were created.
+    entries = json.loads(get(get_entries, list_id=LIST_ID, all="true")["body"])
+    created = [entry["DateCreated"] for entry in entries]
+    assert created == sorted(created), "entries were read back out of order"
+    assert (
+        len(entries) == len(timings) + 1
+    ), f"read back {len(entries)} entries of {len(timings) + 1} written"
+
+    return {
+        "shards": shards,
+        "seconds": elapsed,
+        "written": len(timings),
+        "failed": len(failures),
+        "writes_per_second": len(timings) / elapsed,
+        "latency_ms": percentiles(timings or [0]),
+        "throttled": throttled,
+        "write_units": local_dynamodb.write_units,
+        "calls": dict(local_dynamodb.calls),
+        "read_back": len(entries),
+    }
+
+
+def run(shard_counts, writers, seconds, partition_limit, latency):
+    os.environ["TABLE_NAME"] = TABLE_NAME
+    os.environ.setdefault("CURSOR_SIGNING_KEY", "benchmark-signing-key")
+    import tododb_utils.table
+
+    local_dynamodb = LocalDynamoDB(
+        latency=latency, partition_write_limit=partition_limit
+    )
+    local_dynamodb.attach(tododb_utils.table.dynamo_resource)
+    local_dynamodb.attach(tododb_utils.table.get_client())
+
+    handlers = [import_handler(name) for name in ("get_entries", "upsert_entry")]
+
+    results = []
+    for shards in shard_counts:
+        result = run_shard_count(local_dynamodb, handlers, shards, writers, seconds)
+        results.append(result)
+        print(
+            f"{shards:>6} {result['written']:>8} {result['writes_per_second']:>9.1f}/s "
+            f"{result['latency_ms']['p50']:>8.2f} {result['latency_ms']['p95']:>8.2f} "
+            f"{result['latency_ms']['p99']:>8.2f} {result['throttled']:>9} "
+            f"{result['failed']:>7}",
+            file=sys.stderr,
+        )
+
+    return {
+        "python": platform.python_version(),
+        "writers": writers,
+        "seconds": seconds,
+        "partition_limit": partition_limit,
+        "latency": latency,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--partition-limit",
+        type=float,
+        default=100,
+        help="write units a second each partition takes before it's throttled",
+    )
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--output", help="write the JSON report here, not stdout")
+    args = parser.parse_args()
+
+    print(
+        f"{'shards':>6} {'written':>8} {'throughput':>11} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'throttled':>9} {'failed':>7}",
+        file=sys.stderr,
+    )
+    # Handlers write their metrics to stdout, which would bury the report, and log every write
+    # that fails, which are counted instead.
+    logging.disable(logging.ERROR)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        report = run(
+            args.shards,
+            args.writers,
+            args.seconds,
+            args.partition_limit,
+            args.latency,
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Shared helpers for seeding the local DynamoDB stand-in with realistic todo entries."""
+import random
+import uuid
+
+
+def make_entry(index, seed=0):
+    """Builds a single entry in DynamoDB's wire format, shaped like those the web app creates."""
+    rng = random.Random(seed * 1_000_003 + index)
+    return {
+        "Id": {"S": str(uuid.UUID(int=rng.getrandbits(128), version=4))},
+        "DateCreated": {"N": str(1_700_000_000_000 + index * 1000)},
+        "Description": {"S": f"Todo entry number {index} " + "x" * rng.randint(10, 60)},
+        "Completed": {"BOOL": rng.random() < 0.3},
+    }
+
+
+def seed_entries(local_table, count, seed=0):
+    for index in range(count):
+        local_table.put(make_entry(index, seed))
+
+
+def make_list_entry(index, seed=0, list_id="default"):
+    """Builds an entry as the handlers store it, keyed by its list and in every index."""
+    item = {"ListId": {"S": list_id}, **make_entry(index, seed)}
+    item["CreatedKey"] = {
+        "S": f"{int(item['DateCreated']['N']):013d}#{item['Id']['S']}"
+    }
+    item["LastModified"] = item["DateCreated"]
+    return item
@@ -0,0 +1,80 @@
+import boto3
+import os
+import pytest
+import sys
+
+# Importing lambda_env makes the DbUtils layer and handler modules importable from our tests.
+from application.stateless.tests import lambda_env  # noqa: F401
+from application.stateless.tests.lambda_env import import_handler
+from application.stateless.tests.local_dynamodb import LocalDynamoDB
+
+
+TABLE_NAME = "TestListEntriesTable"
+
+
+@pytest.fixture(scope="session")
+def local_dynamodb():
+    """A stand-in for DynamoDB, attached to the resource and client our handlers share."""
+    os.environ["TABLE_NAME"] = TABLE_NAME
+    os.environ.setdefault("CURSOR_SIGNING_KEY", "test-signing-key")
+
+    import tododb_utils.table
+
+    local_dynamodb = LocalDynamoDB()
+    local_dynamodb.attach(tododb_utils.table.dynamo_resource)
+    local_dynamodb.attach(tododb_utils.table.get_client())
+    return local_dynamodb
+
+
+@pytest.fixture
+def entries_table(local_dynamodb):
+    """A fresh, empty entries table for each test. Handlers should be imported after this."""
+    local_dynamodb.calls.clear()
+    local_dynamodb.write_units = 0
+    local_dynamodb.read_units = 0
+
+    # List versions start again from 0 in a fresh table, so reads cached by an earlier test
+    # could otherwise look current.
+    if "get_entries" in sys.modules:
+        sys.modules["get_entries"].read_cache.clear()
+    # Likewise shard configs cached by writers could belong to a list in an earlier test's table.
+    for name in ("upsert_entry", "delete_entry"):
+        if name in sys.modules:
+            sys.modules[name].shard_configs.clear()
+
+    return local_dynamodb.create_table(
+        TABLE_NAME,
+        "ListId",
+        "Id",
+        indexes={
+            "CreatedIndex": ("ListId", "CreatedKey"),
+            "ModifiedIndex": ("ListId", "LastModified"),
+        },
+        stream=True,
+    )
+
+
+@pytest.fixture
+def table(local_dynamodb, entries_table):
+    """The entries table through a boto3 resource of the test's own, for reading it directly."""
+    return local_dynamodb.attach(boto3.resource("dynamodb")).Table(entries_table.name)
+
+
+@pytest.fixture
+def get_entries(entries_table):
+    return import_handler("get_entries")
+
+
+@pytest.fixture
+def upsert_entry(entries_table):
+    return import_handler("upsert_entry")
+
+
+@pytest.fixture
+def delete_entry(entries_table):
+    return import_handler("delete_entry")
+
+
+@pytest.fixture
+def router(entries_table):
+    return import_handler("router")
@@ -0,0 +1,31 @@
+"""Prepares the interpreter to run our Lambda code outside of the Lambda runtime.
+
+Importing this module puts the DbUtils layer on the path, the same way the runtime does for
+`/opt/python`, and provides the environment boto3 expects to find. `import_handler` can then be
+used to import a handler module from its asset directory.
+"""
+import importlib
+import os
+import sys
+
+
+LAMBDA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "lambda")
+LAYER_DIR = os.path.join(LAMBDA_DIR, "layer", "python")
+
+if LAYER_DIR not in sys.path:
+    sys.path.insert(0, LAYER_DIR)
+
+# The runtime always provides a region and credentials, boto3 refuses to build or sign requests
+# without them. Requests are answered by the local stand-in, so these never leave the process.
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-2")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+
+
+def import_handler(name):
+    """Imports the handler module `name` from `application/stateless/lambda/<name>/`."""
+    handler_dir = os.path.join(LAMBDA_DIR, name)
+    if handler_dir not in sys.path:
+        sys.path.insert(0, handler_dir)
+
+    return importlib.import_module(name)
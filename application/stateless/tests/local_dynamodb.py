@@ -0,0 +1,688 @@
+"""An in-process stand-in for DynamoDB, used by our unit tests and benchmarks.
+
+Rather than mocking boto3, the stand-in hooks into botocore's `before-send` event and answers the
+serialised HTTP request itself. Everything above the wire (parameter validation, the resource
+model, type (de)serialisation, retries) therefore runs exactly as it would against DynamoDB.
+
+Only the subset of the API that our Lambdas use is implemented. Items are kept in their wire
+format, scans walk the table in partition key hash order, queries walk a partition in sort key
+order, and pages are cut at 1MB, so page counts resemble the real service. Secondary indexes are
+sparse and always project every attribute, projection expressions only support top level names.
+
+An optional `latency` is slept on every call to approximate the network round trip, plus
+`seconds_per_mb` for every MB returned to approximate the time the service spends reading it.
+Setting `unprocessed_rate` hands back that fraction of BatchWriteItem requests as
+unprocessed, as DynamoDB does when a table is throttled. Setting `partition_write_limit`
+throttles writes to any one partition beyond that many write units a second, the way
+DynamoDB limits a partition to 1,000: single writes fail with
+ProvisionedThroughputExceededException, which botocore retries, transactions are
+cancelled with a ThrottlingError, and batches hand the writes back unprocessed. Each
+partition can burst to a second's worth of units, and `throttled` counts the writes
+refused. TransactWriteItems checks every condition before applying any of its actions,
+and reports which ones failed through `CancellationReasons`.
+
+Write capacity is tallied in `write_units` the way DynamoDB bills it, one unit per KB of the larger
+of an item's old and new images, doubled for transactions and charged for failed conditions too.
+Read capacity is tallied in `read_units`, one unit per 4KB read, halved for eventually consistent
+reads. Item sizes are approximated by the length of their wire format. Requests that set
+`ReturnConsumedCapacity` get the units they were charged back, as DynamoDB reports them.
+
+A table created with `stream=True` records every change the way a NEW_AND_OLD_IMAGES stream does,
+`drain_stream` hands them out as the batches a Lambda event source mapping would deliver.
+"""
+from botocore.awsrequest import AWSResponse
+import bisect
+from collections import Counter
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+
+from application.stateless.tests.local_expressions import (
+    ExpressionError,
+    apply_update,
+    compile_condition,
+    equality_value,
+    to_python,
+)
+
+
+PAGE_SIZE_LIMIT = 1024 * 1024
+
+
+class LocalDynamoDBError(Exception):
+    def __init__(self, code, message, **extra):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.extra = extra
+
+
+class _RawResponse:
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **kwargs):
+        yield self._body
+
+
+def _item_size(item):
+    return len(json.dumps(item, separators=(",", ":")))
+
+
+def _key_value(item, name):
+    try:
+        return to_python(item[name])
+    except KeyError as err:
+        raise LocalDynamoDBError(
+            "ValidationException", f"Missing key attribute {name}"
+        ) from err
+
+
+class LocalIndex:
+    """Keeps each partition's items ordered by sort key, for the table itself or an index."""
+
+    def __init__(self, name, partition_key, sort_key):
+        self.name = name
+        self.partition_key = partition_key
+        self.sort_key = sort_key
+        self.partitions = {}
+
+    def position_of(self, item, table_key):
+        sort = to_python(item[self.sort_key]) if self.sort_key else None
+        return (sort, table_key)
+
+    def covers(self, item):
+        return self.partition_key in item and (
+            self.sort_key is None or self.sort_key in item
+        )
+
+    def add(self, item, table_key):
+        if self.covers(item):
+            partition = self.partitions.setdefault(
+                to_python(item[self.partition_key]), []
+            )
+            bisect.insort(partition, self.position_of(item, table_key))
+
+    def remove(self, item, table_key):
+        if self.covers(item):
+            partition_value = to_python(item[self.partition_key])
+            partition = self.partitions[partition_value]
+            partition.pop(
+                bisect.bisect_left(partition, self.position_of(item, table_key))
+            )
+            if not partition:
+                del self.partitions[partition_value]
+
+
+class PartitionThrottle:
+    """A bucket of write units for each partition, refilled at `units_per_second`."""
+
+    def __init__(self, units_per_second):
+        self.units_per_second = units_per_second
+        self._buckets = {}
+
+    def take(self, units_by_partition):
+        """
+        Takes units from several partitions' buckets, all or nothing, returning whether
+        they were taken.
+        """
+        now = time.monotonic()
+        available = {}
+        for partition in units_by_partition:
+            tokens, updated = self._buckets.get(partition, (self.units_per_second, now))
+            available[partition] = min(
+                self.units_per_second,
+                tokens + (now - updated) * self.units_per_second,
+            )
+
+        allowed = all(
+            available[partition] >= units
+            for partition, units in units_by_partition.items()
+        )
+        for partition, units in units_by_partition.items():
+            self._buckets[partition] = (
+                available[partition] - (units if allowed else 0),
+                now,
+            )
+        return allowed
+
+
+class LocalTable:
+    def __init__(self, name, partition_key, sort_key=None, indexes=None, stream=False):
+        self.name = name
+        self.partition_key = partition_key
+        self.sort_key = sort_key
+        self.items = {}
+        self.indexes = {None: LocalIndex(None, partition_key, sort_key)}
+        for index_name, (index_partition_key, index_sort_key) in (
+            indexes or {}
+        ).items():
+            self.indexes[index_name] = LocalIndex(
+                index_name, index_partition_key, index_sort_key
+            )
+        self._ordered_keys = None
+        self.stream = [] if stream else None
+        self._sequence = 0
+
+    @property
+    def key_names(self):
+        return [name for name in (self.partition_key, self.sort_key) if name]
+
+    def key_of(self, item):
+        partition = _key_value(item, self.partition_key)
+        sort = _key_value(item, self.sort_key) if self.sort_key else None
+        digest = hashlib.md5(str(partition).encode("utf-8")).digest()
+
+        return (int.from_bytes(digest[:4], "big"), partition, sort)
+
+    def key_attributes(self, item, index_name=None):
+        names = self.key_names
+        index = self.indexes[index_name]
+        if index_name:
+            names += [index.partition_key] + (
+                [index.sort_key] if index.sort_key else []
+            )
+        return {name: item[name] for name in names}
+
+    def get(self, key):
+        return self.items.get(self.key_of(key))
+
+    def put(self, item):
+        key = self.key_of(item)
+        previous = self.items.get(key)
+        if previous is None:
+            self._ordered_keys = None
+        else:
+            for index in self.indexes.values():
+                index.remove(previous, key)
+
+        self.items[key] = item
+        for index in self.indexes.values():
+            index.add(item, key)
+        self._record("INSERT" if previous is None else "MODIFY", previous, item)
+        return previous
+
+    def load(self, items):
+        """
+        Adds items whose keys aren't in the table yet, sorting each index once at the end rather
+        than inserting into it item by item. Nothing is recorded in the stream.
+        """
+        for item in items:
+            key = self.key_of(item)
+            self.items[key] = item
+            for index in self.indexes.values():
+                if index.covers(item):
+                    index.partitions.setdefault(
+                        to_python(item[index.partition_key]), []
+                    ).append(index.position_of(item, key))
+
+        for index in self.indexes.values():
+            for partition in index.partitions.values():
+                partition.sort()
+        self._ordered_keys = None
+
+    def delete(self, key):
+        key = self.key_of(key)
+        previous = self.items.pop(key, None)
+        if previous is not None:
+            self._ordered_keys = None
+            for index in self.indexes.values():
+                index.remove(previous, key)
+            self._record("REMOVE", previous, None)
+        return previous
+
+    def _record(self, event_name, old, new):
+        if self.stream is None:
+            return
+        self._sequence += 1
+        data = {
+            "ApproximateCreationDateTime": int(time.time()),
+            "Keys": self.key_attributes(new or old),
+            "SequenceNumber": f"{self._sequence:021d}",
+            "SizeBytes": _item_size(new or old),
+            "StreamViewType": "NEW_AND_OLD_IMAGES",
+        }
+        if new is not None:
+            data["NewImage"] = new
+        if old is not None:
+            data["OldImage"] = old
+        self.stream.append(
+            {"eventName": event_name, "eventSource": "aws:dynamodb", "dynamodb": data}
+        )
+
+    def drain_stream(self, batch_size=100):
+        """Removes every stream record, yielding them as events of up to `batch_size` records."""
+        while self.stream:
+            records, self.stream = self.stream[:batch_size], self.stream[batch_size:]
+            yield {"Records": records}
+
+    def ordered_keys(self):
+        # Scans walk items in partition key hash order, which is also how segments are carved up.
+        if self._ordered_keys is None:
+            self._ordered_keys = sorted(self.items)
+        return self._ordered_keys
+
+
+class LocalDynamoDB:
+    """An in-memory DynamoDB that can be attached to any number of boto3 clients or resources."""
+
+    def __init__(
+        self,
+        latency=0.0,
+        seconds_per_mb=0.0,
+        unprocessed_rate=0.0,
+        partition_write_limit=None,
+    ):
+        self.tables = {}
+        self.latency = latency
+        self.seconds_per_mb = seconds_per_mb
+        self.unprocessed_rate = unprocessed_rate
+        self.partition_throttle = partition_write_limit and PartitionThrottle(
+            partition_write_limit
+        )
+        self._random = random.Random(0)
+        self.calls = Counter()
+        self.write_units = 0
+        self.read_units = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def create_table(
+        self, name, partition_key, sort_key=None, indexes=None, stream=False
+    ):
+        """Creates a table. `indexes` maps index names to (partition key, sort key) pairs."""
+        self.tables[name] = LocalTable(name, partition_key, sort_key, indexes, stream)
+        return self.tables[name]
+
+    def attach(self, client_or_resource):
+        """Routes every DynamoDB request made by the given client (or resource) to this stand-in."""
+        client = getattr(client_or_resource.meta, "client", client_or_resource)
+        client.meta.events.register("before-send.dynamodb", self._handle)
+        return client_or_resource
+
+    def _handle(self, request, **kwargs):
+        target = request.headers["X-Amz-Target"]
+        if isinstance(target, bytes):
+            target = target.decode("utf-8")
+        operation = target.split(".")[-1]
+        params = json.loads(request.body or b"{}")
+
+        try:
+            operation_handler = getattr(self, f"_op_{operation}", None)
+            if operation_handler is None:
+                raise LocalDynamoDBError(
+                    "UnknownOperationException",
+                    f"{operation} is not supported by the local stand-in",
+                )
+
+            with self._lock:
+                self.calls[operation] += 1
+                units_before = self.read_units + self.write_units
+                try:
+                    result = operation_handler(params)
+                except ExpressionError as err:
+                    raise LocalDynamoDBError("ValidationException", str(err)) from err
+                units = self.read_units + self.write_units - units_before
+            if params.get("ReturnConsumedCapacity", "NONE") != "NONE":
+                result["ConsumedCapacity"] = self._consumed_capacity(params, units)
+            status = 200
+        except LocalDynamoDBError as err:
+            result = {
+                "__type": f"com.amazonaws.dynamodb.v20120810#{err.code}",
+                "message": err.message,
+                **err.extra,
+            }
+            status = 400
+
+        body = json.dumps(result).encode("utf-8")
+
+        # Sleeping outside of the lock lets concurrent callers overlap, as they would for real.
+        delay = self.latency + self.seconds_per_mb * len(body) / (1024 * 1024)
+        if delay:
+            time.sleep(delay)
+
+        return AWSResponse(
+            request.url,
+            status,
+            {"x-amzn-requestid": "local", "content-type": "application/x-amz-json-1.0"},
+            _RawResponse(body),
+        )
+
+    def _table(self, params):
+        try:
+            return self.tables[params["TableName"]]
+        except KeyError as err:
+            raise LocalDynamoDBError(
+                "ResourceNotFoundException", "Requested resource not found"
+            ) from err
+
+    @staticmethod
+    def _check_condition(params, item):
+        if "ConditionExpression" not in params:
+            return
+        condition = compile_condition(
+            params["ConditionExpression"],
+            params.get("ExpressionAttributeNames"),
+            params.get("ExpressionAttributeValues"),
+        )
+        if not condition(item or {}):
+            raise LocalDynamoDBError(
+                "ConditionalCheckFailedException", "The conditional request failed"
+            )
+
+    @staticmethod
+    def _return_values(params, old, new):
+        return_values = params.get("ReturnValues", "NONE")
+        if return_values == "ALL_OLD" and old:
+            return {"Attributes": old}
+        if return_values == "ALL_NEW" and new:
+            return {"Attributes": new}
+        if return_values in ("UPDATED_OLD", "UPDATED_NEW"):
+            source = old if return_values == "UPDATED_OLD" else new
+            changed = {
+                name: value
+                for name, value in (source or {}).items()
+                if (old or {}).get(name) != (new or {}).get(name)
+            }
+            return {"Attributes": changed} if changed else {}
+        return {}
+
+    def _op_DescribeTable(self, params):
+        table = self._table(params)
+        return {
+            "Table": {
+                "TableName": table.name,
+                "TableStatus": "ACTIVE",
+                "KeySchema": [
+                    {"AttributeName": name, "KeyType": key_type}
+                    for name, key_type in zip(table.key_names, ("HASH", "RANGE"))
+                ],
+                "ItemCount": len(table.items),
+            }
+        }
+
+    @staticmethod
+    def _consumed_capacity(params, units):
+        # Batches and transactions report capacity per table, everything else for its one table.
+        if "TableName" in params:
+            return {"TableName": params["TableName"], "CapacityUnits": units}
+        tables = params.get("RequestItems") or {
+            next(iter(item.values()))["TableName"]: None
+            for item in params["TransactItems"]
+        }
+        return [{"TableName": name, "CapacityUnits": units} for name in tables]
+
+    def _charge_read(self, size, consistent):
+        units = max(1, math.ceil(size / 4096))
+        self.read_units += units if consistent else units / 2
+
+    def _op_GetItem(self, params):
+        item = self._table(params).get(params["Key"])
+        self._charge_read(_item_size(item) if item else 0, params.get("ConsistentRead"))
+        return {"Item": item} if item else {}
+
+    @staticmethod
+    def _write_units(old, new, multiplier=1):
+        size = max(_item_size(old) if old else 0, _item_size(new) if new else 0)
+        return multiplier * max(1, math.ceil(size / 1024))
+
+    def _charge_write(self, old, new, multiplier=1):
+        self.write_units += self._write_units(old, new, multiplier)
+
+    def _take_write_capacity(self, writes):
+        """
+        Takes the units of (table, item, units) writes from their partitions, returning whether
+        there were enough. Throttled writes aren't charged.
+        """
+        if not self.partition_throttle:
+            return True
+        units_by_partition = Counter()
+        for table, item, units in writes:
+            units_by_partition[
+                (table.name, _key_value(item, table.partition_key))
+            ] += units
+        if self.partition_throttle.take(units_by_partition):
+            return True
+        self.throttled += 1
+        return False
+
+    def _throttle_write(self, table, item, units):
+        if not self._take_write_capacity([(table, item, units)]):
+            raise LocalDynamoDBError(
+                "ProvisionedThroughputExceededException",
+                "The level of configured provisioned throughput for the table was exceeded",
+            )
+
+    def _op_PutItem(self, params, multiplier=1, throttle=True):
+        table = self._table(params)
+        new = params["Item"]
+        if throttle:
+            self._throttle_write(table, new, self._write_units(table.get(new), new))
+        self._charge_write(table.get(new), new, multiplier)
+        self._check_condition(params, table.get(new))
+        old = table.put(new)
+        return self._return_values(params, old, new)
+
+    def _op_UpdateItem(self, params, multiplier=1, throttle=True):
+        table = self._table(params)
+        old = table.get(params["Key"])
+        new = apply_update(
+            old or dict(params["Key"]),
+            params["UpdateExpression"],
+            params.get("ExpressionAttributeNames"),
+            params.get("ExpressionAttributeValues"),
+        )
+        if throttle:
+            self._throttle_write(table, new, self._write_units(old, new))
+        self._charge_write(old, new, multiplier)
+        self._check_condition(params, old)
+        table.put(new)
+        return self._return_values(params, old, new)
+
+    def _op_DeleteItem(self, params, multiplier=1, throttle=True):
+        table = self._table(params)
+        old = table.get(params["Key"])
+        if throttle:
+            self._throttle_write(table, params["Key"], self._write_units(old, None))
+        self._charge_write(old, None, multiplier)
+        self._check_condition(params, table.get(params["Key"]))
+        old = table.delete(params["Key"])
+        return self._return_values(params, old, None)
+
+    def _page(self, params, table, index_name, items):
+        """Cuts a page of items at Limit or 1MB and applies any filter expression."""
+        limit = params.get("Limit")
+        evaluated, size, last_item = [], 0, None
+        for item in items:
+            evaluated.append(item)
+            size += _item_size(item)
+            if (limit and len(evaluated) >= limit) or size >= PAGE_SIZE_LIMIT:
+                last_item = item
+                break
+        self._charge_read(size, params.get("ConsistentRead"))
+
+        matched = evaluated
+        if "FilterExpression" in params:
+            condition = compile_condition(
+                params["FilterExpression"],
+                params.get("ExpressionAttributeNames"),
+                params.get("ExpressionAttributeValues"),
+            )
+            matched = [item for item in evaluated if condition(item)]
+
+        if "ProjectionExpression" in params:
+            names = params.get("ExpressionAttributeNames", {})
+            projected = [
+                names.get(name.strip(), name.strip())
+                for name in params["ProjectionExpression"].split(",")
+            ]
+            matched = [
+                {name: item[name] for name in projected if name in item}
+                for item in matched
+            ]
+
+        response = {"Count": len(matched), "ScannedCount": len(evaluated)}
+        if params.get("Select") != "COUNT":
+            response["Items"] = matched
+        if last_item is not None and next(items, None) is not None:
+            response["LastEvaluatedKey"] = table.key_attributes(last_item, index_name)
+        return response
+
+    def _op_Scan(self, params):
+        table = self._table(params)
+        keys = table.ordered_keys()
+        start, end = 0, len(keys)
+
+        # Segments are contiguous ranges of the partition key hash space.
+        if "TotalSegments" in params:
+            total, segment = params["TotalSegments"], params["Segment"]
+            start = bisect.bisect_left(keys, (segment * 2**32 // total,))
+            end = bisect.bisect_left(keys, ((segment + 1) * 2**32 // total,))
+
+        if "ExclusiveStartKey" in params:
+            start = bisect.bisect_right(keys, table.key_of(params["ExclusiveStartKey"]))
+
+        items = (table.items[keys[position]] for position in range(start, end))
+        return self._page(params, table, None, items)
+
+    def _op_Query(self, params):
+        table = self._table(params)
+        index_name = params.get("IndexName")
+        try:
+            index = table.indexes[index_name]
+        except KeyError as err:
+            raise LocalDynamoDBError(
+                "ValidationException", f"The table does not have the index {index_name}"
+            ) from err
+
+        names = params.get("ExpressionAttributeNames")
+        values = params.get("ExpressionAttributeValues")
+        expression = params["KeyConditionExpression"]
+        partition_value = equality_value(expression, index.partition_key, names, values)
+        if partition_value is None:
+            raise LocalDynamoDBError(
+                "ValidationException", "Query condition missed key schema element"
+            )
+
+        partition = index.partitions.get(to_python(partition_value), [])
+        forward = params.get("ScanIndexForward", True)
+        if "ExclusiveStartKey" in params:
+            start_key = params["ExclusiveStartKey"]
+            position = index.position_of(start_key, table.key_of(start_key))
+            if forward:
+                positions = range(
+                    bisect.bisect_right(partition, position), len(partition)
+                )
+            else:
+                positions = range(bisect.bisect_left(partition, position) - 1, -1, -1)
+        else:
+            positions = (
+                range(len(partition)) if forward else range(len(partition) - 1, -1, -1)
+            )
+
+        key_condition = compile_condition(expression, names, values)
+        items = (
+            item
+            for item in (table.items[partition[position][1]] for position in positions)
+            if key_condition(item)
+        )
+        return self._page(params, table, index_name, items)
+
+    def _op_BatchWriteItem(self, params):
+        requests = [
+            (table_name, request)
+            for table_name, table_requests in params["RequestItems"].items()
+            for request in table_requests
+        ]
+        if not 1 <= len(requests) <= 25:
+            raise LocalDynamoDBError(
+                "ValidationException",
+                "Too many items requested for the BatchWriteItem call",
+            )
+
+        unprocessed = {}
+        for table_name, request in requests:
+            table = self._table({"TableName": table_name})
+            if "PutRequest" in request:
+                item = request["PutRequest"]["Item"]
+                units = self._write_units(table.get(item), item)
+            else:
+                item = request["DeleteRequest"]["Key"]
+                units = self._write_units(table.get(item), None)
+
+            if self._random.random() < self.unprocessed_rate or not (
+                self._take_write_capacity([(table, item, units)])
+            ):
+                unprocessed.setdefault(table_name, []).append(request)
+            elif "PutRequest" in request:
+                self._charge_write(table.get(item), item)
+                table.put(item)
+            else:
+                self._charge_write(table.delete(item), None)
+        return {"UnprocessedItems": unprocessed}
+
+    def _op_TransactWriteItems(self, params):
+        actions = [
+            (kind, action)
+            for transact_item in params["TransactItems"]
+            for kind, action in transact_item.items()
+        ]
+
+        reasons = []
+        for kind, action in actions:
+            table = self._table(action)
+            key = action["Item"] if kind == "Put" else action["Key"]
+            try:
+                self._check_condition(action, table.get(key))
+                reasons.append({"Code": "None"})
+            except LocalDynamoDBError as err:
+                reasons.append(
+                    {"Code": "ConditionalCheckFailed", "Message": err.message}
+                )
+
+        # Every partition written to must have the capacity for its part of the transaction.
+        writes = []
+        for kind, action in actions:
+            if kind == "ConditionCheck":
+                continue
+            table = self._table(action)
+            key = action["Item"] if kind == "Put" else action["Key"]
+            old = table.get(key)
+            new = action.get("Item") if kind == "Put" else old
+            writes.append((table, key, self._write_units(old, new, 2)))
+        if not any(reason["Code"] != "None" for reason in reasons) and not (
+            self._take_write_capacity(writes)
+        ):
+            reasons = [
+                {"Code": "ThrottlingError", "Message": "Throughput exceeds the limit"}
+                for _ in actions
+            ]
+
+        if any(reason["Code"] != "None" for reason in reasons):
+            codes = ", ".join(reason["Code"] for reason in reasons)
+            raise LocalDynamoDBError(
+                "TransactionCanceledException",
+                f"Transaction cancelled, please refer cancellation reasons for specific "
+                f"reasons [{codes}]",
+                CancellationReasons=reasons,
+            )
+
+        for kind, action in actions:
+            if kind != "ConditionCheck":
+                getattr(self, f"_op_{kind}Item")(action, multiplier=2, throttle=False)
+        return {}
+
+    def _op_BatchGetItem(self, params):
+        responses = {}
+        for table_name, request in params["RequestItems"].items():
+            table = self._table({"TableName": table_name})
+            items = [table.get(key) for key in request["Keys"]]
+            for item in items:
+                self._charge_read(
+                    _item_size(item) if item else 0, request.get("ConsistentRead")
+                )
+            responses[table_name] = [item for item in items if item]
+        return {"Responses": responses, "UnprocessedKeys": {}}
@@ -0,0 +1,323 @@
+"""A small evaluator for the DynamoDB expression language, used by the local DynamoDB stand-in.
+
+It understands enough of condition, key condition, filter, and update expressions for the ones
+our Lambdas (and boto3's condition builders) produce: comparisons, BETWEEN, IN, AND / OR / NOT,
+`attribute_exists`, `attribute_not_exists`, `begins_with`, `size`, and SET / ADD / REMOVE / DELETE
+update clauses with `if_not_exists`, `list_append`, `+` and `-`. Only top level attributes are
+supported as paths.
+"""
+from decimal import Decimal
+import re
+
+
+_TOKEN = re.compile(r"\s*(<>|<=|>=|[=<>(),+\-]|[#:]?[A-Za-z_][A-Za-z0-9_]*)")
+_KEYWORDS = {"AND", "OR", "NOT", "BETWEEN", "IN", "SET", "ADD", "REMOVE", "DELETE"}
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+def _tokenise(expression):
+    tokens, position = [], 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = _TOKEN.match(expression, position)
+        if not match:
+            raise ExpressionError(f"Invalid expression: {expression!r}")
+        token = match.group(1)
+        tokens.append(token.upper() if token.upper() in _KEYWORDS else token)
+        position = match.end()
+    return tokens
+
+
+def to_python(attribute_value):
+    """Converts a wire format AttributeValue to a comparable Python value."""
+    ((type_, value),) = attribute_value.items()
+    if type_ == "N":
+        return Decimal(value)
+    if type_ == "NS":
+        return {Decimal(number) for number in value}
+    if type_ in ("SS", "BS"):
+        return set(value)
+    if type_ == "NULL":
+        return None
+    return value
+
+
+def _number(value):
+    return {
+        "N": str(value.normalize()) if value != value.to_integral() else str(int(value))
+    }
+
+
+class _Parser:
+    def __init__(self, expression, names, values):
+        self.tokens = _tokenise(expression)
+        self.position = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise ExpressionError(f"Expected {expected!r} but found {token!r}")
+        self.position += 1
+        return token
+
+    def done(self):
+        if self.peek() is not None:
+            raise ExpressionError(f"Unexpected token {self.peek()!r}")
+
+    def path(self):
+        token = self.take()
+        if token.startswith("#"):
+            try:
+                return self.names[token]
+            except KeyError as err:
+                raise ExpressionError(f"Undefined attribute name {token}") from err
+        if token.startswith(":") or not re.match(r"[A-Za-z_]", token):
+            raise ExpressionError(f"Expected an attribute name but found {token!r}")
+        return token
+
+    # Operands evaluate to wire format AttributeValues, or None when the attribute is missing.
+    def operand(self):
+        token = self.peek()
+        if token.startswith(":"):
+            self.take()
+            try:
+                value = self.values[token]
+            except KeyError as err:
+                raise ExpressionError(f"Undefined attribute value {token}") from err
+            return lambda item: value
+        if token == "size":
+            self.take()
+            self.take("(")
+            path = self.path()
+            self.take(")")
+
+            def size(item):
+                if path not in item:
+                    return None
+                value = to_python(item[path])
+                return {"N": str(len(value))}
+
+            return size
+        path = self.path()
+        return lambda item: item.get(path)
+
+    # Condition expressions
+    def condition(self):
+        left = self.conjunction()
+        while self.peek() == "OR":
+            self.take()
+            left = (lambda a, b: lambda item: a(item) or b(item))(
+                left, self.conjunction()
+            )
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.peek() == "AND":
+            self.take()
+            left = (lambda a, b: lambda item: a(item) and b(item))(
+                left, self.negation()
+            )
+        return left
+
+    def negation(self):
+        if self.peek() == "NOT":
+            self.take()
+            inner = self.negation()
+            return lambda item: not inner(item)
+        return self.primary()
+
+    def primary(self):
+        token = self.peek()
+        if token == "(":
+            self.take()
+            inner = self.condition()
+            self.take(")")
+            return inner
+
+        if token in (
+            "attribute_exists",
+            "attribute_not_exists",
+            "begins_with",
+            "contains",
+        ):
+            self.take()
+            self.take("(")
+            path = self.path()
+            if token == "attribute_exists":
+                self.take(")")
+                return lambda item: path in item
+            if token == "attribute_not_exists":
+                self.take(")")
+                return lambda item: path not in item
+            self.take(",")
+            operand = self.operand()
+            self.take(")")
+            if token == "begins_with":
+                return lambda item: path in item and str(
+                    to_python(item[path])
+                ).startswith(to_python(operand(item)))
+            return lambda item: path in item and to_python(operand(item)) in to_python(
+                item[path]
+            )
+
+        left = self.operand()
+        comparator = self.take()
+
+        if comparator == "BETWEEN":
+            low = self.operand()
+            self.take("AND")
+            high = self.operand()
+            return lambda item: _compare(left(item), low(item), ">=") and _compare(
+                left(item), high(item), "<="
+            )
+
+        if comparator == "IN":
+            self.take("(")
+            options = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                options.append(self.operand())
+            self.take(")")
+            return lambda item: any(
+                _compare(left(item), option(item), "=") for option in options
+            )
+
+        if comparator not in ("=", "<>", "<", "<=", ">", ">="):
+            raise ExpressionError(f"Unsupported comparator {comparator!r}")
+        right = self.operand()
+        return lambda item: _compare(left(item), right(item), comparator)
+
+    # Update expressions
+    def update_value(self):
+        token = self.peek()
+        if token in ("if_not_exists", "list_append"):
+            self.take()
+            self.take("(")
+            first = self.path() if token == "if_not_exists" else None
+            first_operand = None if first else self.operand()
+            self.take(",")
+            second = self.operand()
+            self.take(")")
+            if token == "if_not_exists":
+                value = lambda item: item.get(first) or second(item)  # noqa: E731
+            else:
+                value = lambda item: {  # noqa: E731
+                    "L": first_operand(item)["L"] + second(item)["L"]
+                }
+        else:
+            value = self.operand()
+
+        if self.peek() in ("+", "-"):
+            sign = self.take()
+            other = self.update_value()
+            return lambda item: _number(
+                to_python(value(item))
+                + (1 if sign == "+" else -1) * to_python(other(item))
+            )
+        return value
+
+    def update(self):
+        actions = []
+        while self.peek() is not None:
+            clause = self.take()
+            while True:
+                path = self.path()
+                if clause == "SET":
+                    self.take("=")
+                    actions.append(("SET", path, self.update_value()))
+                elif clause == "REMOVE":
+                    actions.append(("REMOVE", path, None))
+                elif clause in ("ADD", "DELETE"):
+                    actions.append((clause, path, self.operand()))
+                else:
+                    raise ExpressionError(f"Unsupported update clause {clause!r}")
+                if self.peek() != ",":
+                    break
+                self.take()
+        return actions
+
+
+def _compare(left, right, comparator):
+    if left is None or right is None:
+        return comparator == "<>" and (left is None) != (right is None)
+
+    (left_type,), (right_type,) = left.keys(), right.keys()
+    if left_type != right_type:
+        return comparator == "<>"
+
+    left, right = to_python(left), to_python(right)
+    return {
+        "=": lambda: left == right,
+        "<>": lambda: left != right,
+        "<": lambda: left < right,
+        "<=": lambda: left <= right,
+        ">": lambda: left > right,
+        ">=": lambda: left >= right,
+    }[comparator]()
+
+
+def compile_condition(expression, names=None, values=None):
+    """Returns a predicate taking a wire format item, for condition, filter and key conditions."""
+    parser = _Parser(expression, names, values)
+    predicate = parser.condition()
+    parser.done()
+    return predicate
+
+
+def equality_value(expression, attribute, names=None, values=None):
+    """Returns the value a key condition expression requires `attribute` to equal, if any."""
+    names, values = names or {}, values or {}
+    tokens = _tokenise(expression)
+    for index in range(len(tokens) - 2):
+        left, comparator, right = tokens[index : index + 3]
+        if comparator != "=":
+            continue
+        if names.get(left, left) == attribute and right.startswith(":"):
+            return values.get(right)
+        if names.get(right, right) == attribute and left.startswith(":"):
+            return values.get(left)
+    return None
+
+
+def apply_update(item, expression, names=None, values=None):
+    """Returns a copy of `item` with the update expression applied."""
+    parser = _Parser(expression, names, values)
+    actions = parser.update()
+
+    # All values are evaluated against the item as it was before the update.
+    evaluated = [
+        (clause, path, value(item) if value else None)
+        for clause, path, value in actions
+    ]
+
+    updated = dict(item)
+    for clause, path, value in evaluated:
+        if clause == "SET":
+            updated[path] = value
+        elif clause == "REMOVE":
+            updated.pop(path, None)
+        elif clause == "ADD":
+            if "N" in value:
+                current = to_python(updated[path]) if path in updated else Decimal(0)
+                updated[path] = _number(current + to_python(value))
+            else:
+                ((set_type, members),) = value.items()
+                current = updated.get(path, {set_type: []})[set_type]
+                updated[path] = {set_type: sorted(set(current) | set(members))}
+        elif clause == "DELETE" and path in updated:
+            ((set_type, members),) = value.items()
+            remaining = sorted(set(updated[path][set_type]) - set(members))
+            if remaining:
+                updated[path] = {set_type: remaining}
+            else:
+                updated.pop(path)
+    return updated
@@ -0,0 +1,84 @@
+"""An in-process stand-in for an SQS queue, used by our unit tests and benchmarks.
+
+Like the DynamoDB stand-in in `local_dynamodb.py`, it hooks into botocore's `before-send` event, so
+messages sent by our handlers go through boto3 exactly as they would for real. Only SendMessage is
+implemented. Sent messages are held until `drain` hands them out as the batches of SQS records a
+Lambda event source mapping would deliver.
+"""
+from botocore.awsrequest import AWSResponse
+import hashlib
+import json
+import time
+import uuid
+
+
+class _RawResponse:
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **kwargs):
+        yield self._body
+
+
+class LocalQueue:
+    def __init__(
+        self, queue_url="https://sqs.eu-west-2.amazonaws.com/000000000000/Local"
+    ):
+        self.queue_url = queue_url
+        self.messages = []
+        self.sent = 0
+
+    def attach(self, client):
+        """Routes every SQS request made by the given client to this queue."""
+        client.meta.events.register("before-send.sqs", self._handle)
+        return client
+
+    def _handle(self, request, **kwargs):
+        target = request.headers["X-Amz-Target"]
+        if isinstance(target, bytes):
+            target = target.decode("utf-8")
+        operation = target.split(".")[-1]
+        params = json.loads(request.body or b"{}")
+
+        if operation != "SendMessage":
+            result = {
+                "__type": "com.amazonaws.sqs#UnsupportedOperation",
+                "message": f"{operation} is not supported by the local stand-in",
+            }
+            status = 400
+        else:
+            result = self._send(params)
+            status = 200
+
+        return AWSResponse(
+            request.url,
+            status,
+            {"x-amzn-requestid": "local", "content-type": "application/x-amz-json-1.0"},
+            _RawResponse(json.dumps(result).encode("utf-8")),
+        )
+
+    def _send(self, params):
+        body = params["MessageBody"]
+        message_id = str(uuid.uuid4())
+        self.messages.append(
+            {
+                "messageId": message_id,
+                "body": body,
+                "attributes": {"SentTimestamp": str(int(time.time() * 1000))},
+                "eventSource": "aws:sqs",
+            }
+        )
+        self.sent += 1
+        return {
+            "MessageId": message_id,
+            "MD5OfMessageBody": hashlib.md5(body.encode("utf-8")).hexdigest(),
+        }
+
+    def drain(self, batch_size=10):
+        """Removes every held message, yielding them as SQS events of up to `batch_size` records."""
+        while self.messages:
+            records, self.messages = (
+                self.messages[:batch_size],
+                self.messages[batch_size:],
+            )
+            yield {"Records": records}
@@ -0,0 +1,158 @@
+import json
+import logging
+import pytest
+
+import tododb_utils.api_cache
+from application.stateless.tests.api_events import create, get, post, request
+from tododb_utils import invalidate_entries_cache
+
+
+logger = logging.getLogger(__name__)
+API_URL = "https://abc123.execute-api.eu-west-2.amazonaws.com/prod"
+
+
+class FakeResponse:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def read(self):
+        return b""
+
+
+class FakeContext:
+    invoked_function_arn = (
+        "arn:aws:lambda:eu-west-2:123456789012:function:TodoUpsertEntry"
+    )
+
+
+class FakeLambda:
+    def __init__(self):
+        self.invocations = []
+
+    def invoke(self, **kwargs):
+        self.invocations.append(kwargs)
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    sent = []
+
+    def urlopen(request, timeout):
+        sent.append(request)
+        return FakeResponse()
+
+    monkeypatch.setenv("API_CACHE_URL", API_URL)
+    monkeypatch.setattr(tododb_utils.api_cache.urllib.request, "urlopen", urlopen)
+    return sent
+
+
+@pytest.fixture
+def fake_lambda(monkeypatch):
+    fake_lambda = FakeLambda()
+    monkeypatch.setattr(tododb_utils.api_cache, "_lambda", fake_lambda)
+    return fake_lambda
+
+
+def test_does_nothing_without_a_cache_url(monkeypatch):
+    monkeypatch.delenv("API_CACHE_URL", raising=False)
+
+    assert invalidate_entries_cache(logger) is False
+
+
+def test_refreshes_every_first_page_of_a_list(sent):
+    assert invalidate_entries_cache(logger, "groceries") is True
+
+    assert [request.full_url for request in sent] == [
+        f"{API_URL}/lists/groceries/entries",
+        f"{API_URL}/lists/groceries/entries?all=true",
+    ]
+    for request in sent:
+        headers = {name.lower(): value for name, value in request.header_items()}
+        assert headers["cache-control"] == "max-age=0"
+        # Responses aren't cached per encoding, so the refresh doesn't name one.
+        assert "accept-encoding" not in headers
+        assert "/execute-api/aws4_request" in headers["authorization"]
+
+
+def test_writes_refresh_the_cache_in_an_invocation_of_their_own(
+    upsert_entry, sent, fake_lambda
+):
+    created = post(upsert_entry, list_id="groceries", context=FakeContext())
+    assert created["statusCode"] == 200
+    # Nothing is refreshed on the request path, nor asked for after a rejected write.
+    assert sent == []
+    missing = request(
+        upsert_entry,
+        "PUT",
+        body={"Id": "missing", "Completed": True},
+        list_id="groceries",
+        context=FakeContext(),
+    )
+    assert missing["statusCode"] == 404
+
+    (invocation,) = fake_lambda.invocations
+    assert invocation["FunctionName"] == FakeContext.invoked_function_arn
+    assert invocation["InvocationType"] == "Event"
+
+    assert upsert_entry.handler(json.loads(invocation["Payload"]), None) is True
+    assert len(sent) == 2
+
+
+def test_failed_refreshes_are_not_raised(monkeypatch):
+    def urlopen(request, timeout):
+        raise OSError("Connection refused")
+
+    monkeypatch.setenv("API_CACHE_URL", API_URL)
+    monkeypatch.setattr(tododb_utils.api_cache.urllib.request, "urlopen", urlopen)
+
+    assert invalidate_entries_cache(logger) is False
+
+
+@pytest.fixture
+def get_entries(get_entries, monkeypatch):
+    monkeypatch.setattr(get_entries, "behind_api_cache", True)
+    return get_entries
+
+
+def read(get_entries, **params):
+    # As a client that could be sent a 304, or a compressed body.
+    return get(
+        get_entries,
+        list_id="groceries",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": '"0"'},
+        **params,
+    )
+
+
+def test_responses_behind_the_cache_are_shared_by_every_client(get_entries):
+    response = read(get_entries)
+
+    # Neither a 304 nor compressed, both depend on the client.
+    assert response["statusCode"] == 200
+    assert "Content-Encoding" not in response["headers"]
+
+
+def test_pages_after_a_write_are_read_with_new_cursors(get_entries, upsert_entry):
+    ids = [
+        create(upsert_entry, date_created, list_id="groceries")
+        for date_created in (1000, 2000, 3000)
+    ]
+    before = json.loads(read(get_entries, limit="1")["body"])["nextCursor"]
+
+    request(
+        upsert_entry,
+        "PUT",
+        body={"Id": ids[2], "Completed": True},
+        list_id="groceries",
+    )
+    after = json.loads(read(get_entries, limit="1")["body"])["nextCursor"]
+
+    # The stage cache keys pages by cursor, so it has none cached for the new one.
+    assert after != before
+    # Cursors from before the write still read on from the same place.
+    assert json.loads(
+        read(get_entries, limit="1", cursor=before)["body"]
+    ) == json.loads(read(get_entries, limit="1", cursor=after)["body"])
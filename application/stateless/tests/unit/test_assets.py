@@ -0,0 +1,50 @@
+import aws_cdk as core
+
+import assets
+from config import CommonConfig
+
+
+def write(path, contents):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(contents)
+
+
+def fingerprint(outdir, source, exclude=()):
+    digest = assets.fingerprint(str(outdir), str(source), list(exclude))
+    return digest, assets.fingerprint_timings[str(source)]["cached"]
+
+
+def test_fingerprints_are_reused_until_a_file_changes(tmp_path):
+    source, outdir = tmp_path / "code", tmp_path / "cdk.out"
+    write(source / "handler.py", "def handler(event, context):\n    pass\n")
+    write(source / "utils" / "keys.py", "KEY = 'Id'\n")
+
+    first, cached = fingerprint(outdir, source)
+    assert not cached
+    assert fingerprint(outdir, source) == (first, True)
+
+    write(source / "utils" / "keys.py", "KEY = 'ListId'\n")
+    changed, cached = fingerprint(outdir, source)
+    assert not cached
+    assert changed != first
+
+    # Excluded files change neither the fingerprint nor whether it's cached.
+    excluding, _ = fingerprint(outdir, source, ["*.txt"])
+    write(source / "notes.txt", "Not code")
+    assert fingerprint(outdir, source, ["*.txt"]) == (excluding, True)
+
+
+def test_bytecode_caches_are_left_out_of_fingerprints(tmp_path):
+    source = tmp_path / "code"
+    write(source / "handler.py", "def handler(event, context):\n    pass\n")
+    app = core.App(outdir=str(tmp_path / "cdk.out"), context={"asset_cache": "true"})
+    stack = core.Stack(app, "Assets")
+
+    assets.lambda_code(stack, str(source), CommonConfig())
+    # As the tests leave behind when they import the code.
+    write(source / "__pycache__" / "handler.cpython-39.pyc", "bytecode")
+    assets.lambda_code(stack, str(source), CommonConfig())
+
+    timing = assets.fingerprint_timings[str(source)]
+    assert timing["cached"]
+    assert timing["files"] == 1
@@ -0,0 +1,108 @@
+import boto3
+import json
+import pytest
+
+from application.stateless.tests.api_events import entry, request
+from application.stateless.tests.local_dynamodb import LocalDynamoDB
+from tododb_utils import batch_write
+
+
+def put_requests(count):
+    return [
+        {"PutRequest": {"Item": {"ListId": "default", "Id": f"entry-{index}"}}}
+        for index in range(count)
+    ]
+
+
+@pytest.fixture
+def flaky_dynamodb():
+    return LocalDynamoDB(unprocessed_rate=0.5)
+
+
+@pytest.fixture
+def flaky_table(flaky_dynamodb):
+    flaky_dynamodb.create_table("FlakyTable", "ListId", "Id")
+    return flaky_dynamodb.attach(boto3.resource("dynamodb")).Table("FlakyTable")
+
+
+def test_batch_write_chunks_requests_into_25s(local_dynamodb, entries_table):
+    table = boto3.resource("dynamodb").Table(entries_table.name)
+    local_dynamodb.attach(table)
+
+    assert batch_write(table, put_requests(60)) == []
+    assert len(entries_table.items) == 60
+    assert local_dynamodb.calls["BatchWriteItem"] == 3
+
+
+def test_batch_write_retries_unprocessed_items(flaky_dynamodb, flaky_table):
+    failures = batch_write(
+        flaky_table, put_requests(100), max_attempts=20, base_delay=0
+    )
+
+    assert failures == []
+    assert len(flaky_dynamodb.tables["FlakyTable"].items) == 100
+    assert flaky_dynamodb.calls["BatchWriteItem"] > 4
+
+
+def test_batch_write_reports_items_it_gave_up_on(flaky_dynamodb, flaky_table):
+    failures = batch_write(flaky_table, put_requests(50), max_attempts=1, base_delay=0)
+
+    written = {
+        item["Id"]["S"] for item in flaky_dynamodb.tables["FlakyTable"].items.values()
+    }
+    failed = {f"entry-{failure.index}" for failure in failures}
+
+    assert failures
+    assert all(failure.reason == "UnprocessedItem" for failure in failures)
+    assert written.isdisjoint(failed)
+    assert len(written) + len(failed) == 50
+
+
+def test_batch_create_endpoint_returns_ids_in_input_order(upsert_entry, entries_table):
+    entries = [entry(1000 + index, f"Entry {index}") for index in range(30)]
+    entries[7] = {"Description": "Missing its date"}
+
+    response = request(upsert_entry, "POST", "/batch", entries)
+    body = json.loads(response["body"])
+
+    assert response["statusCode"] == 200
+    assert body["failures"] == [{"index": 7, "reason": "InvalidEntry"}]
+    assert body["ids"][7] is None
+    for index, id in enumerate(body["ids"]):
+        if index != 7:
+            item = entries_table.get({"ListId": {"S": "default"}, "Id": {"S": id}})
+            assert item["Description"]["S"] == f"Entry {index}"
+
+
+def entry_items(entries_table):
+    # Leaves out the list's metadata item and the tombstones of deleted entries.
+    return [item for item in entries_table.items.values() if "CreatedKey" in item]
+
+
+def create_entries(upsert_entry, count):
+    entries = [
+        entry(1000 + index, f"Entry {index}", index % 2 == 0) for index in range(count)
+    ]
+    response = request(upsert_entry, "POST", "/batch", entries)
+    return json.loads(response["body"])["ids"]
+
+
+def test_bulk_delete_removes_every_id(upsert_entry, delete_entry, entries_table):
+    ids = create_entries(upsert_entry, 60)
+
+    response = request(delete_entry, "DELETE", "/batch", ids[:50] + ids[:5])
+
+    assert json.loads(response["body"]) == {"failures": []}
+    assert len(entry_items(entries_table)) == 10
+
+
+def test_clear_completed_only_deletes_completed_entries(
+    upsert_entry, delete_entry, entries_table
+):
+    create_entries(upsert_entry, 101)
+
+    response = request(delete_entry, "DELETE", "/completed")
+
+    assert json.loads(response["body"]) == {"deleted": 51, "failures": []}
+    assert len(entry_items(entries_table)) == 50
+    assert not any(item["Completed"]["BOOL"] for item in entry_items(entries_table))
@@ -0,0 +1,71 @@
+import os
+import sys
+import zipfile
+
+import pytest
+
+import bundling
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / "source"
+    for name, contents in {
+        "handler.py": "def handler(event, context):\n    return 'ok'\n",
+        "utils/keys.py": "KEY = 'Id'\n",
+        "utils/test_keys.py": "def test_key():\n    pass\n",
+        "tests/conftest.py": "",
+        "__pycache__/handler.cpython-39.pyc": "stale",
+        "notes.txt": "Not code",
+    }.items():
+        path = source / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(contents)
+    return str(source)
+
+
+def bundle_files(directory):
+    files = {}
+    for current, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(current, name)
+            relative_path = os.path.relpath(path, directory).replace(os.sep, "/")
+            with open(path, "rb") as file:
+                files[relative_path] = file.read()
+    return files
+
+
+def test_bundles_are_stripped_compiled_and_reproducible(source, tmp_path):
+    outputs = [str(tmp_path / name) for name in ("first", "second")]
+    for output in outputs:
+        bundling.bundle(source, output, sys.executable, "/var/task", ["notes.txt"])
+
+    first, second = (bundle_files(output) for output in outputs)
+    assert first == second
+    tag = sys.implementation.cache_tag
+    assert sorted(first) == [
+        f"__pycache__/handler.{tag}.pyc",
+        "handler.py",
+        f"utils/__pycache__/keys.{tag}.pyc",
+        "utils/keys.py",
+    ]
+
+
+def test_zipped_bundles_are_byte_for_byte_the_same(source, tmp_path):
+    archives = []
+    for name in ("first", "second"):
+        output = tmp_path / name
+        bundling.bundle(
+            source, str(output), sys.executable, "/opt", zip_name="layer.zip"
+        )
+        # Only the archive is left behind, for CDK to upload as it is.
+        assert os.listdir(output) == ["layer.zip"]
+        archives.append((output / "layer.zip").read_bytes())
+
+    assert archives[0] == archives[1]
+    with zipfile.ZipFile(tmp_path / "first" / "layer.zip") as archive:
+        assert {info.date_time for info in archive.infolist()} == {
+            bundling.ZIP_DATE_TIME
+        }
+        assert "tests/conftest.py" not in archive.namelist()
+        assert "notes.txt" in archive.namelist()
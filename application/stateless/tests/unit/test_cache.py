@@ -0,0 +1,80 @@
+import json
+import pytest
+
+from application.stateless.tests.api_events import get, post
+from tododb_utils import ReadCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_serves_values_at_the_version_they_were_read_at(clock):
+    cache = ReadCache(clock=clock)
+    cache.put("key", 1, "value")
+
+    assert cache.get("key", 1) == "value"
+    assert cache.get("key", 2) is None
+    # A stale value is dropped rather than kept around.
+    assert cache.get("key", 1) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_values_expire_after_their_ttl(clock):
+    cache = ReadCache(ttl_seconds=10, clock=clock)
+    cache.put("key", 1, "value")
+
+    clock.now = 10
+    assert cache.get("key", 1) == "value"
+    clock.now = 10.5
+    assert cache.get("key", 1) is None
+
+
+def test_evicts_least_recently_used_values_over_the_size_cap(clock):
+    cache = ReadCache(max_bytes=10, clock=clock)
+    cache.put("a", 1, "aaaa")
+    cache.put("b", 1, "bbbb")
+    cache.get("a", 1)
+    cache.put("c", 1, "cccc")
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "aaaa"
+    assert cache.get("c", 1) == "cccc"
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 8
+
+
+def test_disabled_cache_always_reads_through(clock):
+    cache = ReadCache(enabled=False, clock=clock)
+    loads = []
+
+    for _ in range(2):
+        cache.read_through("key", 1, lambda: loads.append(1) or "value")
+
+    assert len(loads) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_warm_get_entries_skips_the_query_until_the_list_changes(
+    get_entries, upsert_entry, local_dynamodb
+):
+    def entries():
+        return json.loads(get(get_entries)["body"])["entries"]
+
+    post(upsert_entry, description="First")
+    assert len(entries()) == 1
+    assert len(entries()) == 1
+    assert local_dynamodb.calls["Query"] == 1
+
+    post(upsert_entry, description="Second")
+    assert len(entries()) == 2
+    assert local_dynamodb.calls["Query"] == 2
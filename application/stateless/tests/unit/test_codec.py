@@ -0,0 +1,46 @@
+from boto3.dynamodb.types import TypeDeserializer
+from decimal import Decimal
+import pytest
+
+from application.stateless.tests.benchmarks.entries import make_entry
+from tododb_utils import (
+    deserialize_entry,
+    deserialize_item,
+    serialize_item,
+    serialize_value,
+)
+
+
+def test_round_trips_entry_attributes():
+    item = {
+        "ListId": "default",
+        "Id": "entry",
+        "DateCreated": 1_700_000_000_000,
+        "Completed": False,
+        "Data": b"\x00\x01",
+        "Missing": None,
+    }
+
+    assert serialize_item(item)["Completed"] == {"BOOL": False}
+    assert serialize_item(item)["DateCreated"] == {"N": "1700000000000"}
+    assert deserialize_item(serialize_item(item)) == item
+
+
+def test_whole_numbers_become_ints():
+    assert type(deserialize_item({"Count": {"N": "42"}})["Count"]) is int
+    assert deserialize_item({"Ratio": {"N": "0.5"}})["Ratio"] == Decimal("0.5")
+
+
+def test_rejects_types_entries_never_use():
+    with pytest.raises(TypeError):
+        serialize_value(["a", "list"])
+
+
+def test_deserialize_entry_matches_the_resource_path():
+    item = make_entry(7)
+    expected = TypeDeserializer().deserialize({"M": item})
+
+    assert deserialize_entry(item) == {
+        **expected,
+        "DateCreated": int(expected["DateCreated"]),
+    }
@@ -0,0 +1,65 @@
+import base64
+import gzip
+import json
+import pytest
+
+from application.stateless.tests.api_events import entry, get, request
+from tododb_utils import compress_response, get_body, negotiate_encoding
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("gzip, deflate, br", "br"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+        ("*", "br"),
+        ("*, br;q=0", "gzip"),
+    ],
+)
+def test_negotiates_the_best_accepted_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding, ["br", "gzip"]) == expected
+
+
+def test_only_offers_encodings_we_can_produce():
+    assert negotiate_encoding("br", ["gzip"]) is None
+
+
+def test_leaves_small_bodies_uncompressed():
+    response = {"statusCode": 200, "headers": {"ETag": '"1"'}, "body": "[]"}
+    compressed = compress_response(response, "gzip")
+
+    assert compressed["body"] == "[]"
+    assert compressed["headers"] == {"ETag": '"1"', "Vary": "Accept-Encoding"}
+
+
+def test_compresses_large_bodies_for_api_gateway_to_decode():
+    body = json.dumps([{"Description": "x" * 100}] * 100)
+    response = {"statusCode": 200, "headers": {"ETag": '"1"'}, "body": body}
+    compressed = compress_response(response, "gzip")
+
+    assert compressed["isBase64Encoded"]
+    assert compressed["headers"]["Content-Encoding"] == "gzip"
+    assert compressed["headers"]["ETag"] == 'W/"1"'
+    assert gzip.decompress(base64.b64decode(compressed["body"])).decode() == body
+
+
+def test_decodes_base64_encoded_request_bodies():
+    event = {"body": base64.b64encode(b'{"Id": "1"}').decode(), "isBase64Encoded": True}
+
+    assert get_body(event) == '{"Id": "1"}'
+    assert get_body({"body": '{"Id": "1"}', "isBase64Encoded": False}) == '{"Id": "1"}'
+
+
+def test_get_entries_compresses_large_lists(get_entries, upsert_entry):
+    entries = [entry(1000 + index, "A todo") for index in range(50)]
+    request(upsert_entry, "POST", "/batch", entries)
+
+    response = get(get_entries, headers={"Accept-Encoding": "gzip"})
+    page = json.loads(gzip.decompress(base64.b64decode(response["body"])))
+
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert len(page["entries"]) == 50
@@ -0,0 +1,21 @@
+import json
+
+from tododb_utils import JsonArrayWriter, peak_rss_mb
+
+
+def test_writer_output_matches_json_dumps():
+    values = [{"Id": str(index), "Completed": index % 2 == 0} for index in range(10)]
+    writer = JsonArrayWriter()
+    for page in [values[:3], [], values[3:9], values[9:]]:
+        writer.extend(page)
+
+    assert writer.close() == json.dumps(values)
+    assert writer.count == 10
+
+
+def test_empty_writer_writes_an_empty_array():
+    assert JsonArrayWriter().close() == "[]"
+
+
+def test_reports_peak_rss():
+    assert peak_rss_mb() > 1
@@ -0,0 +1,99 @@
+from dataclasses import replace
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+from aws_cdk.aws_dynamodb import Attribute, AttributeType, Table
+from aws_cdk.aws_ec2 import SubnetConfiguration, SubnetType, Vpc
+
+from application.stateless.constructs.entries_crud_lambdas import EntriesCrudLambdas
+from config import FUNCTION_PROFILE_PRESETS, CommonConfig, FunctionProfile
+
+
+def crud_lambdas_template(config):
+    app = core.App()
+    stack = core.Stack(app, "crud")
+    table = Table(
+        stack,
+        "Entries",
+        partition_key=Attribute(name="ListId", type=AttributeType.STRING),
+        sort_key=Attribute(name="Id", type=AttributeType.STRING),
+    )
+    vpc = Vpc(
+        stack,
+        "Vpc",
+        subnet_configuration=[
+            SubnetConfiguration(
+                name="Isolated", subnet_type=SubnetType.PRIVATE_ISOLATED
+            )
+        ],
+    )
+    EntriesCrudLambdas(stack, "Lambdas", table, vpc, config)
+    return assertions.Template.from_stack(stack)
+
+
+def test_functions_use_their_own_profiles():
+    profiles = FUNCTION_PROFILE_PRESETS["pipeline"]
+    template = crud_lambdas_template(CommonConfig(function_profiles=profiles))
+
+    for name, profile in [
+        ("TodoGetEntries", profiles.get_entries),
+        ("TodoUpsertEntry", profiles.upsert_entry),
+        ("TodoDeleteEntry", profiles.delete_entry),
+    ]:
+        template.has_resource_properties(
+            "AWS::Lambda::Function",
+            {
+                "FunctionName": name,
+                "MemorySize": profile.memory_size,
+                "Timeout": profile.timeout.to_seconds(),
+                "Architectures": ["arm64"],
+                "EphemeralStorage": {"Size": 512},
+            },
+        )
+    assert profiles.get_entries.memory_size > profiles.upsert_entry.memory_size
+
+
+def test_reserved_concurrency_and_storage_applied():
+    profiles = FUNCTION_PROFILE_PRESETS["ephemeral"]
+    config = CommonConfig(
+        function_profiles=replace(
+            profiles,
+            get_entries=FunctionProfile(
+                memory_size=2048, reserved_concurrency=20, ephemeral_storage_mb=1024
+            ),
+        )
+    )
+    template = crud_lambdas_template(config)
+
+    template.has_resource_properties(
+        "AWS::Lambda::Function",
+        {
+            "FunctionName": "TodoGetEntries",
+            "MemorySize": 2048,
+            "ReservedConcurrentExecutions": 20,
+            "EphemeralStorage": {"Size": 1024},
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Lambda::Function",
+        {
+            "FunctionName": "TodoUpsertEntry",
+            "MemorySize": profiles.upsert_entry.memory_size,
+            "ReservedConcurrentExecutions": assertions.Match.absent(),
+        },
+    )
+
+
+def test_queue_visibility_follows_flush_timeout():
+    config = CommonConfig(async_writes_enabled=True)
+    template = crud_lambdas_template(config)
+    timeout = config.function_profiles.flush_entry_updates.timeout.to_seconds()
+
+    template.has_resource_properties(
+        "AWS::Lambda::Function",
+        {"FunctionName": "TodoFlushEntryUpdates", "Timeout": timeout},
+    )
+    template.has_resource_properties(
+        "AWS::SQS::Queue",
+        {"QueueName": "TodoEntryUpdatesQueue", "VisibilityTimeout": timeout * 6},
+    )
@@ -0,0 +1,53 @@
+import json
+import pytest
+
+from application.stateless.tests.api_events import get, post
+
+
+def read(get_entries, **params):
+    response = get(get_entries, **params)
+    return response["statusCode"], json.loads(response["body"])
+
+
+@pytest.fixture
+def seeded(upsert_entry):
+    # Created out of order, entries should still be listed by DateCreated.
+    for date_created in [3000, 1000, 5000, 2000, 4000]:
+        post(upsert_entry, date_created, f"Entry created at {date_created}")
+
+
+def test_pages_through_entries_in_creation_order(get_entries, seeded):
+    dates, cursor = [], None
+    while True:
+        params = {"limit": "2", **({"cursor": cursor} if cursor else {})}
+        status, page = read(get_entries, **params)
+        assert status == 200
+        assert len(page["entries"]) <= 2
+
+        dates += [entry["DateCreated"] for entry in page["entries"]]
+        cursor = page["nextCursor"]
+        if cursor is None:
+            break
+
+    assert dates == [1000, 2000, 3000, 4000, 5000]
+
+
+def test_lists_newest_first_when_requested(get_entries, seeded):
+    _, page = read(get_entries, order="desc", limit="3")
+
+    assert [entry["DateCreated"] for entry in page["entries"]] == [5000, 4000, 3000]
+
+
+def test_all_returns_every_entry_without_internal_attributes(get_entries, seeded):
+    status, entries = read(get_entries, all="true")
+
+    assert status == 200
+    assert [entry["DateCreated"] for entry in entries] == [1000, 2000, 3000, 4000, 5000]
+    assert set(entries[0]) == {"Id", "DateCreated", "Description", "Completed"}
+
+
+@pytest.mark.parametrize(
+    "params", [{"limit": "0"}, {"cursor": "not-a-cursor"}, {"order": "sideways"}]
+)
+def test_rejects_invalid_page_requests(get_entries, params):
+    assert get(get_entries, **params)["statusCode"] == 400
@@ -0,0 +1,96 @@
+import json
+import pytest
+
+from application.stateless.tests.api_events import create, get, request
+
+
+def descriptions(router, list_id):
+    response = get(router, list_id=list_id)
+    assert response["statusCode"] == 200
+    return [entry["Description"] for entry in json.loads(response["body"])["entries"]]
+
+
+def test_lists_are_kept_apart(router, entries_table, local_dynamodb):
+    create(router, description="Milk", list_id="groceries")
+    chores = create(router, description="Hoover", completed=True, list_id="chores")
+    create(router, description="Dust", list_id="chores")
+
+    request(router, "DELETE", "/completed", list_id="chores")
+
+    assert descriptions(router, "groceries") == ["Milk"]
+    assert descriptions(router, "chores") == ["Dust"]
+    assert descriptions(router, "empty") == []
+    # Entries live in their list's partition, and reads query only that partition.
+    assert (
+        entries_table.get({"ListId": {"S": "groceries"}, "Id": {"S": chores}}) is None
+    )
+    assert entries_table.get({"ListId": {"S": "chores"}, "Id": {"S": chores}})
+    assert local_dynamodb.calls["Scan"] == 0
+
+
+def test_entries_are_the_default_list(router):
+    create(router, description="Default", list_id="default")
+    create(router, description="Other", list_id="other")
+
+    response = get(router)
+    assert [
+        entry["Description"] for entry in json.loads(response["body"])["entries"]
+    ] == ["Default"]
+
+
+def test_writes_only_move_their_own_list_on(router):
+    create(router, description="Milk", list_id="groceries")
+    versions = {
+        list_id: get(router, list_id=list_id)["headers"]["X-List-Version"]
+        for list_id in ("groceries", "chores")
+    }
+
+    create(router, description="Dust", list_id="chores")
+
+    assert (
+        get(router, list_id="groceries")["headers"]["X-List-Version"]
+        == versions["groceries"]
+    )
+    assert (
+        get(router, list_id="chores")["headers"]["X-List-Version"] != versions["chores"]
+    )
+
+
+@pytest.mark.parametrize("list_id", ["", "#list", "a" * 65, "with space", "ünicode"])
+def test_rejects_invalid_list_ids(router, list_id):
+    for method in ("GET", "POST", "DELETE"):
+        response = request(router, method, body={"Id": "x"}, list_id=list_id)
+        assert response["statusCode"] == 400
+
+
+def test_rejects_cursors_from_other_lists(router):
+    for description in ["One", "Two"]:
+        create(router, description=description, list_id="groceries")
+    cursor = json.loads(get(router, list_id="groceries", limit="1")["body"])[
+        "nextCursor"
+    ]
+
+    response = get(router, list_id="chores", cursor=cursor)
+
+    assert response["statusCode"] == 400
+
+
+@pytest.mark.parametrize(
+    "method, path, body",
+    [
+        ("DELETE", "", {"Id": "#list"}),
+        ("DELETE", "/batch", ["#list"]),
+        ("DELETE", "/batch", ["#snapshot"]),
+        ("PUT", "", {"Id": "#list", "Completed": True}),
+    ],
+)
+def test_rejects_reserved_ids(router, entries_table, method, path, body):
+    create(router, description="Milk", list_id="groceries")
+    meta = entries_table.get({"ListId": {"S": "groceries"}, "Id": {"S": "#list"}})
+
+    response = request(router, method, path, body, list_id="groceries")
+
+    assert response["statusCode"] == 400
+    assert (
+        entries_table.get({"ListId": {"S": "groceries"}, "Id": {"S": "#list"}}) == meta
+    )
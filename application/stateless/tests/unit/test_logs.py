@@ -0,0 +1,44 @@
+import logging
+
+from application.stateless.tests import lambda_env  # noqa: F401
+from tododb_utils import Truncated, log_invocation, log_payload
+
+
+logger = logging.getLogger("test_logs")
+
+
+def test_large_payloads_are_truncated():
+    page = {
+        "Items": [
+            {"Id": {"S": str(i)}, "Description": {"S": "x" * 500}}
+            for i in range(10_000)
+        ]
+    }
+
+    text = str(Truncated(page, 300))
+
+    assert len(text) < 400
+    assert text.startswith("{'Items': [{")
+    assert text.endswith("more characters)")
+    assert str(Truncated({"Id": 1}, 300)) == "{'Id': 1}"
+
+
+def test_payloads_are_only_logged_when_sampled(monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger="test_logs")
+
+    monkeypatch.setenv("LOG_PAYLOAD_SAMPLE_RATE", "0")
+    log_invocation(logger, {"body": "unsampled"}, None)
+    log_payload(logger, "Response page", {"Items": []})
+    logger.error("Failed with event: %s", {"body": "x" * 5000})
+    assert [record.levelno for record in caplog.records] == [logging.ERROR]
+    assert len(caplog.records[0].getMessage()) > 5000
+
+    caplog.clear()
+    monkeypatch.setenv("LOG_PAYLOAD_SAMPLE_RATE", "1")
+    log_invocation(logger, {"body": "sampled"}, None)
+    log_payload(logger, "Response page", {"Items": []})
+    assert [record.getMessage() for record in caplog.records] == [
+        "Event: {'body': 'sampled'}",
+        "Context: None",
+        "Response page: {'Items': []}",
+    ]
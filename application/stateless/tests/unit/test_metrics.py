@@ -0,0 +1,58 @@
+import json
+import pytest
+
+from application.stateless.tests.api_events import get, post
+
+
+@pytest.fixture
+def handlers(get_entries, upsert_entry, monkeypatch):
+    import tododb_utils.metrics
+
+    # Earlier tests have already invoked the handlers, start this one from a cold container.
+    monkeypatch.setattr(tododb_utils.metrics, "_cold", True)
+    return get_entries, upsert_entry
+
+
+def emitted(capsys):
+    return [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if line.startswith('{"_aws"')
+    ]
+
+
+def metric_names(document):
+    return [
+        metric["Name"] for metric in document["_aws"]["CloudWatchMetrics"][0]["Metrics"]
+    ]
+
+
+def test_invocations_emit_emf_metrics(handlers, entries_table, local_dynamodb, capsys):
+    get_entries, upsert_entry = handlers
+    post(upsert_entry, 1000)
+
+    invocation, *operations = emitted(capsys)
+    assert invocation["Handler"] == "upsert_entry"
+    assert invocation["ColdStart"] == "true"
+    assert invocation["ColdStartDuration"] > 0
+    assert "ColdStartDuration" in metric_names(invocation)
+    assert invocation["PageCount"] == 0
+
+    by_operation = {document["Operation"]: document for document in operations}
+    assert by_operation["TransactWriteItems"]["Calls"] == 1
+    assert by_operation["TransactWriteItems"]["ConsumedCapacity"] > 0
+    assert len(by_operation["TransactWriteItems"]["Latency"]) == 1
+
+    local_dynamodb.calls.clear()
+    get(get_entries)
+
+    invocation, *operations = emitted(capsys)
+    assert invocation["Handler"] == "get_entries"
+    assert invocation["ColdStart"] == "false"
+    assert "ColdStartDuration" not in invocation
+    assert "PageCount" in metric_names(invocation)
+    assert invocation["PageCount"] == local_dynamodb.calls["Query"] > 0
+    assert {document["Operation"] for document in operations} == set(
+        local_dynamodb.calls
+    )
+    assert all(document["ConsumedCapacity"] > 0 for document in operations)
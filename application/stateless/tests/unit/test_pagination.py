@@ -0,0 +1,53 @@
+import pytest
+
+from tododb_utils import PaginationError, encode_cursor, decode_cursor, parse_page_size
+
+
+@pytest.fixture(autouse=True)
+def signing_key(monkeypatch):
+    monkeypatch.setenv("CURSOR_SIGNING_KEY", "test-signing-key")
+
+
+def test_cursor_round_trips_last_evaluated_key():
+    last_evaluated_key = {"Id": "6b1c6f9e-3d4a-4a39-9a8e-0f6f3f0f2f4b"}
+
+    cursor = encode_cursor(last_evaluated_key)
+
+    assert decode_cursor(cursor) == last_evaluated_key
+
+
+def test_no_cursor_when_there_are_no_more_pages():
+    assert encode_cursor(None) is None
+    assert encode_cursor({}) is None
+
+
+def test_tampered_cursor_is_rejected():
+    payload, signature = encode_cursor({"Id": "a"}).split(".")
+    forged_payload = encode_cursor({"Id": "b"}).split(".")[0]
+
+    with pytest.raises(PaginationError):
+        decode_cursor(f"{forged_payload}.{signature}")
+
+    with pytest.raises(PaginationError):
+        decode_cursor(payload)
+
+
+def test_cursor_signed_with_another_key_is_rejected(monkeypatch):
+    cursor = encode_cursor({"Id": "a"})
+    monkeypatch.setenv("CURSOR_SIGNING_KEY", "rotated-signing-key")
+
+    with pytest.raises(PaginationError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize(
+    "value, expected", [(None, 100), ("1", 1), ("250", 250), ("1000", 1000)]
+)
+def test_parse_page_size(value, expected):
+    assert parse_page_size(value, default=100, maximum=1000) == expected
+
+
+@pytest.mark.parametrize("value", ["0", "-5", "1001", "ten"])
+def test_parse_page_size_rejects_out_of_range_values(value):
+    with pytest.raises(PaginationError):
+        parse_page_size(value, default=100, maximum=1000)
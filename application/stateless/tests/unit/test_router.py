@@ -0,0 +1,21 @@
+import json
+
+from application.stateless.tests.api_events import create, get, request
+
+
+def test_routes_every_method_to_its_handler(router):
+    id = create(router, description="Routed")
+    request(router, "PUT", body={"Id": id, "Completed": True})
+
+    response = get(router)
+    assert [
+        (entry["Id"], entry["Completed"])
+        for entry in json.loads(response["body"])["entries"]
+    ] == [(id, True)]
+
+    request(router, "DELETE", body={"Id": id})
+    assert json.loads(get(router)["body"])["entries"] == []
+
+
+def test_unknown_routes_are_not_found(router):
+    assert request(router, "PATCH")["statusCode"] == 404
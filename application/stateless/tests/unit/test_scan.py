@@ -0,0 +1,43 @@
+import boto3
+import pytest
+
+from application.stateless.tests.benchmarks.entries import seed_entries
+from application.stateless.tests.local_dynamodb import LocalDynamoDB
+from tododb_utils import parallel_scan
+
+
+@pytest.fixture
+def local_dynamodb():
+    local_dynamodb = LocalDynamoDB()
+    seed_entries(local_dynamodb.create_table("EntriesTable", "Id"), 12_000)
+    return local_dynamodb
+
+
+@pytest.fixture
+def table(local_dynamodb):
+    return local_dynamodb.attach(boto3.resource("dynamodb")).Table("EntriesTable")
+
+
+@pytest.mark.parametrize("total_segments", [1, 3, 8])
+def test_parallel_scan_reads_every_item_once(local_dynamodb, table, total_segments):
+    entries = parallel_scan(table, total_segments=total_segments)
+
+    ids = [entry["Id"] for entry in entries]
+    assert len(ids) == 12_000
+    assert len(set(ids)) == 12_000
+    assert local_dynamodb.calls["Scan"] >= total_segments
+
+
+def test_parallel_scan_returns_python_types(table):
+    entry = parallel_scan(table, total_segments=2)[0]
+
+    assert isinstance(entry["Completed"], bool)
+    assert int(entry["DateCreated"]) >= 1_700_000_000_000
+
+
+def test_segment_count_defaults_to_environment(monkeypatch, local_dynamodb, table):
+    monkeypatch.setenv("SCAN_SEGMENTS", "4")
+
+    parallel_scan(table)
+
+    assert local_dynamodb.calls["Scan"] >= 4
@@ -0,0 +1,192 @@
+import json
+import pytest
+import random
+import time
+
+from application.stateless.tests.api_events import create, get, post, request
+from tododb_utils import (
+    ShardConfig,
+    entry_partition,
+    set_shard_count,
+    shard_entry_id,
+    shard_of_entry,
+)
+
+
+@pytest.fixture
+def router(router, monkeypatch):
+    # New entries go to a shard chosen at random, the same ones every run.
+    random.seed(0)
+    # Without the settle window, a sync point excludes everything written before it.
+    monkeypatch.setattr(router.get_entries, "SYNC_SETTLE_MS", 0)
+    return router
+
+
+def dates(entries):
+    return [entry["DateCreated"] for entry in entries]
+
+
+def partitions(entries_table):
+    return {partition for _, partition, id in entries_table.items if id != "#list"}
+
+
+def test_entry_ids_name_their_shard():
+    assert shard_of_entry(shard_entry_id(3, "abc")) == 3
+    assert shard_entry_id(0, "abc") == "abc"
+    assert entry_partition("shared", shard_entry_id(3, "abc")) == "shared#3"
+    assert entry_partition("shared", "abc") == "shared"
+    # Ids that merely look sharded stay in the list's own partition.
+    assert entry_partition("shared", "s99.abc") == "shared"
+
+
+def test_lowering_the_count_keeps_every_shard_read(table):
+    assert set_shard_count(table, "default", 4).read_shards == 4
+    config = set_shard_count(table, "default", 2)
+
+    assert (config.write_shards, config.read_shards) == (2, 4)
+    assert ShardConfig(write_shards=3).read_shards == 3
+    with pytest.raises(ValueError):
+        set_shard_count(table, "default", 0)
+
+
+def test_reads_merge_shards_in_created_order(router, table, entries_table):
+    set_shard_count(table, "default", 4)
+    for date_created in [5000, 1000, 4000, 2000, 8000, 3000, 7000, 6000]:
+        create(router, date_created)
+
+    everything = json.loads(get(router, all="true")["body"])
+    newest_first = json.loads(get(router, order="desc")["body"])
+
+    assert len(partitions(entries_table)) > 1
+    assert dates(everything) == list(range(1000, 9000, 1000))
+    assert dates(newest_first["entries"]) == list(range(8000, 0, -1000))
+
+
+def test_pages_follow_every_shard(router, table):
+    set_shard_count(table, "default", 4)
+    for date_created in range(1000, 11000, 1000):
+        create(router, date_created)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": "3", **({"cursor": cursor} if cursor else {})}
+        body = json.loads(get(router, **params)["body"])
+        seen.extend(body["entries"])
+        cursor = body["nextCursor"]
+        if not cursor:
+            break
+
+    assert dates(seen) == list(range(1000, 11000, 1000))
+
+
+def test_cursors_from_before_sharding_carry_on(router, table):
+    for date_created in [1000, 2000, 3000]:
+        create(router, date_created)
+    cursor = json.loads(get(router, limit="2")["body"])["nextCursor"]
+
+    set_shard_count(table, "default", 4)
+    router.upsert_entry.shard_configs.clear()
+    for date_created in [4000, 5000, 6000]:
+        create(router, date_created)
+    body = json.loads(get(router, cursor=cursor)["body"])
+
+    assert dates(body["entries"]) == [3000, 4000, 5000, 6000]
+
+
+def test_updates_and_deletes_find_their_shard(router, table, entries_table):
+    set_shard_count(table, "default", 4)
+    ids = [create(router, date_created) for date_created in range(1000, 9000, 1000)]
+    sharded = [id for id in ids if shard_of_entry(id)]
+    assert sharded
+
+    request(router, "PUT", body={"Id": sharded[0], "Completed": True})
+    request(router, "DELETE", body={"Id": sharded[-1]})
+    entries = json.loads(get(router, all="true")["body"])
+
+    assert sharded[-1] not in [entry["Id"] for entry in entries]
+    assert [entry["Id"] for entry in entries if entry["Completed"]] == [sharded[0]]
+    assert entries_table.get(
+        {
+            "ListId": {"S": entry_partition("default", sharded[0])},
+            "Id": {"S": sharded[0]},
+        }
+    )["Completed"] == {"BOOL": True}
+
+
+def test_clearing_completed_covers_every_shard(router, table):
+    set_shard_count(table, "default", 4)
+    for date_created in range(1000, 9000, 1000):
+        create(router, date_created, completed=date_created % 2000 == 0)
+
+    request(router, "DELETE", "/completed")
+
+    entries = json.loads(get(router, all="true")["body"])
+    assert dates(entries) == [1000, 3000, 5000, 7000]
+
+
+def test_every_write_moves_the_list_version_on(router, table):
+    set_shard_count(table, "default", 4)
+    versions = [int(get(router)["headers"]["X-List-Version"])]
+    for date_created in range(1000, 6000, 1000):
+        # Writes don't report the version, it's read from every shard on the next read.
+        assert "X-List-Version" not in post(router, date_created)["headers"]
+        versions.append(int(get(router)["headers"]["X-List-Version"]))
+
+    assert versions == sorted(set(versions))
+
+
+def test_writes_read_nothing_from_the_first_shard(router, table, local_dynamodb):
+    set_shard_count(table, "default", 4)
+    entry_id = create(router, 1000)
+    # Each handler caches the shard config from its first write.
+    request(router, "DELETE", body={"Id": create(router, 500)})
+    local_dynamodb.calls.clear()
+
+    create(router, 2000)
+    request(router, "PUT", body={"Id": entry_id, "Completed": True})
+    request(router, "DELETE", body={"Id": entry_id})
+
+    # Each write is its transaction alone.
+    assert dict(local_dynamodb.calls) == {"TransactWriteItems": 3}
+
+
+def test_changes_are_synced_from_every_shard(router, table):
+    set_shard_count(table, "default", 4)
+    updated = create(router, 1000)
+    since = get(router)["headers"]["X-Sync-Since"]
+    # Stamps are in milliseconds, make sure later writes don't share one with the sync point.
+    time.sleep(0.002)
+
+    request(router, "PUT", body={"Id": updated, "Completed": True})
+    created = [create(router, date_created) for date_created in [2000, 3000, 4000]]
+    body = json.loads(get(router, since=since)["body"])
+
+    assert sorted(entry["Id"] for entry in body["entries"]) == sorted(
+        [updated, *created]
+    )
+
+
+def test_ids_naming_a_shard_the_list_lacks_are_rejected(router, table, entries_table):
+    set_shard_count(table, "default", 4)
+    create(router, 1000)
+    written = set(entries_table.items)
+    crafted = shard_entry_id(7, "abc")
+
+    updated = request(router, "PUT", body={"Id": crafted, "Completed": True})
+    deleted = request(router, "DELETE", body={"Id": crafted})
+    batch = request(router, "DELETE", "/batch", [shard_entry_id(3, "abc"), crafted])
+
+    assert (updated["statusCode"], deleted["statusCode"]) == (404, 404)
+    assert batch["statusCode"] == 400
+    assert set(entries_table.items) == written
+
+
+def test_ids_in_newly_added_shards_are_accepted(router, table):
+    set_shard_count(table, "default", 2)
+    request(router, "DELETE", body={"Id": create(router, 1000)})
+    # Writers only know of the first two shards until their cached config expires.
+    set_shard_count(table, "default", 4)
+
+    response = request(router, "DELETE", body={"Id": shard_entry_id(3, "abc")})
+
+    assert response["statusCode"] == 200
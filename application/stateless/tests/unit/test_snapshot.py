@@ -0,0 +1,178 @@
+import copy
+import json
+import pytest
+
+from application.stateless.tests.api_events import create, get, request
+from application.stateless.tests.lambda_env import import_handler
+import tododb_utils.snapshot
+
+
+@pytest.fixture
+def handlers(get_entries, upsert_entry, delete_entry, monkeypatch):
+    monkeypatch.setattr(get_entries, "snapshots_enabled", True)
+    return (
+        get_entries,
+        upsert_entry,
+        delete_entry,
+        import_handler("update_list_snapshot"),
+    )
+
+
+def consume(update_list_snapshot, entries_table, batch_size=100):
+    # Runs the consumer until its own writes stop producing records, returning every batch seen.
+    batches = []
+    while entries_table.stream:
+        for event in entries_table.drain_stream(batch_size):
+            batches.append(copy.deepcopy(event))
+            update_list_snapshot.handler(event, None)
+    return batches
+
+
+def read(get_entries, **params):
+    get_entries.read_cache.clear()
+    return json.loads(get(get_entries, **params)["body"])
+
+
+def snapshot(entries_table):
+    return entries_table.get({"ListId": {"S": "default"}, "Id": {"S": "#snapshot"}})
+
+
+def test_serves_the_snapshot_without_querying(handlers, entries_table, local_dynamodb):
+    get_entries, upsert_entry, delete_entry, update_list_snapshot = handlers
+    ids = [create(upsert_entry, date_created) for date_created in [3000, 1000, 2000]]
+    request(delete_entry, "DELETE", body={"Id": ids[0]})
+    consume(update_list_snapshot, entries_table)
+
+    local_dynamodb.calls.clear()
+    entries = read(get_entries, all="true")
+
+    assert [entry["DateCreated"] for entry in entries] == [1000, 2000]
+    assert local_dynamodb.calls == {"GetItem": 2}
+
+
+def test_snapshot_pages_match_queried_pages(handlers, entries_table):
+    get_entries, upsert_entry, _, update_list_snapshot = handlers
+    for date_created in [5000, 1000, 4000, 2000, 3000]:
+        create(upsert_entry, date_created)
+
+    def pages(**params):
+        result, cursor = [], None
+        while True:
+            page = read(
+                get_entries,
+                limit="2",
+                **params,
+                **({"cursor": cursor} if cursor else {})
+            )
+            result.append(page["entries"])
+            cursor = page["nextCursor"]
+            if cursor is None:
+                return result
+
+    queried = [pages(), pages(order="desc")]
+    consume(update_list_snapshot, entries_table)
+    from_snapshot = [pages(), pages(order="desc")]
+
+    assert snapshot(entries_table) is not None
+    assert [sum(direction, []) for direction in from_snapshot] == [
+        sum(direction, []) for direction in queried
+    ]
+
+
+def test_version_is_only_confirmed_by_a_later_record(handlers, entries_table):
+    get_entries, upsert_entry, _, update_list_snapshot = handlers
+    create(upsert_entry, 1000)
+    consume(update_list_snapshot, entries_table)
+
+    # The version bump arrives in a batch before the write it belongs to.
+    create(upsert_entry, 2000)
+    entry, meta = entries_table.stream
+    update_list_snapshot.handler({"Records": [meta]}, None)
+
+    assert snapshot(entries_table)["ListVersion"] == {"N": "1"}
+
+    update_list_snapshot.handler({"Records": [entry]}, None)
+    consume(update_list_snapshot, entries_table)
+
+    assert snapshot(entries_table)["ListVersion"] == {"N": "2"}
+    assert [entry["DateCreated"] for entry in read(get_entries, all="true")] == [
+        1000,
+        2000,
+    ]
+
+
+def test_redelivered_records_are_ignored(handlers, entries_table):
+    get_entries, upsert_entry, delete_entry, update_list_snapshot = handlers
+    id = create(upsert_entry, 1000)
+    request(delete_entry, "DELETE", body={"Id": id})
+    batches = consume(update_list_snapshot, entries_table)
+
+    # Replaying the batches, as Lambda would after a failure, mustn't bring the entry back.
+    for event in batches:
+        update_list_snapshot.handler(copy.deepcopy(event), None)
+    consume(update_list_snapshot, entries_table)
+
+    assert read(get_entries, all="true") == []
+
+
+def test_rebuilds_when_records_were_missed(handlers, entries_table):
+    get_entries, upsert_entry, _, update_list_snapshot = handlers
+    create(upsert_entry, 1000)
+    consume(update_list_snapshot, entries_table)
+
+    create(upsert_entry, 2000)
+    entries_table.stream.clear()
+    create(upsert_entry, 3000)
+    consume(update_list_snapshot, entries_table)
+
+    assert snapshot(entries_table)["ListVersion"] == {"N": "3"}
+    assert [entry["DateCreated"] for entry in read(get_entries, all="true")] == [
+        1000,
+        2000,
+        3000,
+    ]
+
+
+def test_falls_back_to_a_query_when_the_snapshot_is_stale(
+    handlers, entries_table, local_dynamodb
+):
+    get_entries, upsert_entry, _, update_list_snapshot = handlers
+    create(upsert_entry, 1000)
+    consume(update_list_snapshot, entries_table)
+    create(upsert_entry, 2000)
+
+    local_dynamodb.calls.clear()
+    entries = read(get_entries, all="true")
+
+    assert [entry["DateCreated"] for entry in entries] == [1000, 2000]
+    assert local_dynamodb.calls["Query"] == 1
+
+
+def test_oversized_lists_are_not_rebuilt_on_every_write(
+    handlers, entries_table, local_dynamodb, monkeypatch
+):
+    get_entries, upsert_entry, _, update_list_snapshot = handlers
+    monkeypatch.setattr(tododb_utils.snapshot, "MAX_SNAPSHOT_BYTES", 1)
+    for date_created in [1000, 2000]:
+        create(upsert_entry, date_created)
+    consume(update_list_snapshot, entries_table)
+    assert snapshot(entries_table)["Oversized"] == {"BOOL": True}
+
+    create(upsert_entry, 3000)
+    local_dynamodb.calls.clear()
+    consume(update_list_snapshot, entries_table)
+
+    assert local_dynamodb.calls == {"GetItem": 1}
+    assert [entry["DateCreated"] for entry in read(get_entries, all="true")] == [
+        1000,
+        2000,
+        3000,
+    ]
+
+    # Once the marker is old enough, the list is tried again in case it's since shrunk.
+    monkeypatch.setattr(tododb_utils.snapshot, "OVERSIZED_RECHECK_SECONDS", 0)
+    create(upsert_entry, 4000)
+    local_dynamodb.calls.clear()
+    consume(update_list_snapshot, entries_table)
+
+    assert local_dynamodb.calls["Query"] == 1
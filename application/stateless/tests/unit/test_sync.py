@@ -0,0 +1,81 @@
+import json
+import pytest
+import time
+
+from application.stateless.tests.api_events import create, get, request
+
+
+@pytest.fixture
+def handlers(get_entries, upsert_entry, delete_entry, monkeypatch):
+    # Without the settle window, a sync point excludes everything written before it.
+    monkeypatch.setattr(get_entries, "SYNC_SETTLE_MS", 0)
+    return get_entries, upsert_entry, delete_entry
+
+
+def sync_point(get_entries):
+    since = get(get_entries)["headers"]["X-Sync-Since"]
+    # Stamps are in milliseconds, make sure later writes don't share one with the sync point.
+    time.sleep(0.002)
+    return since
+
+
+def test_since_returns_only_what_changed(handlers, entries_table):
+    get_entries, upsert_entry, delete_entry = handlers
+    updated, deleted, _ = [create(upsert_entry, date) for date in [1000, 2000, 3000]]
+    since = sync_point(get_entries)
+
+    request(upsert_entry, "PUT", body={"Id": updated, "Completed": True})
+    request(delete_entry, "DELETE", body={"Id": deleted})
+    created = create(upsert_entry, 4000)
+
+    response = get(get_entries, since=since)
+    body = json.loads(response["body"])
+
+    assert response["statusCode"] == 200
+    assert "ETag" not in response["headers"]
+    assert [(entry["Id"], entry["Completed"]) for entry in body["entries"]] == [
+        (updated, True),
+        (created, False),
+    ]
+    assert body["removed"] == [deleted]
+    assert body["nextSince"] == int(response["headers"]["X-Sync-Since"])
+
+
+def test_deleted_entries_leave_expiring_tombstones(handlers, entries_table):
+    get_entries, upsert_entry, delete_entry = handlers
+    id = create(upsert_entry, 1000)
+    request(delete_entry, "DELETE", body={"Id": id})
+
+    item = entries_table.get({"ListId": {"S": "default"}, "Id": {"S": id}})
+    assert item["Deleted"] == {"BOOL": True}
+    assert int(item["ExpiresAt"]["N"]) > time.time() + 6 * 24 * 60 * 60
+    assert json.loads(get(get_entries, all="true")["body"]) == []
+
+
+def test_updates_to_missing_or_deleted_entries_are_not_found(handlers, entries_table):
+    get_entries, upsert_entry, delete_entry = handlers
+    deleted = create(upsert_entry, 1000)
+    request(delete_entry, "DELETE", body={"Id": deleted})
+    since = sync_point(get_entries)
+
+    for id in [deleted, "missing"]:
+        response = request(upsert_entry, "PUT", body={"Id": id, "Completed": True})
+        assert response["statusCode"] == 404
+
+    # Neither update left a partial entry behind for syncing clients to trip over.
+    assert (
+        entries_table.get({"ListId": {"S": "default"}, "Id": {"S": "missing"}}) is None
+    )
+    response = get(get_entries, since=since)
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["entries"] == []
+
+
+@pytest.mark.parametrize(
+    "since, status",
+    [("yesterday", 400), ("-1", 400), ("0", 410)],
+)
+def test_rejects_unusable_sync_points(handlers, since, status):
+    get_entries, _, _ = handlers
+
+    assert get(get_entries, since=since)["statusCode"] == status
@@ -0,0 +1,26 @@
+import aws_cdk as core
+import pytest
+
+from synth import STACK_NAMES, selected_stacks
+
+
+def test_every_stack_is_built_by_default():
+    assert selected_stacks(core.App()) == set(STACK_NAMES)
+
+
+@pytest.mark.parametrize(
+    "requested, built",
+    [
+        ("Stateful", {"Stateful"}),
+        ("Stateless", {"Networking", "Stateful", "Stateless"}),
+        ("Web", {"Networking", "Stateful", "Stateless", "Web"}),
+        (" Pipeline , Stateful ", {"Pipeline", "Stateful"}),
+    ],
+)
+def test_stacks_are_built_with_those_they_depend_on(requested, built):
+    assert selected_stacks(core.App(context={"stacks": requested})) == built
+
+
+def test_rejects_unknown_stacks():
+    with pytest.raises(ValueError, match="Unknown stacks Database"):
+        selected_stacks(core.App(context={"stacks": "Stateful,Database"}))
@@ -0,0 +1,29 @@
+import logging
+import pytest
+from botocore.exceptions import ClientError
+
+from tododb_utils import get_table
+
+
+logger = logging.getLogger(__name__)
+
+
+def test_lazy_table_skips_describe_table(local_dynamodb, entries_table):
+    table = get_table(logger)
+    assert local_dynamodb.calls["DescribeTable"] == 0
+
+    table.put_item(Item={"ListId": "default", "Id": "entry"})
+    assert table.name == entries_table.name
+    assert local_dynamodb.calls["DescribeTable"] == 0
+    assert len(entries_table.items) == 1
+
+
+def test_describe_mode_checks_the_table_exists(
+    local_dynamodb, entries_table, monkeypatch
+):
+    get_table(logger, describe=True)
+    assert local_dynamodb.calls["DescribeTable"] == 1
+
+    monkeypatch.setenv("TABLE_NAME", "MissingTable")
+    with pytest.raises(ClientError):
+        get_table(logger, describe=True)
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import json
+import pytest
+
+from application.stateless.tests.api_events import get, post
+from tododb_utils import (
+    etag_matches,
+    get_list_version,
+    versioned_write,
+)
+
+
+def test_versioned_write_bumps_the_list_version(table):
+    for expected in [1, 2]:
+        version = versioned_write(
+            table,
+            "default",
+            {"Put": {"Item": {"ListId": "default", "Id": "entry"}}},
+        )
+        assert version == expected
+
+    assert get_list_version(table, "default") == 2
+    assert get_list_version(table, "another-list") == 0
+
+
+def test_concurrent_writers_never_conflict(table, local_dynamodb):
+    def write(index):
+        return versioned_write(
+            table,
+            "default",
+            {"Put": {"Item": {"ListId": "default", "Id": f"entry-{index}"}}},
+        )
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        versions = list(pool.map(write, range(64)))
+
+    assert get_list_version(table, "default") == 64
+    assert local_dynamodb.calls["TransactWriteItems"] == 64
+    assert max(versions) == 64
+
+
+def test_unchanged_list_is_not_modified(get_entries, upsert_entry, local_dynamodb):
+    post(upsert_entry, description="First")
+
+    first = get(get_entries)
+    assert first["statusCode"] == 200
+    assert first["headers"]["ETag"] == '"1"'
+
+    local_dynamodb.calls.clear()
+    cached = get(get_entries, headers={"if-none-match": first["headers"]["ETag"]})
+    assert cached["statusCode"] == 304
+    assert "body" not in cached
+    assert local_dynamodb.calls["Query"] == 0
+
+
+def test_writes_invalidate_the_etag(get_entries, upsert_entry):
+    post(upsert_entry, description="First")
+    etag = get(get_entries)["headers"]["ETag"]
+
+    written = post(upsert_entry, description="Second")
+    assert written["headers"]["X-List-Version"] == "2"
+
+    response = get(get_entries, headers={"if-none-match": etag})
+    assert response["statusCode"] == 200
+    assert response["headers"]["ETag"] == '"2"'
+    assert len(json.loads(response["body"])["entries"]) == 2
+
+
+@pytest.mark.parametrize(
+    "header, matches",
+    [
+        ('"3"', True),
+        ('W/"3"', True),
+        ('"1", "3"', True),
+        ("*", True),
+        ('"4"', False),
+        (None, False),
+    ],
+)
+def test_etag_matching(header, matches):
+    assert etag_matches(header, '"3"') == matches
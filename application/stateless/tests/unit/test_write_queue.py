@@ -0,0 +1,146 @@
+import pytest
+
+from application.stateless.tests.api_events import create, request
+from application.stateless.tests.lambda_env import import_handler
+from application.stateless.tests.local_sqs import LocalQueue
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    queue = LocalQueue()
+    monkeypatch.setenv("WRITE_QUEUE_URL", queue.queue_url)
+    return queue
+
+
+@pytest.fixture
+def upsert_entry(upsert_entry, queue):
+    queue.attach(upsert_entry.get_sqs())
+    return upsert_entry
+
+
+@pytest.fixture
+def flush_entry_updates(entries_table):
+    return import_handler("flush_entry_updates")
+
+
+def completed(entries_table, id):
+    item = entries_table.get({"ListId": {"S": "default"}, "Id": {"S": id}})
+    return item["Completed"]["BOOL"]
+
+
+def test_updates_are_queued_and_accepted(upsert_entry, queue, entries_table):
+    # Creates are always written synchronously, the queue only takes updates.
+    id = create(upsert_entry)
+    response = request(
+        upsert_entry, "PUT", body={"Id": id, "Completed": True}, requested_at=1
+    )
+
+    assert response["statusCode"] == 202
+    assert queue.sent == 1
+    assert completed(entries_table, id) is False
+
+
+def test_flush_keeps_only_the_latest_update(
+    upsert_entry, flush_entry_updates, queue, entries_table, local_dynamodb
+):
+    id = create(upsert_entry)
+    for requested_at in range(1, 10):
+        request(
+            upsert_entry,
+            "PUT",
+            body={"Id": id, "Completed": requested_at % 2 == 0},
+            requested_at=requested_at,
+        )
+
+    local_dynamodb.calls.clear()
+    (event,) = queue.drain(batch_size=100)
+    response = flush_entry_updates.handler(event, None)
+
+    assert response == {"batchItemFailures": []}
+    assert local_dynamodb.calls["UpdateItem"] == 2  # One write, one version bump.
+    assert completed(entries_table, id) is False
+
+
+def test_updates_older_than_the_last_write_are_dropped(
+    upsert_entry, flush_entry_updates, queue, entries_table
+):
+    id = create(upsert_entry)
+    request(upsert_entry, "PUT", body={"Id": id, "Completed": True}, requested_at=20)
+    flush_entry_updates.handler(next(queue.drain()), None)
+
+    # Delivered late, in a later batch.
+    request(upsert_entry, "PUT", body={"Id": id, "Completed": False}, requested_at=10)
+    response = flush_entry_updates.handler(next(queue.drain()), None)
+
+    assert response == {"batchItemFailures": []}
+    assert completed(entries_table, id) is True
+
+
+def test_redelivered_updates_still_move_the_version_on(
+    upsert_entry, flush_entry_updates, queue, entries_table, monkeypatch
+):
+    id = create(upsert_entry)
+    request(upsert_entry, "PUT", body={"Id": id, "Completed": True}, requested_at=20)
+    (event,) = queue.drain()
+
+    # The update lands, but the batch fails before the version is bumped and is redelivered.
+    def fail(table, list_id):
+        raise RuntimeError("Version bump failed")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(flush_entry_updates, "bump_list_version", fail)
+        with pytest.raises(RuntimeError):
+            flush_entry_updates.handler(event, None)
+    response = flush_entry_updates.handler(event, None)
+
+    assert response == {"batchItemFailures": []}
+    assert completed(entries_table, id) is True
+    # Once for the create, once for the redelivered update.
+    assert entries_table.get({"ListId": {"S": "default"}, "Id": {"S": "#list"}})[
+        "Version"
+    ] == {"N": "2"}
+
+
+def test_updates_to_deleted_entries_are_dropped(
+    upsert_entry, flush_entry_updates, queue, entries_table
+):
+    request(
+        upsert_entry, "PUT", body={"Id": "deleted", "Completed": True}, requested_at=1
+    )
+    flush_entry_updates.handler(next(queue.drain()), None)
+
+    assert (
+        entries_table.get({"ListId": {"S": "default"}, "Id": {"S": "deleted"}}) is None
+    )
+
+
+def test_rejects_malformed_updates(upsert_entry, queue):
+    response = request(upsert_entry, "PUT", body={"Id": "entry"}, requested_at=1)
+
+    assert response["statusCode"] == 400
+    assert queue.sent == 0
+
+
+def test_flush_writes_each_update_to_its_own_list(
+    upsert_entry, flush_entry_updates, queue, entries_table, local_dynamodb
+):
+    ids = {}
+    for list_id in ("groceries", "chores"):
+        ids[list_id] = create(upsert_entry, list_id=list_id)
+        request(
+            upsert_entry,
+            "PUT",
+            body={"Id": ids[list_id], "Completed": True},
+            list_id=list_id,
+            requested_at=1,
+        )
+
+    local_dynamodb.calls.clear()
+    (event,) = queue.drain(batch_size=100)
+    assert flush_entry_updates.handler(event, None) == {"batchItemFailures": []}
+
+    # One write to each list, and one version bump for each.
+    assert local_dynamodb.calls["UpdateItem"] == 4
+    for list_id, id in ids.items():
+        item = entries_table.get({"ListId": {"S": list_id}, "Id": {"S": id}})
+        assert item["Completed"]["BOOL"] is True
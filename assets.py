@@ -0,0 +1,223 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shlex
+import time
+import jsii
+from aws_cdk import AssetHashType, BundlingOptions, ILocalBundling
+from aws_cdk.aws_lambda import Code, Runtime
+from constructs import Construct
+
+import bundling
+from config import CommonConfig
+
+
+CACHE_FILE_NAME = ".asset-fingerprints.json"
+
+# The fingerprint of every directory used this synth, with how long it took and whether it was
+# cached, for the synth timing report.
+fingerprint_timings: dict[str, dict] = {}
+
+# Python writes bytecode caches beside modules whenever they're imported, e.g. by the tests, so
+# they're never part of an asset, or its fingerprint.
+CACHE_PATTERNS = ["**/__pycache__", "**/*.pyc"]
+
+# Our functions' runtime, which bundles have to be compiled for.
+RUNTIME = Runtime.PYTHON_3_9
+RUNTIME_VERSION = "3.9"
+
+
+def asset_cache_enabled(scope: Construct) -> bool:
+    return str(scope.node.try_get_context("asset_cache")).lower() == "true"
+
+
+@jsii.implements(ILocalBundling)
+class PrecompiledBundling:
+    """Bundles a directory with `bundling.bundle`, when the runtime's Python is installed here.
+
+    Otherwise CDK falls back to running the same steps in the runtime's build image, though
+    without zipping.
+    """
+
+    def __init__(
+        self, source: str, install_dir: str, exclude: list[str], zip_name: str | None
+    ):
+        self.source = source
+        self.install_dir = install_dir
+        self.exclude = exclude
+        self.zip_name = zip_name
+
+    def try_bundle(self, output_dir: str, options: BundlingOptions) -> bool:
+        python = bundling.find_python(RUNTIME_VERSION)
+        if python is None:
+            return False
+        bundling.bundle(
+            self.source,
+            output_dir,
+            python,
+            self.install_dir,
+            exclude=self.exclude,
+            zip_name=self.zip_name,
+        )
+        return True
+
+
+def docker_bundling_command(install_dir: str, exclude: list[str]) -> list[str]:
+    stripped = " -o ".join(
+        f"-name {shlex.quote(pattern)}" for pattern in bundling.STRIPPED_PATTERNS
+    )
+    excluded = " ".join(
+        shlex.quote(f"/asset-output/{pattern}")
+        for pattern in exclude
+        if not pattern.startswith("**/")
+    )
+    return [
+        "bash",
+        "-c",
+        " && ".join(
+            [
+                "cp -r /asset-input/. /asset-output",
+                f"rm -rf {excluded}" if excluded else "true",
+                f"find /asset-output \\( {stripped} \\) -prune -exec rm -rf {{}} +",
+                "python -m compileall -q --invalidation-mode unchecked-hash "
+                f"-s /asset-output -p {install_dir} /asset-output",
+            ]
+        ),
+    ]
+
+
+def lambda_code(
+    scope: Construct,
+    path: str,
+    config: CommonConfig,
+    exclude: list[str] | None = None,
+    layer: bool = False,
+) -> Code:
+    """Returns the code of a Lambda function or layer from a local directory.
+
+    With `bundle_lambda_assets` configured, the code is bundled without tests and caches, and
+    with its bytecode compiled for the runtime, so the runtime doesn't have to compile it on
+    every cold start. Layers are zipped too with `zip_layer`. The asset's hash is then that of
+    the bundle, which comes out the same for the same code.
+
+    With the `asset_cache` context set to "true", the directory's fingerprint is reused from
+    the last synth when none of its files have changed size or modification time, which saves
+    CDK reading and hashing every file again. An asset already staged under that fingerprint
+    isn't copied, or bundled, again either.
+
+    Args:
+        scope (Construct): Any construct in the app, used to read its context and output directory.
+        path (str): The directory holding the code, relative to the project root.
+        config (CommonConfig): A user-defined configuration data class.
+        exclude (list[str] | None): Glob patterns of files to leave out of the asset, along with
+        `CACHE_PATTERNS`.
+        layer (bool): Whether the code is for a layer, which is installed in /opt rather than
+        /var/task.
+    """
+    exclude = [*(exclude or []), *CACHE_PATTERNS]
+    options = {}
+    if config.bundle_lambda_assets:
+        install_dir = "/opt" if layer else "/var/task"
+        zip_name = "layer.zip" if layer and config.zip_layer else None
+        options["bundling"] = BundlingOptions(
+            image=RUNTIME.bundling_image,
+            command=docker_bundling_command(install_dir, exclude),
+            local=PrecompiledBundling(path, install_dir, exclude, zip_name),
+        )
+        options["asset_hash_type"] = AssetHashType.OUTPUT
+
+    if asset_cache_enabled(scope):
+        options["asset_hash_type"] = AssetHashType.CUSTOM
+        options["asset_hash"] = fingerprint(
+            scope.node.root.outdir,
+            path,
+            # Files that are stripped from bundles can change without changing them.
+            exclude
+            + (
+                [f"**/{pattern}" for pattern in bundling.STRIPPED_PATTERNS]
+                if config.bundle_lambda_assets
+                else []
+            ),
+            # The same code bundled differently needs a different hash.
+            salt=json.dumps(
+                [config.bundle_lambda_assets, layer, config.zip_layer, RUNTIME_VERSION]
+            ),
+        )
+
+    return Code.from_asset(path, exclude=exclude, **options)
+
+
+def is_excluded(relative_path: str, exclude: list[str]) -> bool:
+    # CDK matches patterns against every directory on the way down, so a match on any of a file's
+    # parents leaves it out too.
+    parts = relative_path.split("/")
+    for depth in range(1, len(parts) + 1):
+        candidate = "/".join(parts[:depth])
+        for pattern in exclude:
+            if fnmatch.fnmatch(candidate, pattern) or fnmatch.fnmatch(
+                candidate, pattern.removeprefix("**/")
+            ):
+                return True
+    return False
+
+
+def asset_files(path: str, exclude: list[str]) -> list[tuple[str, os.stat_result]]:
+    files = []
+    for directory, _, names in os.walk(path):
+        for name in names:
+            full_path = os.path.join(directory, name)
+            relative_path = os.path.relpath(full_path, path).replace(os.sep, "/")
+            if not is_excluded(relative_path, exclude):
+                files.append((relative_path, os.stat(full_path)))
+    return sorted(files)
+
+
+def fingerprint(outdir: str, path: str, exclude: list[str], salt: str = "") -> str:
+    """Returns a hash of a directory's contents, reading them only if its files have changed.
+
+    Every file's size and modification time make up a cheap signature of the directory, which is
+    kept with the hash in a cache file in the output directory. A change to either means the
+    contents are hashed again.
+    """
+    started = time.perf_counter()
+    cache_path = os.path.join(outdir, CACHE_FILE_NAME)
+    try:
+        with open(cache_path) as cache_file:
+            cache = json.load(cache_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+
+    key = f"{os.path.abspath(path)}|{json.dumps(sorted(exclude))}|{salt}"
+    files = asset_files(path, exclude)
+    signature = hashlib.sha256(
+        json.dumps(
+            [(name, stat.st_size, stat.st_mtime_ns) for name, stat in files]
+        ).encode("utf-8")
+    ).hexdigest()
+
+    cached = cache.get(key)
+    hit = cached is not None and cached["signature"] == signature
+    if hit:
+        digest = cached["hash"]
+    else:
+        content = hashlib.sha256(
+            f"{json.dumps(sorted(exclude))}|{salt}".encode("utf-8")
+        )
+        for name, _ in files:
+            content.update(name.encode("utf-8") + b"\0")
+            with open(os.path.join(path, name), "rb") as file:
+                content.update(hashlib.sha256(file.read()).digest())
+        digest = content.hexdigest()
+
+        cache[key] = {"signature": signature, "hash": digest}
+        os.makedirs(outdir, exist_ok=True)
+        with open(cache_path, "w") as cache_file:
+            json.dump(cache, cache_file, indent=2)
+
+    fingerprint_timings[path] = {
+        "ms": (time.perf_counter() - started) * 1000,
+        "cached": hit,
+        "files": len(files),
+    }
+    return digest
@@ -0,0 +1,155 @@
+import fnmatch
+import os
+import shutil
+import subprocess
+import zipfile
+
+
+# Never needed at runtime, whatever the asset's own excludes say.
+STRIPPED_PATTERNS = [
+    "__pycache__",
+    "*.pyc",
+    "*.pyo",
+    ".pytest_cache",
+    "tests",
+    "test_*.py",
+    "*_test.py",
+    ".DS_Store",
+]
+
+# Zip entries get this timestamp, the earliest a zip can hold, so the same files always make the
+# same archive.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def find_python(version: str) -> str | None:
+    """Returns a command for the given Python version, e.g. "3.9", if one can be run here.
+
+    LAMBDA_PYTHON can name the interpreter explicitly. Otherwise `python<version>` is looked
+    for on the path, and only used if it actually runs, as version managers leave shims behind
+    for versions that aren't active.
+    """
+    candidates = [os.environ.get("LAMBDA_PYTHON"), f"python{version}"]
+    for candidate in filter(None, candidates):
+        if shutil.which(candidate) is None:
+            continue
+        result = subprocess.run(
+            [
+                candidate,
+                "-c",
+                "import sys; print('%d.%d' % sys.version_info[:2])",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode == 0 and result.stdout.strip() == version:
+            return candidate
+    return None
+
+
+def is_stripped(relative_path: str, exclude: list[str]) -> bool:
+    for part in relative_path.split("/"):
+        if any(fnmatch.fnmatch(part, pattern) for pattern in STRIPPED_PATTERNS):
+            return True
+    return any(
+        fnmatch.fnmatch(relative_path, pattern)
+        or fnmatch.fnmatch(relative_path, pattern.removeprefix("**/"))
+        for pattern in exclude
+    )
+
+
+def copy_stripped(source: str, target: str, exclude: list[str]) -> None:
+    """Copies a directory, leaving out caches, tests and anything matching `exclude`."""
+    for directory, directories, names in os.walk(source):
+        relative_directory = os.path.relpath(directory, source).replace(os.sep, "/")
+        prefix = "" if relative_directory == "." else f"{relative_directory}/"
+        directories[:] = sorted(
+            name for name in directories if not is_stripped(prefix + name, exclude)
+        )
+        os.makedirs(os.path.join(target, prefix), exist_ok=True)
+        for name in names:
+            if not is_stripped(prefix + name, exclude):
+                shutil.copyfile(
+                    os.path.join(directory, name), os.path.join(target, prefix, name)
+                )
+
+
+def compile_bytecode(python: str, directory: str, install_dir: str) -> None:
+    """Compiles every module in a directory with the given interpreter.
+
+    Lambda's code and layer directories are read only, so without this the runtime compiles
+    each module again on every cold start. The bytecode is checked against nothing, as zip
+    extraction doesn't keep modification times. Paths in it are those the modules will have
+    once installed in `install_dir`, which keeps tracebacks right and the bytecode the same
+    wherever it's built.
+    """
+    subprocess.run(
+        [
+            python,
+            "-m",
+            "compileall",
+            "-q",
+            "--invalidation-mode",
+            "unchecked-hash",
+            "-s",
+            directory,
+            "-p",
+            install_dir,
+            directory,
+        ],
+        check=True,
+    )
+
+
+def write_zip(directory: str, path: str) -> None:
+    """Zips a directory deterministically, with entries sorted and timestamps fixed.
+
+    Entries are stored rather than compressed, which makes the archive larger but quicker for
+    Lambda to extract.
+    """
+    files = []
+    for current, _, names in os.walk(directory):
+        files.extend(os.path.join(current, name) for name in names)
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        for file in sorted(files):
+            info = zipfile.ZipInfo(
+                os.path.relpath(file, directory).replace(os.sep, "/"), ZIP_DATE_TIME
+            )
+            info.external_attr = 0o644 << 16
+            with open(file, "rb") as contents:
+                archive.writestr(info, contents.read())
+
+
+def bundle(
+    source: str,
+    output: str,
+    python: str,
+    install_dir: str,
+    exclude: list[str] | None = None,
+    zip_name: str | None = None,
+) -> None:
+    """Writes a stripped, precompiled copy of `source` to `output`, to be installed in
+    `install_dir`, i.e. "/var/task" for a function and "/opt" for a layer.
+
+    With a `zip_name`, `output` holds just that archive of the bundle instead, which CDK then
+    uploads as it is.
+    """
+    if zip_name is None:
+        copy_stripped(source, output, exclude or [])
+        compile_bytecode(python, output, install_dir)
+        return
+
+    staging = os.path.join(output, ".bundle")
+    copy_stripped(source, staging, exclude or [])
+    compile_bytecode(python, staging, install_dir)
+    write_zip(staging, os.path.join(output, zip_name))
+    shutil.rmtree(staging)
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(path)
+        for name in names
+    )
@@ -2,10 +2,66 @@ from dataclasses import dataclass
 from aws_cdk import Duration, RemovalPolicy
 from aws_cdk.aws_ecr import LifecycleRule
 from aws_cdk.aws_ecs import DeploymentControllerType
+from aws_cdk.aws_lambda import Architecture
 from aws_cdk.aws_logs import RetentionDays
 from aws_cdk.aws_codedeploy import EcsDeploymentConfig
 
 
+@dataclass(frozen=True)
+class FunctionProfile:
+    """The resources given to a Lambda function. The defaults are Lambda's own, but on arm64,
+    which is cheaper per GB-second and runs our pure Python code just as well.
+    """
+
+    memory_size: int = 128
+    architecture: Architecture = Architecture.ARM_64
+    timeout: Duration = Duration.seconds(3)
+    # Reserved concurrency is taken from the account's unreserved pool, which can't go below 100.
+    reserved_concurrency: int | None = None
+    ephemeral_storage_mb: int = 512
+
+
+@dataclass(frozen=True)
+class FunctionProfiles:
+    """A profile for each of our Lambda functions."""
+
+    # GetEntries is read heavy and its time goes on queries, decoding and encoding, all of which
+    # get more CPU with more memory.
+    get_entries: FunctionProfile = FunctionProfile()
+    upsert_entry: FunctionProfile = FunctionProfile()
+    delete_entry: FunctionProfile = FunctionProfile()
+    # Serves all three of the above in single function mode.
+    router: FunctionProfile = FunctionProfile()
+    flush_entry_updates: FunctionProfile = FunctionProfile(timeout=Duration.seconds(30))
+    update_list_snapshot: FunctionProfile = FunctionProfile(
+        timeout=Duration.seconds(30)
+    )
+
+
+# Named sets of profiles, chosen in app.py.
+FUNCTION_PROFILE_PRESETS = {
+    "pipeline": FunctionProfiles(
+        get_entries=FunctionProfile(memory_size=1024, timeout=Duration.seconds(10)),
+        upsert_entry=FunctionProfile(memory_size=256, timeout=Duration.seconds(5)),
+        delete_entry=FunctionProfile(memory_size=256, timeout=Duration.seconds(10)),
+        router=FunctionProfile(memory_size=1024, timeout=Duration.seconds(10)),
+        flush_entry_updates=FunctionProfile(
+            memory_size=512, timeout=Duration.seconds(30)
+        ),
+        update_list_snapshot=FunctionProfile(
+            memory_size=512, timeout=Duration.seconds(30)
+        ),
+    ),
+    # Ephemeral environments see little traffic, so are kept small.
+    "ephemeral": FunctionProfiles(
+        get_entries=FunctionProfile(memory_size=512, timeout=Duration.seconds(10)),
+        upsert_entry=FunctionProfile(memory_size=128, timeout=Duration.seconds(5)),
+        delete_entry=FunctionProfile(memory_size=128, timeout=Duration.seconds(10)),
+        router=FunctionProfile(memory_size=512, timeout=Duration.seconds(10)),
+    ),
+}
+
+
 @dataclass
 class CommonConfig:
     # General configuration
@@ -17,6 +73,24 @@ class CommonConfig:
     image_repository_name: str = f"{prefix.lower()}-image-repo"
     auto_delete_images: bool = False
     ecr_lifecycle_rule: LifecycleRule | None = None
+    # Stateless stack configuration
+    describe_table_on_init: bool = False
+    read_cache_enabled: bool = True
+    read_cache_ttl_seconds: int = 60
+    api_cache_enabled: bool = False
+    api_cache_ttl_seconds: int = 60
+    api_cache_size_gb: str = "0.5"
+    async_writes_enabled: bool = False
+    write_coalescing_window_seconds: int = 5
+    list_snapshots_enabled: bool = False
+    tombstone_ttl_days: int = 7
+    single_function_router: bool = False
+    shard_config_ttl_seconds: int = 30
+    log_payload_sample_rate: float = 0.1
+    log_payload_max_chars: int = 2000
+    bundle_lambda_assets: bool = False
+    zip_layer: bool = True
+    function_profiles: FunctionProfiles = FUNCTION_PROFILE_PRESETS["pipeline"]
     # Web stack configuration
     web_deployment_controller_type: DeploymentControllerType | None = (
         DeploymentControllerType.CODE_DEPLOY
@@ -0,0 +1,85 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from aws_cdk import App
+from aws_cdk.cx_api import CloudAssembly
+
+import assets
+
+
+STACK_NAMES = ["Pipeline", "Networking", "Stateful", "Stateless", "Web"]
+
+# The stacks each ephemeral stack takes constructs from, which have to be built alongside it.
+STACK_DEPENDENCIES = {
+    "Stateless": ["Networking", "Stateful"],
+    "Web": ["Networking", "Stateful", "Stateless"],
+}
+
+
+def selected_stacks(app: App) -> set[str]:
+    """Returns the names of the stacks to build, from the `stacks` context.
+
+    The context is a comma separated list of names from `STACK_NAMES`, e.g.
+    `-c stacks=Stateful,Stateless`, and any stacks they depend on are added to it. Without it
+    every stack is built. Ephemeral stacks are only ever built with an `ephemeral_prefix`.
+    """
+    requested = app.node.try_get_context("stacks")
+    if not requested:
+        return set(STACK_NAMES)
+
+    names = {name.strip() for name in requested.split(",") if name.strip()}
+    unknown = names - set(STACK_NAMES)
+    if unknown:
+        raise ValueError(
+            f"Unknown stacks {', '.join(sorted(unknown))} in the stacks context, expected "
+            f"some of {', '.join(STACK_NAMES)}"
+        )
+
+    for name in list(names):
+        names.update(STACK_DEPENDENCIES.get(name, []))
+    return names
+
+
+class SynthTimer:
+    """Records how long each stack takes to construct, and the app to synthesize.
+
+    CDK synthesizes every stack in a single call, so synthesis is only timed as a whole. The
+    report breaks it down by each stack's template size and by the asset directories
+    fingerprinted along the way.
+    """
+
+    def __init__(self, app: App, started: float):
+        self.app = app
+        # Importing aws_cdk alone takes seconds, so the time until the app was created is kept too.
+        self.import_ms = (time.perf_counter() - started) * 1000
+        self.construct_ms: dict[str, float] = {}
+        self.synth_ms = 0.0
+
+    @contextmanager
+    def construct(self, name: str):
+        started = time.perf_counter()
+        yield
+        self.construct_ms[name] = (time.perf_counter() - started) * 1000
+
+    def synth(self) -> CloudAssembly:
+        started = time.perf_counter()
+        assembly = self.app.synth()
+        self.synth_ms = (time.perf_counter() - started) * 1000
+
+        if str(self.app.node.try_get_context("synth_timings")).lower() == "true":
+            print(json.dumps(self.report(assembly), indent=2), file=sys.stderr)
+        return assembly
+
+    def report(self, assembly: CloudAssembly) -> dict:
+        # Stacks in nested stages, like those the pipeline deploys, are included too.
+        return {
+            "import_ms": self.import_ms,
+            "construct_ms": self.construct_ms,
+            "synth_ms": self.synth_ms,
+            "template_kb": {
+                stack.hierarchical_id: round(len(json.dumps(stack.template)) / 1024, 1)
+                for stack in assembly.stacks_recursively
+            },
+            "asset_fingerprints": assets.fingerprint_timings,
+        }
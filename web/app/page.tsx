@@ -5,19 +5,26 @@ import TodoSection from "@/components/TodoSection";
 
 export const dynamic = "force-dynamic";
 
+// The entries API is paginated, but we render the whole list at once, so we
+// ask for it in a single response. Entries come back oldest first.
+async function fetchAllEntries(endpoint: string) {
+  const response = await fetch(`${endpoint}?all=true`, {
+    next: {
+      tags: [ENTRIES_CACHE_TAG],
+    },
+  });
+  console.debug({ response });
+
+  const entries: TodoEntry[] = await response.json();
+  return entries;
+}
+
 export default async function Page() {
   let entries: TodoEntry[] = [];
 
   if (todoApiEndpoint) {
     try {
-      const response = await fetch(todoApiEndpoint, {
-        next: {
-          tags: [ENTRIES_CACHE_TAG],
-        },
-      });
-      console.debug({ response });
-
-      entries = await response.json();
+      entries = await fetchAllEntries(todoApiEndpoint);
       console.log({ message: "Successfully fetched entries!", entries });
     } catch (error) {
       console.error({
@@ -3,9 +3,11 @@ function tryToGetApiDetailsFromEnv() {
   // as it's easier to work with.
   let endpoint = process.env.TODO_API_ENDPOINT || undefined;
 
-  // Our web app only interacts with the /entries resource, so we'll just hardcode
-  // that into our endpoint here.
-  endpoint = endpoint && `${endpoint}entries`;
+  // Our web app only interacts with the entries of a single list, the default one
+  // unless TODO_LIST_ID names another, so we'll just hardcode that into our
+  // endpoint here.
+  const listId = process.env.TODO_LIST_ID || "default";
+  endpoint = endpoint && `${endpoint}lists/${encodeURIComponent(listId)}/entries`;
 
   console.info(
     `Retrieved API details from environment variables, TODO_API_ENDPOINT: ${endpoint}`
@@ -9,3 +9,8 @@ export type TodoEntryInput = Pick<
   TodoEntry,
   "Completed" | "DateCreated" | "Description"
 >;
+
+export type TodoEntriesPage = {
+  entries: TodoEntry[];
+  nextCursor: string | null;
+};